@@ -13,17 +13,74 @@ Author: Abdul Malik
 
 import os
 import sys
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # Make sure the project root is on sys.path so that we can import `database` and `models`
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from database import get_session
+from sqlalchemy import insert, select, text
+from sqlalchemy.orm import joinedload
+
+from database import get_session, instrumented, run_transaction
 from models.admin_staff import Admin_staff
 from models.trainer import Trainer
 from models.room import Room
 from models.trainer_availability import TrainerAvailability
 from models.session import Session as SessionModel
+from app.booking import book_session, booking_error_message, precheck_booking, record_booking
+from app.intervals import add_months
+
+
+# longest class series create_class_series() accepts (two years of weekly classes)
+MAX_SERIES_OCCURRENCES = 104
+
+
+# Shared validation / query helpers.
+# The synchronous functions below and their async twins in async_services.py both use
+# these, so the two versions can never disagree about what is valid.
+
+def validate_room(room_name: str, max_capacity: int):
+    """
+    Clean up and validate the inputs for a new room (no database access).
+
+    Returns:
+        (cleaned_name, error_message)
+    """
+    # basic cleanup and validation on the text / numeric inputs
+    cleaned_name = room_name.strip()
+
+    if cleaned_name == "":
+        return None, "Room name cannot be empty."
+
+    if max_capacity <= 0:
+        return None, "Room capacity must be a positive integer."
+
+    return cleaned_name, None
+
+
+def room_with_name_query(room_name: str):
+    """SELECT the id of a room that already uses this name."""
+    return select(Room.room_id).where(Room.room_name == room_name).limit(1)
+
+
+def validate_class_window(start_dt: datetime, end_dt: datetime, max_capacity: int) -> str | None:
+    """Check a CLASS session's time window and capacity before hitting the database."""
+    # quick sanity checks before touching the database
+    if end_dt <= start_dt:
+        return "End time must be after start time."
+
+    if max_capacity <= 0:
+        return "Class capacity must be a positive integer."
+
+    # sessions are stored in monthly partitions and may not span more than one month
+    if end_dt > add_months(start_dt, 1):
+        return "A class cannot last longer than one month."
+
+    # optional: disallow classes that start in the past
+    if start_dt < datetime.now():
+        return "Class must start in the future."
+
+    return None
 
 
 # This function lets an admin create a brand new room in the gym.
@@ -32,6 +89,7 @@ from models.session import Session as SessionModel
 #   - Room name cannot be an empty string.
 #   - max_capacity must be a positive integer.
 #   - Optionally: we prevent duplicate room names to keep things cleaner.
+@instrumented("admin_service.create_room")
 def create_room(admin_id: int,
                 room_name: str,
                 max_capacity: int):
@@ -44,29 +102,20 @@ def create_room(admin_id: int,
         - error_message: a string describing what went wrong (or None on success)
     """
 
-    # basic cleanup and validation on the text / numeric inputs
-    cleaned_name = room_name.strip()
-
-    if cleaned_name == "":
-        return None, "Room name cannot be empty."
-
-    if max_capacity <= 0:
-        return None, "Room capacity must be a positive integer."
+    cleaned_name, error = validate_room(room_name, max_capacity)
+    if error is not None:
+        return None, error
 
     with get_session() as db:
         # look up the admin that will be responsible for this room
-        admin = db.query(Admin_staff).filter_by(admin_id=admin_id).first()
+        admin = db.get(Admin_staff, admin_id)
 
         # CASE: no such admin found
         if admin is None:
             return None, f"Admin_staff with id {admin_id} not found."
 
         # optional: avoid duplicate room names (design choice)
-        existing_room = (
-            db.query(Room)
-            .filter(Room.room_name == cleaned_name)
-            .first()
-        )
+        existing_room = db.execute(room_with_name_query(cleaned_name)).first()
         if existing_room is not None:
             return None, "A room with that name already exists."
 
@@ -93,11 +142,10 @@ def create_room(admin_id: int,
 # This function is used by the admin to create a CLASS session.
 # Design choices for this project:
 #   - session_type is always "CLASS" here.
-#   - max_capacity is provided by the admin and must be > 0.
-#   - The database trigger `prevent_room_overlap` will stop overlapping
-#     sessions in the same room.
-#   - We also check that the trainer is actually available for this
-#     entire time window (using TrainerAvailability).
+#   - max_capacity is provided by the admin and must be > 0 (and fit in the room).
+#   - Every existence, availability and overlap check (trainer and room) plus the
+#     INSERT happen in one call to the book_session() database function (see booking.py).
+@instrumented("admin_service.create_class_session")
 def create_class_session(admin_id: int,
                          trainer_id: int,
                          room_id: int,
@@ -113,95 +161,301 @@ def create_class_session(admin_id: int,
         - error_message: a string describing what went wrong (or None on success)
     """
 
-    # quick sanity checks before touching the database
-    if end_dt <= start_dt:
-        return None, "End time must be after start time."
+    error = validate_class_window(start_dt, end_dt, max_capacity)
+    if error is not None:
+        return None, error
 
-    if max_capacity <= 0:
-        return None, "Class capacity must be a positive integer."
+    # fast path: reject obvious conflicts from the in-memory index (only if it is enabled)
+    error = precheck_booking(trainer_id, room_id, None, start_dt, end_dt)
+    if error is not None:
+        return None, error
 
-    # optional: disallow classes that start in the past
-    if start_dt < datetime.now():
-        return None, "Class must start in the future."
+    def book(db):
+        new_session_id, error_code, error_message = book_session(
+            db,
+            session_type="CLASS",
+            member_id=None,  # CLASS sessions do not have a single member
+            trainer_id=trainer_id,
+            room_id=room_id,
+            admin_id=admin_id,
+            start_dt=start_dt,
+            end_dt=end_dt,
+            max_capacity=max_capacity,
+        )
 
-    with get_session() as db:
-        # look up all the referenced entities (foreign keys)
-        admin = db.query(Admin_staff).filter_by(admin_id=admin_id).first()
-        trainer = db.query(Trainer).filter_by(trainer_id=trainer_id).first()
-        room = db.query(Room).filter_by(room_id=room_id).first()
+        # CASE: one of the booking checks failed (not found, capacity, availability, overlap)
+        if error_code is not None:
+            return None, error_message
 
-        # series of checks to make sure everything exists
-        if admin is None:
-            return None, f"Admin_staff with id {admin_id} not found."
-        if trainer is None:
-            return None, f"Trainer with id {trainer_id} not found."
-        if room is None:
-            return None, f"Room with id {room_id} not found."
-
-        # NEW RULE: class capacity cannot exceed the room's capacity
-        if max_capacity > room.max_capacity:
-            return None, (
-                f"Class capacity ({max_capacity}) cannot exceed room capacity "
-                f"({room.max_capacity})."
-            )
-
-        # check that the trainer is actually available for this time range
-        # here we require that the requested [start_dt, end_dt] is fully
-        # contained inside at least one availability block.
-        availability = (
-            db.query(TrainerAvailability)
-            .filter(
-                TrainerAvailability.trainer_id == trainer_id,
-                TrainerAvailability.start_date_time <= start_dt,
-                TrainerAvailability.end_date_time >= end_dt,
-            )
-            .first()
+        # normal case: load the new row (with its room, which the CLI prints)
+        new_session = db.get(
+            SessionModel,
+            (new_session_id, start_dt),
+            options=[joinedload(SessionModel.room)],
         )
+        return new_session, None
 
-        if availability is None:
-            return None, (
-                "Trainer is not available for the requested time range. "
-                "Please choose a window inside one of their availability blocks."
-            )
-
-        # NEW RULE: prevent the trainer from being double-booked
-        trainer_conflict = (
-            db.query(SessionModel)
-            .filter(
-                SessionModel.trainer_id == trainer_id,
-                SessionModel.start_date_time < end_dt,
-                SessionModel.end_date_time > start_dt,
-            )
-            .first()
-        )
+    # run_transaction() retries the booking if it loses a deadlock / serialization check
+    try:
+        new_session, error = run_transaction(book)
+    except Exception as e:
+        # CASE: some other constraint or DB issue
+        return None, f"Could not create class session: {str(e)}"
 
-        if trainer_conflict is not None:
-            return None, (
-                "Trainer is already scheduled to teach another session "
-                f"during this time window (session id {trainer_conflict.session_id})."
-            )
+    if error is not None:
+        return None, error
+    new_session_id = new_session.session_id
 
-        # construct the CLASS session; note member=None (it’s a group class)
-        new_session = SessionModel(
-            session_type="CLASS",
-            start_date_time=start_dt,
-            end_date_time=end_dt,
-            max_capacity=max_capacity,
-            room=room,
-            created_by_admin=admin,
-            trainer=trainer,
-            member=None,  # CLASS sessions do not have a single member
+    # the class is committed now, so it is safe to add it to the in-memory index
+    record_booking(new_session_id, room_id, trainer_id, None, start_dt, end_dt)
+
+    return new_session, None
+
+
+def class_series_occurrences(first_start_dt: datetime,
+                             first_end_dt: datetime,
+                             occurrences: int,
+                             every_days: int = 7):
+    """
+    Validate a class series and list its (start, end) windows (no database access).
+
+    Returns:
+        (windows, error_message)
+    """
+    if occurrences < 1 or occurrences > MAX_SERIES_OCCURRENCES:
+        return None, f"Number of classes must be between 1 and {MAX_SERIES_OCCURRENCES}."
+
+    if every_days < 1:
+        return None, "Classes must be at least one day apart."
+
+    # one class must end before the next one starts (they share the trainer and room)
+    if first_end_dt - first_start_dt > timedelta(days=every_days):
+        return None, "A class cannot last longer than the gap between two classes."
+
+    step = timedelta(days=every_days)
+    return [
+        (first_start_dt + step * i, first_end_dt + step * i)
+        for i in range(occurrences)
+    ], None
+
+
+# same lock order as book_session(): trainers, then (no) members, then rooms
+SERIES_LOCK_SQL = text("""
+    SELECT lock_booking_resources(
+        ARRAY[CAST(:tid AS integer)], ARRAY[]::integer[], ARRAY[CAST(:rid AS integer)]
+    )
+""")
+
+# referenced rows for a class series, in one round trip
+SERIES_REFERENCES_SQL = text("""
+    SELECT EXISTS (SELECT 1 FROM trainer WHERE trainer_id = :tid) AS trainer_found,
+           (SELECT max_capacity FROM room WHERE room_id = :rid) AS room_capacity,
+           EXISTS (SELECT 1 FROM admin_staff WHERE admin_id = :aid) AS admin_found
+""")
+
+# every occurrence checked at once: availability (one-off blocks and weekly rules),
+# then the first clashing trainer / room session, each an index probe per occurrence
+# (sessions last at most a month, which bounds the probe to one or two partitions)
+SERIES_CONFLICTS_SQL = text("""
+    SELECT o.n, o.start_dt, o.end_dt,
+           NOT EXISTS (
+               SELECT 1 FROM trainer_availability_windows(:tid, o.start_dt, o.end_dt) w
+               WHERE w.start_date_time <= o.start_dt
+                 AND w.end_date_time >= o.end_dt
+           ) AS unavailable,
+           (SELECT s.session_id FROM session s
+            WHERE s.trainer_id = :tid
+              AND s.start_date_time < o.end_dt
+              AND s.start_date_time >= o.start_dt - interval '1 month'
+              AND tsrange(s.start_date_time, s.end_date_time) && tsrange(o.start_dt, o.end_dt)
+            LIMIT 1) AS trainer_conflict_id,
+           (SELECT s.session_id FROM session s
+            WHERE s.room_id = :rid
+              AND s.start_date_time < o.end_dt
+              AND s.start_date_time >= o.start_dt - interval '1 month'
+              AND tsrange(s.start_date_time, s.end_date_time) && tsrange(o.start_dt, o.end_dt)
+            LIMIT 1) AS room_conflict_id
+    FROM unnest(CAST(:starts AS timestamp[]), CAST(:ends AS timestamp[]))
+         WITH ORDINALITY AS o(start_dt, end_dt, n)
+    ORDER BY o.n
+""")
+
+
+def series_reference_error(references, trainer_id: int, room_id: int, admin_id: int,
+                           max_capacity: int) -> str | None:
+    """Turn the SERIES_REFERENCES_SQL row into the booking error message (None = all found and fits)."""
+    error_code = None
+    if not references.trainer_found:
+        error_code = "TRAINER_NOT_FOUND"
+    elif references.room_capacity is None:
+        error_code = "ROOM_NOT_FOUND"
+    elif not references.admin_found:
+        error_code = "ADMIN_NOT_FOUND"
+    elif max_capacity > references.room_capacity:
+        error_code = "ROOM_CAPACITY_EXCEEDED"
+    if error_code is None:
+        return None
+
+    return booking_error_message(
+        error_code, trainer_id=trainer_id, room_id=room_id,
+        admin_id=admin_id, max_capacity=max_capacity,
+    )
+
+
+def series_conflicts_params(trainer_id: int, room_id: int, windows) -> dict:
+    return {
+        "tid": trainer_id,
+        "rid": room_id,
+        "starts": [start_dt for start_dt, _ in windows],
+        "ends": [end_dt for _, end_dt in windows],
+    }
+
+
+def series_conflict_message(row, trainer_id: int, room_id: int) -> str | None:
+    """Turn one SERIES_CONFLICTS_SQL row into the booking error message (None = free)."""
+    if row.unavailable:
+        return booking_error_message("TRAINER_UNAVAILABLE")
+    if row.trainer_conflict_id is not None:
+        return booking_error_message("TRAINER_CONFLICT", trainer_id=trainer_id,
+                                     conflict_session_id=row.trainer_conflict_id)
+    if row.room_conflict_id is not None:
+        return booking_error_message("ROOM_CONFLICT", room_id=room_id,
+                                     conflict_session_id=row.room_conflict_id)
+    return None
+
+
+def split_series_conflicts(rows, trainer_id: int, room_id: int):
+    """SERIES_CONFLICTS_SQL rows -> (free (start, end) windows, conflicts as (start, reason))."""
+    free_windows = []
+    conflicts = []
+    for row in rows:
+        message = series_conflict_message(row, trainer_id, room_id)
+        if message is None:
+            free_windows.append((row.start_dt, row.end_dt))
+        else:
+            conflicts.append((row.start_dt, message))
+    return free_windows, conflicts
+
+
+def series_refused_message(conflicts, windows) -> str:
+    return f"{len(conflicts)} of {len(windows)} dates conflict; nothing was created."
+
+
+def series_insert_statement(admin_id: int, trainer_id: int, room_id: int, max_capacity: int,
+                            free_windows):
+    """One multi-row INSERT of the series' CLASS sessions, returning their ids."""
+    return (
+        insert(SessionModel)
+        .values([
+            {
+                "session_type": "CLASS",
+                "start_date_time": start_dt,
+                "end_date_time": end_dt,
+                "max_capacity": max_capacity,
+                "room_id": room_id,
+                "created_by_admin_id": admin_id,
+                "trainer_id": trainer_id,
+                "member_id": None,
+            }
+            for start_dt, end_dt in free_windows
+        ])
+        .returning(SessionModel.session_id)
+    )
+
+
+def series_sessions_query(new_session_ids, free_windows):
+    """SELECT the new sessions (with their room) in date order."""
+    return (
+        select(SessionModel)
+        .options(joinedload(SessionModel.room))
+        .where(
+            SessionModel.session_id.in_(new_session_ids),
+            # bounds the lookup to the partitions the series landed in
+            SessionModel.start_date_time.between(free_windows[0][0], free_windows[-1][0]),
         )
+        .order_by(SessionModel.start_date_time)
+    )
+
+
+# This function lets the admin set up a recurring class (e.g. a 12-week "Tuesday Spin")
+# in one go instead of calling create_class_session() once per week.
+#   - Every occurrence is checked against availability, the trainer's sessions and
+#     the room's sessions in one set-based query, and the free ones are inserted with
+#     one multi-row INSERT.
+#   - By default it is all or nothing: if any date conflicts, nothing is created and
+#     the conflicting dates are reported. With skip_conflicts=True the free dates are
+#     booked and the conflicting ones are reported and left out.
+#   - The trainer and room locks (lock_booking_resources(), see ddl_extras.py) are
+#     taken before the checks, so no other booking can slip in between.
+@instrumented("admin_service.create_class_series")
+def create_class_series(admin_id: int,
+                        trainer_id: int,
+                        room_id: int,
+                        first_start_dt: datetime,
+                        first_end_dt: datetime,
+                        max_capacity: int,
+                        occurrences: int,
+                        every_days: int = 7,
+                        skip_conflicts: bool = False):
+    """
+    Create `occurrences` CLASS sessions, every_days apart, starting with the given window.
+
+    Returns:
+        (sessions, conflicts, error_message)
+        - sessions: the created Session objects in date order (empty if nothing was created)
+        - conflicts: list of (start_dt, reason) for every date that could not be booked
+        - error_message: set when the series as a whole was refused (bad input, unknown
+          trainer / room / admin, or conflicts without skip_conflicts)
+    """
 
-        db.add(new_session)
+    error = validate_class_window(first_start_dt, first_end_dt, max_capacity)
+    if error is not None:
+        return [], [], error
 
-        try:
-            # this is where the `prevent_room_overlap` trigger will fire
-            # and block any conflicting sessions in the same room
-            db.flush()
-        except Exception as e:
-            # CASE: overlapping room booking or some other constraint issue
-            return None, f"Could not create class session: {str(e)}"
+    windows, error = class_series_occurrences(first_start_dt, first_end_dt, occurrences, every_days)
+    if error is not None:
+        return [], [], error
 
-        # normal case: everything worked
-        return new_session, None
\ No newline at end of file
+    def book_series(db):
+        db.execute(SERIES_LOCK_SQL, {"tid": trainer_id, "rid": room_id})
+
+        references = db.execute(
+            SERIES_REFERENCES_SQL, {"tid": trainer_id, "rid": room_id, "aid": admin_id}
+        ).one()
+
+        # CASE: something the series refers to does not exist / does not fit
+        error = series_reference_error(references, trainer_id, room_id, admin_id, max_capacity)
+        if error is not None:
+            return [], [], error
+
+        rows = db.execute(SERIES_CONFLICTS_SQL, series_conflicts_params(trainer_id, room_id, windows)).all()
+        free_windows, conflicts = split_series_conflicts(rows, trainer_id, room_id)
+
+        # CASE: some dates conflict and the admin asked for all or nothing
+        if conflicts and not skip_conflicts:
+            return [], conflicts, series_refused_message(conflicts, windows)
+
+        if not free_windows:
+            return [], conflicts, None
+
+        # one multi-row INSERT for the whole series
+        new_session_ids = db.scalars(
+            series_insert_statement(admin_id, trainer_id, room_id, max_capacity, free_windows)
+        ).all()
+
+        new_sessions = db.scalars(series_sessions_query(new_session_ids, free_windows)).all()
+        return new_sessions, conflicts, None
+
+    # run_transaction() retries the series if it loses a deadlock / serialization check
+    try:
+        new_sessions, conflicts, error = run_transaction(book_series)
+    except Exception as e:
+        # CASE: some constraint or other DB issue (the whole series was rolled back)
+        return [], [], f"Could not create class series: {str(e)}"
+
+    # the series is committed now, so it is safe to add it to the in-memory index
+    for new_session in new_sessions:
+        record_booking(new_session.session_id, room_id, trainer_id, None,
+                       new_session.start_date_time, new_session.end_date_time)
+
+    return new_sessions, conflicts, error
@@ -0,0 +1,707 @@
+"""
+COMP3005 - Final Project: Health & Fitness Club Management System
+File: async_services.py
+
+Description:
+asyncio versions of the member, trainer and admin service functions, for callers
+that serve many users at once (e.g. a web front end) and do not want one thread per
+request. They run on SQLAlchemy's async engine (see get_async_session() in
+database.py) and reuse the validation, query and formatting helpers from the
+synchronous service modules, so both versions behave exactly the same and return
+the same (result, error_message) tuples.
+
+Requires the asyncpg driver (pip install asyncpg); the synchronous CLI does not.
+
+Author: Abdul Malik
+"""
+
+import asyncio
+import os
+import sys
+from datetime import date, datetime, time, timedelta
+
+# Make sure the project root is on sys.path so that we can import `database` and `models`
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+
+from database import get_async_session, get_async_read_session, instrumented, run_async_transaction
+from models.member import Member
+from models.admin_staff import Admin_staff
+from models.room import Room
+from models.trainer import Trainer
+from models.trainer_availability import TrainerAvailability
+from models.trainer_availability_rule import TrainerAvailabilityRule
+from models.trainer_availability_exception import TrainerAvailabilityException
+from models.session import Session as SessionModel
+from app.booking import book_session_async, precheck_booking, record_booking
+from app.conflict_index import get_conflict_index, conflict_index_ready
+from app.read_cache import (
+    get_read_cache,
+    read_cache_ready,
+    invalidate_read_cache,
+    dashboard_key,
+    schedule_key,
+    not_started,
+)
+from app.member_service import (
+    validate_registration,
+    register_member_statement,
+    registration_result,
+    member_with_email_query,
+    member_with_phone_query,
+    clean_optional_text,
+    DASHBOARD_QUERY,
+    dashboard_row_to_dict,
+    dashboard_cache_tags,
+    validate_pt_window,
+    ENROLL_STATEMENT,
+    UNENROLL_STATEMENT,
+    CLASS_STATUS_QUERY,
+    UPCOMING_CLASSES_QUERY,
+    enrollment_result,
+    enrollment_error_message,
+    ENROLLMENT_ATTEMPTS,
+    ENROLLMENT_BUSY_MESSAGE,
+    upcoming_class_row_to_dict,
+    is_duplicate_enrollment,
+)
+from app.trainer_service import (
+    validate_availability_window,
+    AVAILABILITY_CHECK,
+    INSERT_AVAILABILITY,
+    availability_params,
+    availability_conflict_message,
+    validate_availability_rule,
+    availability_rule_overlap_query,
+    availability_rule_conflict_message,
+    validate_skip_day,
+    sessions_during_rule_query,
+    sessions_during_rule_message,
+    recurring_availability_query,
+    trainer_schedule_query,
+    schedule_row_to_dict,
+    schedule_cache_tags,
+    validate_slot_search,
+    OPEN_SLOT_SOURCES_QUERY,
+    open_slots_from_rows,
+)
+from app.admin_service import (
+    validate_room,
+    room_with_name_query,
+    validate_class_window,
+    class_series_occurrences,
+    SERIES_LOCK_SQL,
+    SERIES_REFERENCES_SQL,
+    SERIES_CONFLICTS_SQL,
+    series_reference_error,
+    series_conflicts_params,
+    split_series_conflicts,
+    series_refused_message,
+    series_insert_statement,
+    series_sessions_query,
+)
+
+
+def _load_caches():
+    get_read_cache()
+    get_conflict_index()
+
+
+async def warm_up_caches():
+    """
+    Create the read cache and load the conflict index (whichever are enabled) without
+    blocking the event loop: the first use of either starts the change listener and waits
+    for it, and the index reads every upcoming booking, so that runs in a worker thread.
+    Every function below that uses them awaits this first; a server can also await it at
+    startup.
+    """
+    if not (read_cache_ready() and conflict_index_ready()):
+        await asyncio.to_thread(_load_caches)
+
+
+# ---------------------------------------------------------------------------------------
+# Member
+# ---------------------------------------------------------------------------------------
+
+@instrumented("async_services.register_member")
+async def register_member(first_name: str,
+                          last_name: str,
+                          gender: str,
+                          email: str,
+                          phone_number: str | None = None,
+                          dob_year: int | None = None,
+                          dob_month: int | None = None,
+                          dob_day: int | None = None,
+                          goal_weight: float | None = None,
+                          current_weight: float | None = None):
+    """Async version of member_service.register_member() -> (member_id, error_message)."""
+
+    member_fields, error = validate_registration(
+        first_name, last_name, gender, email, phone_number,
+        dob_year, dob_month, dob_day, goal_weight, current_weight,
+    )
+    if error is not None:
+        return None, error
+
+    async with get_async_session() as db:
+        row = (await db.execute(register_member_statement(member_fields))).one()
+        return registration_result(row)
+
+
+@instrumented("async_services.update_member_profile")
+async def update_member_profile(member_id: int,
+                                new_phone: str | None = None,
+                                new_email: str | None = None):
+    """Async version of member_service.update_member_profile() -> (member, error_message)."""
+
+    cleaned_phone = clean_optional_text(new_phone)
+    cleaned_email = clean_optional_text(new_email)
+
+    async with get_async_session() as db:
+        member = await db.get(Member, member_id)
+
+        # CASE: no such member exists
+        if member is None:
+            return None, f"Member with id {member_id} not found."
+
+        if cleaned_phone is not None:
+            duplicate_phone = (
+                await db.execute(member_with_phone_query(cleaned_phone, exclude_member_id=member_id))
+            ).first()
+            if duplicate_phone is not None:
+                return None, "Another member already uses that phone number."
+
+            member.phone_number = cleaned_phone
+
+        if cleaned_email is not None:
+            duplicate = (
+                await db.execute(member_with_email_query(cleaned_email, exclude_member_id=member_id))
+            ).first()
+            if duplicate is not None:
+                return None, "Another member already uses that email."
+
+            member.email = cleaned_email
+
+        return member, None
+
+
+@instrumented("async_services.get_member_dashboard")
+async def get_member_dashboard(member_id: int) -> list[dict]:
+    """Async version of member_service.get_member_dashboard()."""
+    await warm_up_caches()
+    read_cache = get_read_cache()
+    if read_cache is not None:
+        cached_rows = read_cache.get(dashboard_key(member_id))
+        if cached_rows is not None:
+            return not_started(cached_rows)
+        generation = read_cache.generation
+
+    async with get_async_read_session() as db:
+        rows = (await db.execute(DASHBOARD_QUERY, {"mid": member_id})).all()
+
+    dashboard_rows = [dashboard_row_to_dict(row) for row in rows]
+
+    if read_cache is not None:
+        read_cache.put(dashboard_key(member_id), dashboard_rows,
+                       dashboard_cache_tags(member_id, rows), generation)
+
+    return dashboard_rows
+
+
+@instrumented("async_services.schedule_pt_session")
+async def schedule_pt_session(member_id: int,
+                              trainer_id: int,
+                              room_id: int,
+                              start_dt: datetime,
+                              end_dt: datetime,
+                              created_by_admin_id: int = 1):
+    """Async version of member_service.schedule_pt_session() -> (session, error_message)."""
+
+    error = validate_pt_window(start_dt, end_dt)
+    if error is not None:
+        return None, error
+
+    # fast path: reject obvious conflicts from the in-memory index (only if it is enabled)
+    await warm_up_caches()
+    error = precheck_booking(trainer_id, room_id, member_id, start_dt, end_dt)
+    if error is not None:
+        return None, error
+
+    async def book(db):
+        new_session_id, error_code, error_message = await book_session_async(
+            db,
+            session_type="PT",
+            member_id=member_id,
+            trainer_id=trainer_id,
+            room_id=room_id,
+            admin_id=created_by_admin_id,
+            start_dt=start_dt,
+            end_dt=end_dt,
+            max_capacity=1,      # by definition, PT session is 1-on-1
+        )
+
+        # CASE: one of the booking checks failed
+        if error_code is not None:
+            return None, error_message
+
+        return await db.get(SessionModel, (new_session_id, start_dt)), None
+
+    try:
+        new_session, error = await run_async_transaction(book)
+    except Exception as e:
+        # CASE: something went wrong (some other constraint or DB issue)
+        return None, f"Could not schedule session: {str(e)}"
+
+    if error is not None:
+        return None, error
+    new_session_id = new_session.session_id
+
+    await warm_up_caches()
+    record_booking(new_session_id, room_id, trainer_id, member_id, start_dt, end_dt)
+
+    return new_session, None
+
+
+@instrumented("async_services.enroll_in_class")
+async def enroll_in_class(member_id: int, session_id: int):
+    """Async version of member_service.enroll_in_class() -> (enrollment, error_message)."""
+
+    async def enroll(db):
+        for _ in range(ENROLLMENT_ATTEMPTS):
+            row = (await db.execute(ENROLL_STATEMENT, {"sid": session_id, "mid": member_id})).first()
+            if row is not None:
+                return enrollment_result(row), None
+
+            # CASE: nothing changed; find out why (class full, already enrolled, ...)
+            status = (await db.execute(CLASS_STATUS_QUERY, {"sid": session_id, "mid": member_id})).one()
+            error = enrollment_error_message(status, member_id, session_id, enrolling=True)
+            if error is not None:
+                return None, error
+
+        return None, ENROLLMENT_BUSY_MESSAGE
+
+    try:
+        enrollment, error = await run_async_transaction(enroll)
+    except IntegrityError as e:
+        # CASE: the same member signed up twice at the same moment and the other one won
+        if is_duplicate_enrollment(e):
+            return None, f"Member {member_id} is already enrolled in class {session_id}."
+        return None, f"Could not enroll in class: {str(e)}"
+    except Exception as e:
+        return None, f"Could not enroll in class: {str(e)}"
+
+    if enrollment is not None:
+        await warm_up_caches()
+        invalidate_read_cache(dashboard_key(member_id))
+
+    return enrollment, error
+
+
+@instrumented("async_services.unenroll_from_class")
+async def unenroll_from_class(member_id: int, session_id: int):
+    """Async version of member_service.unenroll_from_class() -> (enrollment, error_message)."""
+
+    async def unenroll(db):
+        for _ in range(ENROLLMENT_ATTEMPTS):
+            row = (await db.execute(UNENROLL_STATEMENT, {"sid": session_id, "mid": member_id})).first()
+            if row is not None:
+                return enrollment_result(row), None
+
+            status = (await db.execute(CLASS_STATUS_QUERY, {"sid": session_id, "mid": member_id})).one()
+            error = enrollment_error_message(status, member_id, session_id, enrolling=False)
+            if error is not None:
+                return None, error
+
+        return None, ENROLLMENT_BUSY_MESSAGE
+
+    try:
+        enrollment, error = await run_async_transaction(unenroll)
+    except Exception as e:
+        return None, f"Could not leave class: {str(e)}"
+
+    if enrollment is not None:
+        await warm_up_caches()
+        invalidate_read_cache(dashboard_key(member_id))
+
+    return enrollment, error
+
+
+@instrumented("async_services.list_upcoming_classes")
+async def list_upcoming_classes(limit: int = 20) -> list[dict]:
+    """Async version of member_service.list_upcoming_classes()."""
+    async with get_async_read_session() as db:
+        result = await db.execute(UPCOMING_CLASSES_QUERY, {"limit": limit})
+        return [upcoming_class_row_to_dict(row) for row in result]
+
+
+# ---------------------------------------------------------------------------------------
+# Trainer
+# ---------------------------------------------------------------------------------------
+
+# INSERT_AVAILABILITY, loading the new row as a TrainerAvailability object
+_INSERT_AVAILABILITY_ENTITY = select(TrainerAvailability).from_statement(INSERT_AVAILABILITY.clause)
+
+@instrumented("async_services.set_trainer_availability")
+async def set_trainer_availability(trainer_id: int,
+                                   start_dt: datetime,
+                                   end_dt: datetime):
+    """Async version of trainer_service.set_trainer_availability() -> (availability, error_message)."""
+
+    error = validate_availability_window(start_dt, end_dt)
+    if error is not None:
+        return None, error
+
+    # fast path: reject an obvious overlap from the in-memory index (only if it is enabled)
+    await warm_up_caches()
+    conflict_index = get_conflict_index()
+    if conflict_index is not None:
+        if conflict_index.find_availability_overlap(trainer_id, start_dt, end_dt) is not None:
+            return None, availability_conflict_message()
+
+    params = availability_params(trainer_id, start_dt, end_dt)
+
+    # same statements as the sync version; asyncpg prepares (and caches) them itself
+    async with get_async_session() as db:
+        row = (await db.execute(AVAILABILITY_CHECK.clause, params)).first()
+
+        # CASE: no such trainer
+        if row is None:
+            return None, f"Trainer with id {trainer_id} not found."
+
+        # CASE: overlaps one of the trainer's existing windows
+        if row.availability_id is not None:
+            return None, availability_conflict_message(row)
+
+        try:
+            new_availability = (await db.scalars(_INSERT_AVAILABILITY_ENTITY, params)).one()
+        except Exception as e:
+            # CASE: something went wrong (constraint, etc.)
+            return None, f"Could not set availability: {str(e)}"
+
+    if conflict_index is not None:
+        conflict_index.add_availability(new_availability.availability_id, trainer_id, start_dt, end_dt)
+    invalidate_read_cache(schedule_key(trainer_id))
+
+    return new_availability, None
+
+
+@instrumented("async_services.set_recurring_availability")
+async def set_recurring_availability(trainer_id: int,
+                                     weekday: int,
+                                     start_time: time,
+                                     end_time: time,
+                                     effective_from: date,
+                                     effective_until: date | None = None):
+    """Async version of trainer_service.set_recurring_availability() -> (rule, error_message)."""
+
+    error = validate_availability_rule(weekday, start_time, end_time, effective_from, effective_until)
+    if error is not None:
+        return None, error
+
+    async with get_async_session() as db:
+        trainer = await db.get(Trainer, trainer_id)
+
+        # CASE: no such trainer
+        if trainer is None:
+            return None, f"Trainer with id {trainer_id} not found."
+
+        overlapping = (
+            await db.scalars(
+                availability_rule_overlap_query(
+                    trainer_id, weekday, start_time, end_time, effective_from, effective_until
+                )
+            )
+        ).first()
+
+        if overlapping is not None:
+            return None, availability_rule_conflict_message(overlapping)
+
+        new_rule = TrainerAvailabilityRule(
+            trainer_id=trainer_id,
+            weekday=weekday,
+            start_time=start_time,
+            end_time=end_time,
+            effective_from=effective_from,
+            effective_until=effective_until,
+        )
+        db.add(new_rule)
+
+        try:
+            await db.flush()
+        except Exception as e:
+            # CASE: something went wrong (constraint, etc.)
+            return None, f"Could not set weekly availability: {str(e)}"
+
+    await warm_up_caches()
+    conflict_index = get_conflict_index()
+    if conflict_index is not None:
+        conflict_index.add_availability_rule(
+            new_rule.rule_id, trainer_id, weekday, start_time, end_time, effective_from, effective_until
+        )
+    invalidate_read_cache(schedule_key(trainer_id))
+
+    return new_rule, None
+
+
+@instrumented("async_services.skip_recurring_availability")
+async def skip_recurring_availability(trainer_id: int,
+                                      rule_id: int,
+                                      skip_date: date):
+    """Async version of trainer_service.skip_recurring_availability() -> (exception, error_message)."""
+
+    if skip_date < date.today():
+        return None, "Cannot skip a day in the past."
+
+    async with get_async_session() as db:
+        rule = await db.get(TrainerAvailabilityRule, rule_id)
+
+        error = validate_skip_day(rule, trainer_id, rule_id, skip_date)
+        if error is not None:
+            return None, error
+
+        if await db.get(TrainerAvailabilityException, (rule_id, skip_date)) is not None:
+            return None, f"{skip_date} is already skipped."
+
+        booked = await db.scalar(sessions_during_rule_query(trainer_id, rule, skip_date))
+        if booked:
+            return None, sessions_during_rule_message(booked, skip_date)
+
+        new_exception = TrainerAvailabilityException(rule_id=rule_id, exception_date=skip_date)
+        db.add(new_exception)
+
+        try:
+            await db.flush()
+        except Exception as e:
+            return None, f"Could not skip the day: {str(e)}"
+
+    await warm_up_caches()
+    conflict_index = get_conflict_index()
+    if conflict_index is not None:
+        conflict_index.add_availability_exception(rule_id, skip_date)
+    invalidate_read_cache(schedule_key(trainer_id))
+
+    return new_exception, None
+
+
+@instrumented("async_services.get_recurring_availability")
+async def get_recurring_availability(trainer_id: int) -> list:
+    """Async version of trainer_service.get_recurring_availability()."""
+    async with get_async_read_session() as db:
+        return (await db.execute(recurring_availability_query(trainer_id, date.today()))).all()
+
+
+@instrumented("async_services.get_trainer_schedule")
+async def get_trainer_schedule(trainer_id: int) -> list[dict]:
+    """Async version of trainer_service.get_trainer_schedule()."""
+    await warm_up_caches()
+    read_cache = get_read_cache()
+    if read_cache is not None:
+        cached_rows = read_cache.get(schedule_key(trainer_id))
+        if cached_rows is not None:
+            return not_started(cached_rows)
+        generation = read_cache.generation
+
+    async with get_async_read_session() as db:
+        rows = (await db.execute(trainer_schedule_query(trainer_id, datetime.now()))).all()
+
+    schedule = [schedule_row_to_dict(row) for row in rows]
+
+    if read_cache is not None:
+        read_cache.put(schedule_key(trainer_id), schedule,
+                       schedule_cache_tags(trainer_id, rows), generation)
+
+    return schedule
+
+
+@instrumented("async_services.find_open_slots")
+async def find_open_slots(trainer_id: int,
+                          from_dt: datetime,
+                          to_dt: datetime,
+                          duration: timedelta,
+                          room_id: int | None = None):
+    """Async version of trainer_service.find_open_slots() -> (slots, error_message)."""
+
+    from_dt, error = validate_slot_search(from_dt, to_dt, duration)
+    if error is not None:
+        return None, error
+    if to_dt <= from_dt:
+        return [], None
+
+    async with get_async_read_session() as db:
+        rows = (
+            await db.execute(
+                OPEN_SLOT_SOURCES_QUERY,
+                {"tid": trainer_id, "rid": room_id, "from_dt": from_dt, "to_dt": to_dt},
+            )
+        ).all()
+
+    return open_slots_from_rows(rows, from_dt, to_dt, duration), None
+
+
+# ---------------------------------------------------------------------------------------
+# Admin
+# ---------------------------------------------------------------------------------------
+
+@instrumented("async_services.create_room")
+async def create_room(admin_id: int,
+                      room_name: str,
+                      max_capacity: int):
+    """Async version of admin_service.create_room() -> (room, error_message)."""
+
+    cleaned_name, error = validate_room(room_name, max_capacity)
+    if error is not None:
+        return None, error
+
+    async with get_async_session() as db:
+        admin = await db.get(Admin_staff, admin_id)
+
+        # CASE: no such admin found
+        if admin is None:
+            return None, f"Admin_staff with id {admin_id} not found."
+
+        if (await db.execute(room_with_name_query(cleaned_name))).first() is not None:
+            return None, "A room with that name already exists."
+
+        new_room = Room(
+            room_name=cleaned_name,
+            max_capacity=max_capacity,
+            admin_id=admin_id,
+        )
+        db.add(new_room)
+
+        try:
+            await db.flush()
+        except Exception as e:
+            # CASE: some constraint or other DB issue fired
+            return None, f"Could not create room: {str(e)}"
+
+        return new_room, None
+
+
+@instrumented("async_services.create_class_session")
+async def create_class_session(admin_id: int,
+                               trainer_id: int,
+                               room_id: int,
+                               start_dt: datetime,
+                               end_dt: datetime,
+                               max_capacity: int):
+    """Async version of admin_service.create_class_session() -> (session, error_message)."""
+
+    error = validate_class_window(start_dt, end_dt, max_capacity)
+    if error is not None:
+        return None, error
+
+    # fast path: reject obvious conflicts from the in-memory index (only if it is enabled)
+    await warm_up_caches()
+    error = precheck_booking(trainer_id, room_id, None, start_dt, end_dt)
+    if error is not None:
+        return None, error
+
+    async def book(db):
+        new_session_id, error_code, error_message = await book_session_async(
+            db,
+            session_type="CLASS",
+            member_id=None,  # CLASS sessions do not have a single member
+            trainer_id=trainer_id,
+            room_id=room_id,
+            admin_id=admin_id,
+            start_dt=start_dt,
+            end_dt=end_dt,
+            max_capacity=max_capacity,
+        )
+
+        # CASE: one of the booking checks failed
+        if error_code is not None:
+            return None, error_message
+
+        # load the new row with its room (no lazy loading is possible after an await)
+        new_session = await db.get(
+            SessionModel,
+            (new_session_id, start_dt),
+            options=[joinedload(SessionModel.room)],
+        )
+        return new_session, None
+
+    try:
+        new_session, error = await run_async_transaction(book)
+    except Exception as e:
+        return None, f"Could not create class session: {str(e)}"
+
+    if error is not None:
+        return None, error
+    new_session_id = new_session.session_id
+
+    await warm_up_caches()
+    record_booking(new_session_id, room_id, trainer_id, None, start_dt, end_dt)
+
+    return new_session, None
+
+
+@instrumented("async_services.create_class_series")
+async def create_class_series(admin_id: int,
+                              trainer_id: int,
+                              room_id: int,
+                              first_start_dt: datetime,
+                              first_end_dt: datetime,
+                              max_capacity: int,
+                              occurrences: int,
+                              every_days: int = 7,
+                              skip_conflicts: bool = False):
+    """Async version of admin_service.create_class_series() -> (sessions, conflicts, error_message)."""
+
+    error = validate_class_window(first_start_dt, first_end_dt, max_capacity)
+    if error is not None:
+        return [], [], error
+
+    windows, error = class_series_occurrences(first_start_dt, first_end_dt, occurrences, every_days)
+    if error is not None:
+        return [], [], error
+
+    async def book_series(db):
+        await db.execute(SERIES_LOCK_SQL, {"tid": trainer_id, "rid": room_id})
+
+        references = (
+            await db.execute(SERIES_REFERENCES_SQL, {"tid": trainer_id, "rid": room_id, "aid": admin_id})
+        ).one()
+
+        # CASE: something the series refers to does not exist / does not fit
+        error = series_reference_error(references, trainer_id, room_id, admin_id, max_capacity)
+        if error is not None:
+            return [], [], error
+
+        rows = (
+            await db.execute(SERIES_CONFLICTS_SQL, series_conflicts_params(trainer_id, room_id, windows))
+        ).all()
+        free_windows, conflicts = split_series_conflicts(rows, trainer_id, room_id)
+
+        # CASE: some dates conflict and the admin asked for all or nothing
+        if conflicts and not skip_conflicts:
+            return [], conflicts, series_refused_message(conflicts, windows)
+
+        if not free_windows:
+            return [], conflicts, None
+
+        new_session_ids = (
+            await db.scalars(
+                series_insert_statement(admin_id, trainer_id, room_id, max_capacity, free_windows)
+            )
+        ).all()
+
+        # loaded with their room (no lazy loading is possible after an await)
+        new_sessions = (await db.scalars(series_sessions_query(new_session_ids, free_windows))).all()
+        return new_sessions, conflicts, None
+
+    try:
+        new_sessions, conflicts, error = await run_async_transaction(book_series)
+    except Exception as e:
+        return [], [], f"Could not create class series: {str(e)}"
+
+    await warm_up_caches()
+    for new_session in new_sessions:
+        record_booking(new_session.session_id, room_id, trainer_id, None,
+                       new_session.start_date_time, new_session.end_date_time)
+
+    return new_sessions, conflicts, error
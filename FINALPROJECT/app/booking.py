@@ -0,0 +1,219 @@
+"""
+COMP3005 - Final Project: Health & Fitness Club Management System
+File: booking.py
+
+Description:
+This file is the "booking engine" shared by member_service.py (PT sessions) and
+admin_service.py (CLASS sessions). Instead of looking up every referenced row and
+running each overlap check as its own query, we call the book_session() database
+function (created in ddl_extras.py), which validates and inserts in one round trip
+and hands back an error code when something is wrong.
+
+Author: Abdul Malik
+"""
+
+from datetime import datetime
+
+from database import PreparedStatement
+from app.conflict_index import get_conflict_index
+from app.read_cache import invalidate_read_cache, dashboard_key, schedule_key
+
+
+# Every error code book_session() can return, with the message we show the user.
+# The messages can use {member_id}, {trainer_id}, {room_id}, {admin_id},
+# {max_capacity} and {conflict_session_id}.
+BOOKING_ERROR_MESSAGES = {
+    "MEMBER_NOT_FOUND": "Member with id {member_id} not found.",
+    "TRAINER_NOT_FOUND": "Trainer with id {trainer_id} not found.",
+    "ROOM_NOT_FOUND": "Room with id {room_id} not found.",
+    "ADMIN_NOT_FOUND": "Admin_staff with id {admin_id} not found.",
+    "ROOM_CAPACITY_EXCEEDED": (
+        "Session capacity ({max_capacity}) cannot exceed the capacity of room {room_id}."
+    ),
+    "TRAINER_UNAVAILABLE": (
+        "Trainer is not available for the requested time range. "
+        "Please choose a window inside one of their availability blocks."
+    ),
+    "MEMBER_CONFLICT": (
+        "Member already has a session that overlaps this time "
+        "(session id {conflict_session_id})."
+    ),
+    "TRAINER_CONFLICT": (
+        "Trainer is already scheduled for another session "
+        "during this time window (session id {conflict_session_id})."
+    ),
+    "ROOM_CONFLICT": (
+        "Room is already booked for this time range (session id {conflict_session_id})."
+    ),
+}
+
+# prepared once per pooled connection (see PreparedStatement in database.py)
+BOOK_SESSION = PreparedStatement(
+    "book_session_call",
+    """
+    SELECT error_code, conflict_session_id, new_session_id
+    FROM book_session(
+        :session_type, :member_id, :trainer_id, :room_id,
+        :admin_id, :start_dt, :end_dt, :max_capacity
+    )
+    """,
+    {
+        "session_type": "varchar",
+        "member_id": "integer",
+        "trainer_id": "integer",
+        "room_id": "integer",
+        "admin_id": "integer",
+        "start_dt": "timestamp",
+        "end_dt": "timestamp",
+        "max_capacity": "integer",
+    },
+)
+
+# the new session, loaded back so the caller gets a Session object
+SESSION_BY_KEY = PreparedStatement(
+    "session_by_key",
+    """
+    SELECT session_id, session_type, start_date_time, end_date_time, max_capacity,
+           enrolled_count, room_id, created_by_admin_id, trainer_id, member_id
+    FROM session
+    WHERE session_id = :session_id
+      AND start_date_time = :start_dt
+    """,
+    {"session_id": "integer", "start_dt": "timestamp"},
+)
+
+
+def book_session(db,
+                 session_type: str,
+                 member_id: int | None,
+                 trainer_id: int,
+                 room_id: int,
+                 admin_id: int,
+                 start_dt: datetime,
+                 end_dt: datetime,
+                 max_capacity: int):
+    """
+    Validate and insert one session using a single database round trip.
+
+    `db` is an open session from get_session(); the insert becomes part of its transaction.
+    (book_session_async() below is the same thing for the asyncio services.)
+
+    Returns:
+        (session_id, error_code, error_message)
+        - session_id: id of the new session (or None if there was an error)
+        - error_code: one of the BOOKING_ERROR_MESSAGES keys (or None on success)
+        - error_message: a string describing what went wrong (or None on success)
+    """
+
+    params = {
+        "session_type": session_type,
+        "member_id": member_id,
+        "trainer_id": trainer_id,
+        "room_id": room_id,
+        "admin_id": admin_id,
+        "start_dt": start_dt,
+        "end_dt": end_dt,
+        "max_capacity": max_capacity,
+    }
+    row = BOOK_SESSION.execute(db, params).one()
+    return _booking_result(row, params)
+
+
+async def book_session_async(db,
+                             session_type: str,
+                             member_id: int | None,
+                             trainer_id: int,
+                             room_id: int,
+                             admin_id: int,
+                             start_dt: datetime,
+                             end_dt: datetime,
+                             max_capacity: int):
+    """Same as book_session(), for an AsyncSession from get_async_session()."""
+    params = {
+        "session_type": session_type,
+        "member_id": member_id,
+        "trainer_id": trainer_id,
+        "room_id": room_id,
+        "admin_id": admin_id,
+        "start_dt": start_dt,
+        "end_dt": end_dt,
+        "max_capacity": max_capacity,
+    }
+    # asyncpg prepares (and caches) the statement itself
+    row = (await db.execute(BOOK_SESSION.clause, params)).one()
+    return _booking_result(row, params)
+
+
+def _booking_result(row, params: dict):
+    """Turn the book_session() result row into (session_id, error_code, error_message)."""
+    # normal case: the function inserted the row for us
+    if row.error_code is None:
+        return row.new_session_id, None, None
+
+    # CASE: one of the checks failed -> turn the code into a readable message
+    error_message = booking_error_message(
+        row.error_code,
+        member_id=params["member_id"],
+        trainer_id=params["trainer_id"],
+        room_id=params["room_id"],
+        admin_id=params["admin_id"],
+        max_capacity=params["max_capacity"],
+        conflict_session_id=row.conflict_session_id,
+    )
+    return None, row.error_code, error_message
+
+
+def booking_error_message(error_code: str, **details) -> str:
+    """Format the BOOKING_ERROR_MESSAGES entry for error_code (missing details show as None)."""
+    fields = dict.fromkeys(
+        ("member_id", "trainer_id", "room_id", "admin_id", "max_capacity", "conflict_session_id")
+    )
+    fields.update(details)
+    return BOOKING_ERROR_MESSAGES[error_code].format(**fields)
+
+
+def precheck_booking(trainer_id: int,
+                     room_id: int,
+                     member_id: int | None,
+                     start_dt: datetime,
+                     end_dt: datetime) -> str | None:
+    """
+    Ask the in-memory conflict index (if it is enabled) whether this booking obviously clashes.
+
+    Returns an error message to show the user, or None if the booking should go on to
+    the database.
+    """
+    conflict_index = get_conflict_index()
+    if conflict_index is None:
+        return None
+
+    error_code, conflict_session_id = conflict_index.check_booking(
+        trainer_id, room_id, member_id, start_dt, end_dt
+    )
+    if error_code is None:
+        return None
+
+    return booking_error_message(
+        error_code,
+        member_id=member_id,
+        trainer_id=trainer_id,
+        room_id=room_id,
+        conflict_session_id=conflict_session_id,
+    )
+
+
+def record_booking(session_id: int,
+                   room_id: int,
+                   trainer_id: int,
+                   member_id: int | None,
+                   start_dt: datetime,
+                   end_dt: datetime):
+    """
+    Write hook for a committed session: tell the in-memory conflict index (if enabled)
+    about it and drop the cached dashboard / schedule of its member and trainer.
+    """
+    conflict_index = get_conflict_index()
+    if conflict_index is not None:
+        conflict_index.add_session(session_id, room_id, trainer_id, member_id, start_dt, end_dt)
+
+    invalidate_read_cache(dashboard_key(member_id), schedule_key(trainer_id))
@@ -0,0 +1,319 @@
+"""
+COMP3005 - Final Project: Health & Fitness Club Management System
+File: change_feed.py
+
+Description:
+Cross-process invalidation for the in-process caches (read_cache.py, conflict_index.py).
+
+Triggers on session, class_enrollment, trainer availability (blocks, weekly rules and
+their exceptions), room, member and trainer log every change in the change_feed table
+and announce it with NOTIFY (see step 6 of ddl_extras.py). Each process that has a
+cache turned on runs one listener thread: it LISTENs on its own connection and hands
+every change to the caches that subscribed, so a session booked by another CLI or
+worker process drops the affected dashboard / schedule and lands in the conflict index
+within milliseconds, without any polling.
+
+Notifications sent while the listener is disconnected are lost, so after every
+(re)connect it replays change_feed from where it knows it is complete:
+  - each sync records the oldest transaction still running (the xmin of its snapshot);
+    every transaction older than that had committed or rolled back by then, so its
+    notification was already received;
+  - the next sync replays every feed row written by that transaction or a newer one.
+Replaying a change twice is harmless (every subscriber applies them idempotently). An
+idle listener syncs every CHANGE_FEED_SYNC_SECONDS to move that point forward (which also
+notices a dead connection). A listener that was away for longer than the feed is kept
+(CHANGE_FEED_RETENTION_MINUTES, see "maintenance prune-change-feed") cannot replay, so
+it tells its subscribers to drop everything instead, as it does for the reset that
+generate_data.py sends after a bulk load.
+
+The listener starts when a cache is first used, unless HEALTH_CLUB_CHANGE_FEED=0.
+
+Author: Abdul Malik
+"""
+
+import os
+import select
+import sys
+import threading
+import time
+from datetime import date, datetime, time as time_of_day
+from typing import NamedTuple
+
+# Make sure the project root is on sys.path so that we can import `database`
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+from database import get_engine, get_session
+from app.ddl_extras import CHANGE_FEED_CHANNEL
+
+
+# feed rows older than this are deleted by "maintenance prune-change-feed"; a listener
+# that was disconnected for longer resets its subscribers instead of replaying
+CHANGE_FEED_RETENTION_MINUTES = int(os.environ.get("HEALTH_CLUB_CHANGE_FEED_RETENTION", "60"))
+# an idle listener syncs this often (seconds)
+CHANGE_FEED_SYNC_SECONDS = 30.0
+# reconnect back-off (seconds): doubles after each failed attempt, up to the maximum
+CHANGE_FEED_RECONNECT_DELAY = 1.0
+CHANGE_FEED_RECONNECT_MAX_DELAY = 30.0
+# how long the first user of a cache waits for the listener's first sync (seconds)
+CHANGE_FEED_START_TIMEOUT = 5.0
+
+# The oldest transaction still running (every older one has finished), plus every feed
+# row written at or after the last sync's one. LEFT JOIN so the horizon comes back even
+# when there is nothing to replay.
+CATCH_UP_SQL = """
+    SELECT h.horizon::text, c.change_id, c.table_name, c.operation, c.row_data
+    FROM (SELECT pg_snapshot_xmin(pg_current_snapshot()) AS horizon) h
+    LEFT JOIN change_feed c ON c.txid >= %(since)s::xid8
+    ORDER BY c.change_id
+"""
+
+HORIZON_SQL = "SELECT pg_snapshot_xmin(pg_current_snapshot())::text"
+
+
+class Change(NamedTuple):
+    """One changed row, as sent by record_change() in ddl_extras.py."""
+    change_id: int
+    table: str
+    # "I" row added, "D" row removed (an UPDATE is both), "R" drop everything
+    operation: str
+    # the columns listed for the table in ddl_extras.CHANGE_FEED_TABLES, as text
+    values: tuple[str, ...]
+
+
+def parse_change(change_id, table: str, operation: str, row_data: str) -> Change:
+    return Change(int(change_id), table, operation, tuple(row_data.split(",")))
+
+
+def parse_payload(payload: str) -> Change:
+    """Turn a NOTIFY payload ("change_id|table|operation|values") into a Change."""
+    change_id, table, operation, row_data = payload.split("|", 3)
+    return parse_change(change_id, table, operation, row_data)
+
+
+# ---- helpers for subscribers: values are text, "" is NULL ----
+
+def feed_int(value: str) -> int | None:
+    return int(value) if value else None
+
+
+def feed_datetime(value: str) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+def feed_date(value: str) -> date | None:
+    return date.fromisoformat(value) if value else None
+
+
+def feed_time(value: str) -> time_of_day | None:
+    return time_of_day.fromisoformat(value) if value else None
+
+
+# (on_change(change), on_reset()) pairs, called on the listener thread
+_subscribers: list[tuple] = []
+
+
+def subscribe(on_change, on_reset):
+    """
+    Register a cache with the feed: on_change(change) is called for every change made
+    by any process (this one included), on_reset() when the changes since the last
+    sync can no longer be replayed and everything cached must be dropped.
+    """
+    _subscribers.append((on_change, on_reset))
+
+
+def _connect():
+    """A dedicated psycopg2 connection for LISTEN (outside every pool, autocommit)."""
+    engine = get_engine()
+    args, kwargs = engine.dialect.create_connect_args(engine.url)
+    kwargs["application_name"] = "health_club_change_feed"
+    connection = engine.dialect.loaded_dbapi.connect(*args, **kwargs)
+    connection.autocommit = True
+    return connection
+
+
+class ChangeListener(threading.Thread):
+    """Background thread that LISTENs for changes and hands them to the subscribers."""
+
+    def __init__(self):
+        super().__init__(name="health-club-change-feed", daemon=True)
+        # set once the first sync is done (every later change will be delivered)
+        self.synced = threading.Event()
+        self._stopping = threading.Event()
+        self._connection = None
+        # replay point: the horizon of the last successful sync (txid, as text)
+        self._horizon = None
+        self._last_sync = None
+
+        self.received = 0
+        self.replayed = 0
+        self.resets = 0
+        self.reconnects = 0
+
+    def run(self):
+        delay = CHANGE_FEED_RECONNECT_DELAY
+        while not self._stopping.is_set():
+            try:
+                self._connection = _connect()
+                with self._connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANGE_FEED_CHANNEL}")
+                # LISTEN is in place before the sync, so nothing falls in between
+                self._sync()
+                delay = CHANGE_FEED_RECONNECT_DELAY
+                self._listen()
+            except Exception as error:
+                if self._stopping.is_set():
+                    break
+                reason = str(error).strip().split("\n")[0] or type(error).__name__
+                print(f"[change feed] connection lost ({reason}); reconnecting in {delay:g}s",
+                      file=sys.stderr)
+                self._stopping.wait(delay)
+                delay = min(delay * 2, CHANGE_FEED_RECONNECT_MAX_DELAY)
+                self.reconnects += 1
+            finally:
+                self._close()
+
+    def stop(self):
+        self._stopping.set()
+        self._close()
+
+    def stats(self) -> dict:
+        return {
+            "connected": self._connection is not None,
+            "received": self.received,
+            "replayed": self.replayed,
+            "resets": self.resets,
+            "reconnects": self.reconnects,
+        }
+
+    def _listen(self):
+        """Wait for notifications; sync whenever CHANGE_FEED_SYNC_SECONDS have gone by."""
+        while not self._stopping.is_set():
+            timeout = max(0.0, self._last_sync + CHANGE_FEED_SYNC_SECONDS - time.monotonic())
+            readable, _, _ = select.select([self._connection], [], [], timeout)
+            if readable:
+                self._connection.poll()
+                self._apply_notifications()
+            if time.monotonic() - self._last_sync >= CHANGE_FEED_SYNC_SECONDS:
+                self._sync()
+
+    def _sync(self):
+        """Replay what may have been missed since the last sync and move the replay point."""
+        away_too_long = (
+            self._last_sync is not None
+            and time.monotonic() - self._last_sync > CHANGE_FEED_RETENTION_MINUTES * 60
+        )
+
+        with self._connection.cursor() as cursor:
+            # CASE: first sync (nothing cached yet) or the feed may already be pruned
+            if self._horizon is None or away_too_long:
+                cursor.execute(HORIZON_SQL)
+                horizon = cursor.fetchone()[0]
+                rows = []
+            else:
+                cursor.execute(CATCH_UP_SQL, {"since": self._horizon})
+                rows = cursor.fetchall()
+                horizon = rows[0][0]
+
+        if away_too_long:
+            self._reset()
+
+        for _, change_id, table, operation, row_data in rows:
+            if change_id is not None:
+                self._apply(parse_change(change_id, table, operation, row_data))
+                self.replayed += 1
+
+        # notifications that arrived with the query belong to transactions before the horizon too
+        self._apply_notifications()
+
+        self._horizon = horizon
+        self._last_sync = time.monotonic()
+        self.synced.set()
+
+    def _apply_notifications(self):
+        notifies = self._connection.notifies
+        while notifies:
+            notification = notifies.pop(0)
+            self._apply(parse_payload(notification.payload))
+            self.received += 1
+
+    def _apply(self, change: Change):
+        if change.operation == "R":
+            self._reset()
+            return
+
+        for on_change, _ in _subscribers:
+            try:
+                on_change(change)
+            except Exception as error:
+                # CASE: a subscriber could not apply the change; dropping everything is
+                # the only way to be sure it holds nothing stale
+                print(f"[change feed] could not apply change {change.change_id} ({error}); "
+                      "resetting the caches", file=sys.stderr)
+                self._reset()
+                return
+
+    def _reset(self):
+        self.resets += 1
+        for _, on_reset in _subscribers:
+            on_reset()
+
+    def _close(self):
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+
+# the process-wide listener (None until a cache starts it)
+_listener = None
+_enabled = os.environ.get("HEALTH_CLUB_CHANGE_FEED", "1").strip().lower() in ("1", "true", "yes", "on")
+_start_lock = threading.Lock()
+
+
+def enable_change_feed(enabled: bool = True):
+    """Turn the listener on or off for this process (off stops a running one)."""
+    global _enabled, _listener
+    _enabled = enabled
+    if not enabled and _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def start_change_listener() -> ChangeListener | None:
+    """
+    Start this process's listener if it is not running yet, and wait (up to
+    CHANGE_FEED_START_TIMEOUT seconds) for its first sync, so a cache filled after this
+    call misses no change. Returns None when the feed is turned off.
+    """
+    global _listener
+
+    if not _enabled:
+        return None
+
+    with _start_lock:
+        if _listener is None or not _listener.is_alive():
+            _listener = ChangeListener()
+            _listener.start()
+
+    if not _listener.synced.wait(CHANGE_FEED_START_TIMEOUT):
+        print("[change feed] listener is not connected yet; other processes' writes are not "
+              "seen until it is", file=sys.stderr)
+    return _listener
+
+
+def get_change_listener() -> ChangeListener | None:
+    """Return the running listener, or None if no cache has started one."""
+    return _listener
+
+
+def prune_change_feed(keep_minutes: int = CHANGE_FEED_RETENTION_MINUTES) -> int:
+    """Delete feed rows older than keep_minutes; returns the number of rows removed."""
+    with get_session("batch") as db:
+        result = db.execute(
+            text("DELETE FROM change_feed WHERE changed_at < NOW() - make_interval(mins => :keep_minutes)"),
+            {"keep_minutes": keep_minutes},
+        )
+        return result.rowcount
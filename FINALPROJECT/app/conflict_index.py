@@ -0,0 +1,359 @@
+"""
+COMP3005 - Final Project: Health & Fitness Club Management System
+File: conflict_index.py
+
+Description:
+Optional in-memory index of upcoming sessions (by room, trainer and member) and
+trainer availability (one-off blocks and weekly rules). The booking services ask it first, so an obvious conflict is
+rejected in microseconds without touching the database. The database (book_session()
+and the exclusion constraints) is still the final check for anything the index lets
+through.
+
+The index is loaded once, on first use, and then kept up to date by the write hooks
+the services call after a successful commit, and by the change feed (change_feed.py)
+for sessions and availability written by other processes. It is off by default; turn
+it on with HEALTH_CLUB_CONFLICT_INDEX=1 (or enable_conflict_index()). With the change
+feed turned off it only sees this process's writes, so then it is only safe when a
+single process owns the bookings.
+
+Author: Abdul Malik
+"""
+
+import os
+import sys
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+
+# Make sure the project root is on sys.path so that we can import `database`
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+from database import get_read_session
+from app.intervals import weekly_occurrences
+from app.change_feed import (
+    feed_date,
+    feed_datetime,
+    feed_int,
+    feed_time,
+    start_change_listener,
+    subscribe,
+)
+
+
+class SortedIntervals:
+    """
+    The intervals of one room / trainer / member, kept sorted by start time.
+
+    The exclusion constraints (and the availability overlap check) guarantee that
+    one key never has two overlapping intervals, so a sorted list + binary search
+    answers every overlap question in O(log n); an interval tree would add nothing.
+    Intervals are half-open [start, end), like everywhere else in the project.
+    """
+
+    def __init__(self):
+        self.starts: list[datetime] = []
+        self.ends: list[datetime] = []
+        self.ids: list[int] = []
+
+    def add(self, start: datetime, end: datetime, item_id: int):
+        position = bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.ids.insert(position, item_id)
+
+    def remove(self, item_id: int):
+        if item_id in self.ids:
+            position = self.ids.index(item_id)
+            del self.starts[position]
+            del self.ends[position]
+            del self.ids[position]
+
+    def find_overlap(self, start: datetime, end: datetime) -> int | None:
+        """Return the id of an interval overlapping [start, end), or None."""
+        # the only candidate is the last interval that starts before `end`
+        position = bisect_left(self.starts, end) - 1
+        if position >= 0 and self.ends[position] > start:
+            return self.ids[position]
+        return None
+
+    def find_containing(self, start: datetime, end: datetime) -> int | None:
+        """Return the id of an interval that fully contains [start, end), or None."""
+        # the only candidate is the last interval that starts at or before `start`
+        position = bisect_right(self.starts, start) - 1
+        if position >= 0 and self.ends[position] >= end:
+            return self.ids[position]
+        return None
+
+
+class ConflictIndex:
+    """Upcoming sessions keyed by room / trainer / member, plus trainer availability."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.room_sessions: dict[int, SortedIntervals] = {}
+        self.trainer_sessions: dict[int, SortedIntervals] = {}
+        self.member_sessions: dict[int, SortedIntervals] = {}
+        self.availability: dict[int, SortedIntervals] = {}
+        # trainer_id -> weekly rules as (rule_id, weekday, start_time, end_time, from, until)
+        self.availability_rules: dict[int, list[tuple]] = {}
+        # rule_id -> dates the rule is skipped
+        self.rule_exceptions: dict[int, set[date]] = {}
+        # session_id -> (room_id, trainer_id, member_id) so sessions can be removed again
+        self._session_keys: dict[int, tuple[int, int, int | None]] = {}
+
+    def load(self):
+        """Fill the index from the database (four queries). Past rows are skipped.
+
+        Rows last at most a month, so the "started within the last month" bounds only
+        keep the scans off the older session / availability partitions.
+        """
+        with get_read_session() as db:
+            sessions = db.execute(text("""
+                SELECT session_id, room_id, trainer_id, member_id, start_date_time, end_date_time
+                FROM session
+                WHERE end_date_time > NOW()
+                  AND start_date_time > NOW() - interval '1 month'
+            """)).all()
+            availability = db.execute(text("""
+                SELECT availability_id, trainer_id, start_date_time, end_date_time
+                FROM trainer_availability
+                WHERE end_date_time > NOW()
+                  AND start_date_time > NOW() - interval '1 month'
+            """)).all()
+            rules = db.execute(text("""
+                SELECT rule_id, trainer_id, weekday, start_time, end_time,
+                       effective_from, effective_until
+                FROM trainer_availability_rule
+                WHERE effective_until IS NULL OR effective_until >= CURRENT_DATE
+            """)).all()
+            exceptions = db.execute(text("""
+                SELECT rule_id, exception_date
+                FROM trainer_availability_exception
+                WHERE exception_date >= CURRENT_DATE
+            """)).all()
+
+        with self._lock:
+            for row in sessions:
+                self._add_session(row.session_id, row.room_id, row.trainer_id, row.member_id,
+                                  row.start_date_time, row.end_date_time)
+            for row in availability:
+                self.availability.setdefault(row.trainer_id, SortedIntervals()).add(
+                    row.start_date_time, row.end_date_time, row.availability_id
+                )
+            for row in rules:
+                self._add_availability_rule(row.rule_id, row.trainer_id, row.weekday, row.start_time,
+                                            row.end_time, row.effective_from, row.effective_until)
+            for row in exceptions:
+                self.rule_exceptions.setdefault(row.rule_id, set()).add(row.exception_date)
+
+    # ---- write hooks (call these after the database write has committed) ----
+    # Each one is idempotent: the change feed delivers the same write again, sometimes first.
+
+    def add_session(self, session_id, room_id, trainer_id, member_id, start_dt, end_dt):
+        with self._lock:
+            self._add_session(session_id, room_id, trainer_id, member_id, start_dt, end_dt)
+
+    def remove_session(self, session_id):
+        with self._lock:
+            self._remove_session(session_id)
+
+    def add_availability(self, availability_id, trainer_id, start_dt, end_dt):
+        with self._lock:
+            blocks = self.availability.setdefault(trainer_id, SortedIntervals())
+            blocks.remove(availability_id)
+            blocks.add(start_dt, end_dt, availability_id)
+
+    def add_availability_rule(self, rule_id, trainer_id, weekday, start_time, end_time,
+                              effective_from, effective_until):
+        with self._lock:
+            self._add_availability_rule(rule_id, trainer_id, weekday, start_time, end_time,
+                                        effective_from, effective_until)
+
+    def add_availability_exception(self, rule_id, exception_date):
+        with self._lock:
+            self.rule_exceptions.setdefault(rule_id, set()).add(exception_date)
+
+    def apply_change(self, change):
+        """
+        Apply a change from the change feed. Every change is applied as "remove the
+        row, then add it back if it was added", so one that is already in the index
+        (this process's own writes, or a replay after a reconnect) changes nothing.
+        """
+        values = change.values
+        added = change.operation == "I"
+
+        with self._lock:
+            if change.table == "session":
+                session_id = int(values[0])
+                self._remove_session(session_id)
+                end_dt = feed_datetime(values[5])
+                # CASE: already over (load() skips those too)
+                if added and end_dt > datetime.now():
+                    self._add_session(session_id, int(values[1]), int(values[2]), feed_int(values[3]),
+                                      feed_datetime(values[4]), end_dt)
+
+            elif change.table == "trainer_availability":
+                availability_id, trainer_id = int(values[0]), int(values[1])
+                blocks = self.availability.setdefault(trainer_id, SortedIntervals())
+                blocks.remove(availability_id)
+                if added:
+                    blocks.add(feed_datetime(values[2]), feed_datetime(values[3]), availability_id)
+
+            elif change.table == "trainer_availability_rule":
+                rule_id, trainer_id = int(values[0]), int(values[1])
+                self._remove_availability_rule(rule_id, trainer_id)
+                if added:
+                    self._add_availability_rule(rule_id, trainer_id, int(values[2]),
+                                                feed_time(values[3]), feed_time(values[4]),
+                                                feed_date(values[5]), feed_date(values[6]))
+
+            elif change.table == "trainer_availability_exception":
+                exceptions = self.rule_exceptions.setdefault(int(values[0]), set())
+                if added:
+                    exceptions.add(feed_date(values[1]))
+                else:
+                    exceptions.discard(feed_date(values[1]))
+
+    # ---- checks ----
+
+    def check_booking(self, trainer_id, room_id, member_id, start_dt, end_dt):
+        """
+        Pre-check a booking the same way book_session() would.
+
+        Returns (error_code, conflict_session_id); error_code is None when the index
+        sees no problem (the database still has the final say). The codes are the
+        ones in booking.BOOKING_ERROR_MESSAGES.
+        """
+        with self._lock:
+            if not self._is_available(trainer_id, start_dt, end_dt):
+                return "TRAINER_UNAVAILABLE", None
+
+            checks = (
+                ("MEMBER_CONFLICT", self.member_sessions.get(member_id)),
+                ("TRAINER_CONFLICT", self.trainer_sessions.get(trainer_id)),
+                ("ROOM_CONFLICT", self.room_sessions.get(room_id)),
+            )
+            for error_code, intervals in checks:
+                if intervals is None:
+                    continue
+                conflict_id = intervals.find_overlap(start_dt, end_dt)
+                if conflict_id is not None:
+                    return error_code, conflict_id
+
+        return None, None
+
+    def find_availability_overlap(self, trainer_id, start_dt, end_dt) -> int | None:
+        """Return the id of an availability block overlapping [start, end), or None."""
+        with self._lock:
+            blocks = self.availability.get(trainer_id)
+            if blocks is None:
+                return None
+            return blocks.find_overlap(start_dt, end_dt)
+
+    def _is_available(self, trainer_id, start_dt, end_dt) -> bool:
+        """True if one one-off block or one weekly occurrence covers [start, end)."""
+        blocks = self.availability.get(trainer_id)
+        if blocks is not None and blocks.find_containing(start_dt, end_dt) is not None:
+            return True
+
+        # weekly rules are expanded for this window only
+        for rule_id, weekday, start_time, end_time, effective_from, effective_until in (
+            self.availability_rules.get(trainer_id, ())
+        ):
+            occurrences = weekly_occurrences(
+                weekday, start_time, end_time, effective_from, effective_until,
+                self.rule_exceptions.get(rule_id, set()), start_dt, end_dt,
+            )
+            if any(start <= start_dt and end >= end_dt for start, end in occurrences):
+                return True
+
+        return False
+
+    def _remove_availability_rule(self, rule_id, trainer_id):
+        rules = self.availability_rules.get(trainer_id)
+        if rules is not None:
+            rules[:] = [rule for rule in rules if rule[0] != rule_id]
+
+    def _add_availability_rule(self, rule_id, trainer_id, weekday, start_time, end_time,
+                               effective_from, effective_until):
+        self._remove_availability_rule(rule_id, trainer_id)
+        self.availability_rules.setdefault(trainer_id, []).append(
+            (rule_id, weekday, start_time, end_time, effective_from, effective_until)
+        )
+
+    def _remove_session(self, session_id):
+        keys = self._session_keys.pop(session_id, None)
+        if keys is None:
+            return
+        room_id, trainer_id, member_id = keys
+        self.room_sessions[room_id].remove(session_id)
+        self.trainer_sessions[trainer_id].remove(session_id)
+        if member_id is not None:
+            self.member_sessions[member_id].remove(session_id)
+
+    def _add_session(self, session_id, room_id, trainer_id, member_id, start_dt, end_dt):
+        # the write hook and the change feed may both add the same session
+        self._remove_session(session_id)
+        self.room_sessions.setdefault(room_id, SortedIntervals()).add(start_dt, end_dt, session_id)
+        self.trainer_sessions.setdefault(trainer_id, SortedIntervals()).add(start_dt, end_dt, session_id)
+        if member_id is not None:
+            self.member_sessions.setdefault(member_id, SortedIntervals()).add(start_dt, end_dt, session_id)
+        self._session_keys[session_id] = (room_id, trainer_id, member_id)
+
+
+# the process-wide index (None until it is enabled and first used)
+_conflict_index = None
+_enabled = os.environ.get("HEALTH_CLUB_CONFLICT_INDEX", "").strip().lower() in ("1", "true", "yes", "on")
+_load_lock = threading.Lock()
+
+
+def enable_conflict_index(enabled: bool = True):
+    """Turn the in-memory index on or off for this process (off drops the loaded data)."""
+    global _enabled, _conflict_index
+    _enabled = enabled
+    if not enabled:
+        _conflict_index = None
+
+
+def get_conflict_index() -> ConflictIndex | None:
+    """Return the loaded index, loading it on first use, or None if it is disabled."""
+    global _conflict_index
+
+    if not _enabled:
+        return None
+
+    if _conflict_index is None:
+        # follow other processes' writes from before the snapshot load() reads; a change
+        # that arrives while it loads waits for the lock (see _apply_change())
+        start_change_listener()
+        with _load_lock:
+            if _conflict_index is None:
+                new_index = ConflictIndex()
+                new_index.load()
+                _conflict_index = new_index
+
+    return _conflict_index
+
+
+def conflict_index_ready() -> bool:
+    """True if get_conflict_index() returns at once (the index is disabled or already loaded)."""
+    return not _enabled or _conflict_index is not None
+
+
+def _apply_change(change):
+    """Change feed subscriber. Holds _load_lock so nothing is lost while the index loads."""
+    with _load_lock:
+        conflict_index = _conflict_index
+        if conflict_index is not None:
+            conflict_index.apply_change(change)
+
+
+def _reset():
+    """Change feed reset: drop the index, it is loaded again on next use."""
+    global _conflict_index
+    with _load_lock:
+        _conflict_index = None
+
+
+subscribe(_apply_change, _reset)
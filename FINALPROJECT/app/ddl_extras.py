@@ -1,73 +1,755 @@
 # app/ddl_extras.py
 
 from sqlalchemy import text
-from database import engine
+from database import get_engine
 
 
-def create_view_index_trigger():
-    """Create the VIEW, INDEX, and TRIGGER required by the project."""
-
-    with engine.connect() as conn:
-        # 1) VIEW: member dashboard showing upcoming sessions
-        conn.execute(text("""
-            CREATE OR REPLACE VIEW member_dashboard_view AS
-            SELECT
-                m.member_id,
-                m.first_name,
-                m.last_name,
-                s.session_id,
-                s.session_type,
-                s.start_date_time,
-                s.end_date_time,
-                r.room_name,
-                t.first_name AS trainer_first_name,
-                t.last_name  AS trainer_last_name
-            FROM member m
-            JOIN session s   ON s.member_id = m.member_id
-            JOIN room r      ON r.room_id = s.room_id
-            JOIN trainer t   ON t.trainer_id = s.trainer_id
-            WHERE s.start_date_time >= NOW()
-            ORDER BY s.start_date_time;
-        """))
+# Managed index set for the hot service queries.
+# name -> "table (columns) [WHERE ...]"; every entry is created with IF NOT EXISTS.
+#   - session by room / trainer / member + start time: overlap checks, trainer schedule,
+#     member dashboard (member_id is NULL for CLASS sessions, so that one is partial)
+#   - trainer_availability by trainer + window: availability overlap / containment checks
+#   - trainer_availability_rule by trainer + weekday: expanding recurring availability
+#   - room by name: duplicate room name check in create_room()
+#   - member_dashboard by member + start time: get_member_dashboard()
+#   - CLASS sessions by start time: list_upcoming_classes() (partial, CLASS rows only)
+#   - class_enrollment by member: enrolled classes on the member dashboard (the primary
+#     key already covers lookups by session)
+# member.email and member.phone_number are already covered by their UNIQUE constraints.
+HOT_PATH_INDEXES = {
+    "idx_session_room_start": "session (room_id, start_date_time)",
+    "idx_session_trainer_start": "session (trainer_id, start_date_time)",
+    "idx_session_member_start": (
+        "session (member_id, start_date_time) WHERE member_id IS NOT NULL"
+    ),
+    "idx_availability_trainer_window": (
+        "trainer_availability (trainer_id, start_date_time, end_date_time)"
+    ),
+    "idx_availability_rule_trainer": "trainer_availability_rule (trainer_id, weekday)",
+    "idx_room_name": "room (room_name)",
+    "idx_member_dashboard_member_start": "member_dashboard (member_id, start_date_time)",
+    "idx_session_class_start": "session (start_date_time) WHERE session_type = 'CLASS'",
+    "idx_class_enrollment_member": "class_enrollment (member_id)",
+}
 
-        # 2) INDEX: help queries by room + start time
-        conn.execute(text("""
-            CREATE INDEX IF NOT EXISTS idx_session_room_start
-            ON session (room_id, start_date_time);
-        """))
+# Advisory lock "classes" (first key of pg_advisory_xact_lock(int, int)) for bookings;
+# the second key is the trainer / member / room id. See lock_booking_resources() below.
+BOOKING_LOCK_CLASSES = {
+    "trainer": 30051,
+    "member": 30052,
+    "room": 30053,
+}
+
+# session columns that get a no-overlap exclusion constraint (CLASS sessions have no
+# member, so that one is partial)
+SESSION_OVERLAP_COLUMNS = ("room_id", "trainer_id", "member_id")
+
+# Tables that feed the change feed (see app/change_feed.py).
+# table -> (columns sent for each changed row, columns whose UPDATE is a change).
+# Only what an in-process cache needs is sent: ids and times, never names. room,
+# member and trainer rows only matter when a name shown on a dashboard / schedule
+# changes (or the row goes away), so inserts into those three are not sent at all.
+CHANGE_FEED_TABLES = {
+    "session": (
+        ("session_id", "room_id", "trainer_id", "member_id", "start_date_time", "end_date_time"),
+        ("session_type", "start_date_time", "end_date_time", "room_id", "trainer_id", "member_id"),
+    ),
+    "class_enrollment": (
+        ("session_id", "member_id"),
+        ("session_id", "member_id"),
+    ),
+    "trainer_availability": (
+        ("availability_id", "trainer_id", "start_date_time", "end_date_time"),
+        ("trainer_id", "start_date_time", "end_date_time"),
+    ),
+    "trainer_availability_rule": (
+        ("rule_id", "trainer_id", "weekday", "start_time", "end_time", "effective_from", "effective_until"),
+        ("trainer_id", "weekday", "start_time", "end_time", "effective_from", "effective_until"),
+    ),
+    "trainer_availability_exception": (
+        ("rule_id", "exception_date"),
+        ("rule_id", "exception_date"),
+    ),
+    "room": (("room_id",), ("room_name",)),
+    "member": (("member_id",), ("first_name", "last_name")),
+    "trainer": (("trainer_id",), ("first_name", "last_name")),
+}
+
+# tables whose inserts are not sent (see above)
+CHANGE_FEED_UPDATE_ONLY_TABLES = ("room", "member", "trainer")
 
-        # 3) TRIGGER: prevent overlapping sessions in the same room
-        conn.execute(text("""
-            CREATE OR REPLACE FUNCTION prevent_room_overlap()
-            RETURNS trigger AS $$
+CHANGE_FEED_CHANNEL = "health_club_changes"
+
+
+def session_overlap_targets(conn) -> list[str]:
+    """
+    Tables that must carry the no-overlap exclusion constraints: session itself, or each
+    of its partitions once it is partitioned (Postgres cannot enforce an exclusion
+    constraint across partitions, so each month gets its own set).
+    """
+    return conn.execute(text("""
+        SELECT relid::regclass::text
+        FROM pg_partition_tree('session')
+        WHERE isleaf
+    """)).scalars().all()
+
+
+def add_session_overlap_constraints(conn, table_name: str):
+    """Add the ex_<table>_<resource>_no_overlap constraints to session or one partition of it."""
+    for column in SESSION_OVERLAP_COLUMNS:
+        constraint_name = f"ex_{table_name}_{column.removesuffix('_id')}_no_overlap"
+        where = " WHERE (member_id IS NOT NULL)" if column == "member_id" else ""
+        conn.execute(text(f"""
+            DO $$
             BEGIN
-                IF EXISTS (
-                    SELECT 1
-                    FROM session s
-                    WHERE s.room_id = NEW.room_id
-                      AND s.session_id <> COALESCE(NEW.session_id, -1)
-                      AND NEW.start_date_time < s.end_date_time
-                      AND NEW.end_date_time > s.start_date_time
+                IF NOT EXISTS (
+                    SELECT 1 FROM pg_constraint
+                    WHERE conname = '{constraint_name}' AND conrelid = '{table_name}'::regclass
                 ) THEN
-                    RAISE EXCEPTION 'Room is already booked for this time range';
+                    ALTER TABLE {table_name} ADD CONSTRAINT {constraint_name}
+                    EXCLUDE USING gist (
+                        {column} WITH =,
+                        tsrange(start_date_time, end_date_time) WITH &&
+                    ){where};
                 END IF;
-                RETURN NEW;
             END;
-            $$ LANGUAGE plpgsql;
+            $$;
         """))
 
-        conn.execute(text("""
-            DROP TRIGGER IF EXISTS trg_prevent_room_overlap ON session;
 
-            CREATE TRIGGER trg_prevent_room_overlap
-            BEFORE INSERT OR UPDATE ON session
+def create_dashboard_view(conn):
+    # 1) VIEW: member dashboard showing upcoming sessions
+    conn.execute(text("""
+        CREATE OR REPLACE VIEW member_dashboard_view AS
+        SELECT
+            m.member_id,
+            m.first_name,
+            m.last_name,
+            s.session_id,
+            s.session_type,
+            s.start_date_time,
+            s.end_date_time,
+            r.room_name,
+            t.first_name AS trainer_first_name,
+            t.last_name  AS trainer_last_name
+        FROM member m
+        JOIN session s   ON s.member_id = m.member_id
+        JOIN room r      ON r.room_id = s.room_id
+        JOIN trainer t   ON t.trainer_id = s.trainer_id
+        WHERE s.start_date_time >= NOW();
+    """))
+
+
+def create_dashboard_table(conn):
+    # 1b) TABLE: member_dashboard, a denormalized copy of the view above.
+    # It is kept current by the triggers in step 5, so get_member_dashboard() is a
+    # single index range scan on (member_id, start_date_time) with no joins.
+    # room_id / trainer_id are kept so renames can be pushed into the copied names.
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS member_dashboard (
+            session_id          INTEGER PRIMARY KEY,
+            member_id           INTEGER NOT NULL,
+            session_type        VARCHAR(10) NOT NULL,
+            start_date_time     TIMESTAMP NOT NULL,
+            end_date_time       TIMESTAMP NOT NULL,
+            room_id             INTEGER NOT NULL,
+            room_name           VARCHAR(100) NOT NULL,
+            trainer_id          INTEGER NOT NULL,
+            trainer_first_name  VARCHAR(50) NOT NULL,
+            trainer_last_name   VARCHAR(50) NOT NULL
+        );
+    """))
+
+
+def add_enrolled_count(conn):
+    # 1c) COLUMN: session.enrolled_count (CLASS enrollment counter, see
+    # enroll_in_class() in member_service.py). create_all() adds it to new databases;
+    # this brings older ones up to date. A constant default makes it a catalog-only change.
+    conn.execute(text("""
+        ALTER TABLE session ADD COLUMN IF NOT EXISTS enrolled_count INTEGER NOT NULL DEFAULT 0;
+
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint WHERE conname = 'ck_session_enrolled_within_capacity'
+            ) THEN
+                ALTER TABLE session ADD CONSTRAINT ck_session_enrolled_within_capacity
+                CHECK (enrolled_count BETWEEN 0 AND max_capacity);
+            END IF;
+        END;
+        $$;
+    """))
+
+
+def create_hot_path_indexes(conn):
+    # 2) INDEXES: one per hot query pattern (see HOT_PATH_INDEXES above)
+    for index_name, index_definition in HOT_PATH_INDEXES.items():
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {index_name} ON {index_definition};"
+        ))
+
+
+def create_overlap_constraints(conn):
+    # 3) EXCLUSION CONSTRAINTS: no overlapping sessions for the same room, trainer or member
+    # Each constraint is backed by a GiST index over (id, time range), so the overlap check
+    # is an index probe done by Postgres itself and is safe under concurrent bookings.
+    # tsrange() defaults to '[)' bounds, so back-to-back sessions (10:00-11:00, 11:00-12:00)
+    # are still allowed, exactly like the old "start < end AND end > start" checks.
+    # btree_gist lets a plain integer column take part in a GiST index with "=".
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist;"))
+
+    # the old row-level trigger is replaced by ex_session_room_no_overlap
+    conn.execute(text("""
+        DROP TRIGGER IF EXISTS trg_prevent_room_overlap ON session;
+        DROP FUNCTION IF EXISTS prevent_room_overlap();
+    """))
+
+    # session is range partitioned by month (app/partitioning.py), and an exclusion
+    # constraint only sees the rows of its own partition, so every partition gets its own
+    # set; book_session() checks the few sessions that cross a month boundary by hand.
+    for table_name in session_overlap_targets(conn):
+        add_session_overlap_constraints(conn, table_name)
+
+
+def create_booking_functions(conn):
+    # 4a) FUNCTION: a trainer's availability windows that overlap [p_from, p_to)
+    # One-off blocks come from trainer_availability; weekly rules are expanded for this
+    # range only (one generate_series step per week, minus the rule's exception dates),
+    # so a rule covering a whole year is still a single row. Both lookups stay index
+    # probes however much history piles up: one-off blocks of a trainer never overlap
+    # (set_trainer_availability() checks that), so apart from the blocks that start
+    # inside the range only the last one starting before it can reach into it.
+    # This is a plain SQL function, so the planner inlines it into the calling query.
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION trainer_availability_windows(
+            p_trainer_id  INTEGER,
+            p_from        TIMESTAMP,
+            p_to          TIMESTAMP
+        )
+        RETURNS TABLE (start_date_time TIMESTAMP, end_date_time TIMESTAMP)
+        AS $$
+            SELECT ta.start_date_time, ta.end_date_time
+            FROM trainer_availability ta
+            WHERE ta.trainer_id = p_trainer_id
+              AND ta.start_date_time >= p_from
+              AND ta.start_date_time < p_to
+
+            UNION ALL
+
+            SELECT last_block.start_date_time, last_block.end_date_time
+            FROM (
+                SELECT ta.start_date_time, ta.end_date_time
+                FROM trainer_availability ta
+                WHERE ta.trainer_id = p_trainer_id
+                  AND ta.start_date_time < p_from
+                  -- blocks are at most a month long, so older partitions are skipped
+                  AND ta.start_date_time >= p_from - interval '1 month'
+                ORDER BY ta.start_date_time DESC
+                LIMIT 1
+            ) last_block
+            WHERE last_block.end_date_time > p_from
+
+            UNION ALL
+
+            SELECT occurrence.day + r.start_time, occurrence.day + r.end_time
+            FROM trainer_availability_rule r
+            -- first day in range that falls on the rule's weekday, then every 7 days
+            CROSS JOIN LATERAL generate_series(
+                (GREATEST(r.effective_from, p_from::date)
+                    + (r.weekday - (EXTRACT(ISODOW FROM GREATEST(r.effective_from, p_from::date))::int - 1) + 7) % 7
+                )::timestamp,
+                LEAST(COALESCE(r.effective_until, p_to::date), p_to::date)::timestamp,
+                INTERVAL '7 days'
+            ) AS occurrence(day)
+            WHERE r.trainer_id = p_trainer_id
+              AND r.effective_from <= p_to::date
+              AND (r.effective_until IS NULL OR r.effective_until >= p_from::date)
+              AND occurrence.day + r.start_time < p_to
+              AND occurrence.day + r.end_time > p_from
+              AND NOT EXISTS (
+                  SELECT 1 FROM trainer_availability_exception e
+                  WHERE e.rule_id = r.rule_id
+                    AND e.exception_date = occurrence.day::date
+              );
+        $$ LANGUAGE sql STABLE;
+    """))
+
+    # 4b) FUNCTION: per-resource booking locks
+    # Two bookings for the same trainer, member or room at the same moment would both
+    # pass the availability check and then race on the exclusion constraints, where the
+    # loser gets a deadlock or waits on the other's GiST entry. Taking a transaction-level
+    # advisory lock on every resource first makes conflicting bookings queue up (the
+    # second one then sees the first one's committed row and gets a clean *_CONFLICT),
+    # while bookings that share nothing never wait for each other.
+    # Locks are always taken trainers, then members, then rooms, each in id order, so two
+    # transactions can never hold them in opposite orders. A transaction that books more
+    # than one session must take all of its locks in one call, up front.
+    conn.execute(text(f"""
+        CREATE OR REPLACE FUNCTION lock_booking_resources(
+            p_trainer_ids  INTEGER[],
+            p_member_ids   INTEGER[],
+            p_room_ids     INTEGER[]
+        )
+        RETURNS VOID
+        AS $$
+        DECLARE
+            v_id INTEGER;
+        BEGIN
+            FOR v_id IN SELECT DISTINCT id FROM unnest(p_trainer_ids) AS id
+                        WHERE id IS NOT NULL ORDER BY id LOOP
+                PERFORM pg_advisory_xact_lock({BOOKING_LOCK_CLASSES["trainer"]}, v_id);
+            END LOOP;
+
+            FOR v_id IN SELECT DISTINCT id FROM unnest(p_member_ids) AS id
+                        WHERE id IS NOT NULL ORDER BY id LOOP
+                PERFORM pg_advisory_xact_lock({BOOKING_LOCK_CLASSES["member"]}, v_id);
+            END LOOP;
+
+            FOR v_id IN SELECT DISTINCT id FROM unnest(p_room_ids) AS id
+                        WHERE id IS NOT NULL ORDER BY id LOOP
+                PERFORM pg_advisory_xact_lock({BOOKING_LOCK_CLASSES["room"]}, v_id);
+            END LOOP;
+        END;
+        $$ LANGUAGE plpgsql;
+    """))
+
+    # 4c) FUNCTION: overlaps that the per-partition exclusion constraints cannot see
+    # Two sessions stored in different month partitions can only overlap if the earlier
+    # one crosses into the later one's month, and since a session is at most a month long
+    # (ck_session_at_most_a_month) that earlier one lives in the month just before. So
+    # for a new session starting in month M the candidates are:
+    #   - the last session of M-1 for the same member / trainer / room (sessions of one
+    #     resource inside a partition never overlap, so only the latest one can still be
+    #     running when M starts), if it ends after p_start;
+    #   - if the new session itself runs into M+1: any session starting in M+1 before p_end.
+    # Each branch reads one partition through the (resource, start_date_time) indexes.
+    # Returns the first conflict found, member first, then trainer, then room.
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION cross_month_session_conflict(
+            p_member_id   INTEGER,
+            p_trainer_id  INTEGER,
+            p_room_id     INTEGER,
+            p_start       TIMESTAMP,
+            p_end         TIMESTAMP
+        )
+        RETURNS TABLE (error_code TEXT, conflict_session_id INTEGER)
+        AS $$
+        DECLARE
+            v_month       TIMESTAMP := date_trunc('month', p_start);
+            v_next_month  TIMESTAMP := date_trunc('month', p_start) + interval '1 month';
+        BEGIN
+            RETURN QUERY
+            SELECT c.error_code, c.session_id
+            FROM (
+                SELECT 1 AS priority, 'MEMBER_CONFLICT'::TEXT AS error_code, prev.session_id
+                FROM (
+                    SELECT s.session_id, s.end_date_time FROM session s
+                    WHERE s.member_id = p_member_id
+                      AND s.start_date_time >= v_month - interval '1 month'
+                      AND s.start_date_time < v_month
+                    ORDER BY s.start_date_time DESC LIMIT 1
+                ) prev
+                WHERE prev.end_date_time > p_start
+
+                UNION ALL
+
+                SELECT 2, 'TRAINER_CONFLICT', prev.session_id
+                FROM (
+                    SELECT s.session_id, s.end_date_time FROM session s
+                    WHERE s.trainer_id = p_trainer_id
+                      AND s.start_date_time >= v_month - interval '1 month'
+                      AND s.start_date_time < v_month
+                    ORDER BY s.start_date_time DESC LIMIT 1
+                ) prev
+                WHERE prev.end_date_time > p_start
+
+                UNION ALL
+
+                SELECT 3, 'ROOM_CONFLICT', prev.session_id
+                FROM (
+                    SELECT s.session_id, s.end_date_time FROM session s
+                    WHERE s.room_id = p_room_id
+                      AND s.start_date_time >= v_month - interval '1 month'
+                      AND s.start_date_time < v_month
+                    ORDER BY s.start_date_time DESC LIMIT 1
+                ) prev
+                WHERE prev.end_date_time > p_start
+
+                UNION ALL
+
+                (SELECT 1, 'MEMBER_CONFLICT', s.session_id FROM session s
+                 WHERE p_end > v_next_month
+                   AND s.member_id = p_member_id
+                   AND s.start_date_time >= v_next_month
+                   AND s.start_date_time < p_end
+                 LIMIT 1)
+
+                UNION ALL
+
+                (SELECT 2, 'TRAINER_CONFLICT', s.session_id FROM session s
+                 WHERE p_end > v_next_month
+                   AND s.trainer_id = p_trainer_id
+                   AND s.start_date_time >= v_next_month
+                   AND s.start_date_time < p_end
+                 LIMIT 1)
+
+                UNION ALL
+
+                (SELECT 3, 'ROOM_CONFLICT', s.session_id FROM session s
+                 WHERE p_end > v_next_month
+                   AND s.room_id = p_room_id
+                   AND s.start_date_time >= v_next_month
+                   AND s.start_date_time < p_end
+                 LIMIT 1)
+            ) c
+            ORDER BY c.priority
+            LIMIT 1;
+        END;
+        $$ LANGUAGE plpgsql STABLE;
+    """))
+
+    # 4d) FUNCTION: validate + insert a booking in a single round trip
+    # Returns exactly one row: (error_code, conflict_session_id, new_session_id).
+    # On success error_code is NULL and new_session_id is the inserted session.
+    # The error codes are listed (with their messages) in app/booking.py.
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION book_session(
+            p_session_type  VARCHAR,
+            p_member_id     INTEGER,
+            p_trainer_id    INTEGER,
+            p_room_id       INTEGER,
+            p_admin_id      INTEGER,
+            p_start         TIMESTAMP,
+            p_end           TIMESTAMP,
+            p_max_capacity  INTEGER
+        )
+        RETURNS TABLE (error_code TEXT, conflict_session_id INTEGER, new_session_id INTEGER)
+        AS $$
+        DECLARE
+            v_room_capacity INTEGER;
+            v_conflict_id   INTEGER;
+            v_new_id        INTEGER;
+            v_constraint    TEXT;
+            v_error_code    TEXT;
+        BEGIN
+            -- queue behind any booking in progress for the same trainer / member / room
+            -- (held until this transaction ends)
+            PERFORM lock_booking_resources(
+                ARRAY[p_trainer_id], ARRAY[p_member_id], ARRAY[p_room_id]
+            );
+
+            -- referenced rows must exist
+            IF p_member_id IS NOT NULL
+               AND NOT EXISTS (SELECT 1 FROM member m WHERE m.member_id = p_member_id) THEN
+                RETURN QUERY SELECT 'MEMBER_NOT_FOUND'::TEXT, NULL::INTEGER, NULL::INTEGER;
+                RETURN;
+            END IF;
+
+            IF NOT EXISTS (SELECT 1 FROM trainer t WHERE t.trainer_id = p_trainer_id) THEN
+                RETURN QUERY SELECT 'TRAINER_NOT_FOUND'::TEXT, NULL::INTEGER, NULL::INTEGER;
+                RETURN;
+            END IF;
+
+            SELECT r.max_capacity INTO v_room_capacity
+            FROM room r WHERE r.room_id = p_room_id;
+            IF NOT FOUND THEN
+                RETURN QUERY SELECT 'ROOM_NOT_FOUND'::TEXT, NULL::INTEGER, NULL::INTEGER;
+                RETURN;
+            END IF;
+
+            IF NOT EXISTS (SELECT 1 FROM admin_staff a WHERE a.admin_id = p_admin_id) THEN
+                RETURN QUERY SELECT 'ADMIN_NOT_FOUND'::TEXT, NULL::INTEGER, NULL::INTEGER;
+                RETURN;
+            END IF;
+
+            -- the session cannot hold more people than the room
+            IF p_max_capacity > v_room_capacity THEN
+                RETURN QUERY SELECT 'ROOM_CAPACITY_EXCEEDED'::TEXT, NULL::INTEGER, NULL::INTEGER;
+                RETURN;
+            END IF;
+
+            -- trainer must have one availability block (one-off or weekly) covering
+            -- the whole window
+            IF NOT EXISTS (
+                SELECT 1 FROM trainer_availability_windows(p_trainer_id, p_start, p_end) w
+                WHERE w.start_date_time <= p_start
+                  AND w.end_date_time >= p_end
+            ) THEN
+                RETURN QUERY SELECT 'TRAINER_UNAVAILABLE'::TEXT, NULL::INTEGER, NULL::INTEGER;
+                RETURN;
+            END IF;
+
+            -- overlaps with sessions in the neighbouring month partitions (the locks above
+            -- make this check safe against concurrent bookings)
+            SELECT c.error_code, c.conflict_session_id INTO v_error_code, v_conflict_id
+            FROM cross_month_session_conflict(p_member_id, p_trainer_id, p_room_id, p_start, p_end) c;
+            IF FOUND THEN
+                RETURN QUERY SELECT v_error_code, v_conflict_id, NULL::INTEGER;
+                RETURN;
+            END IF;
+
+            -- overlaps inside a month are caught by the ex_<partition>_*_no_overlap exclusion
+            -- constraints; we turn the violation back into an error code (and find the
+            -- clashing session)
+            BEGIN
+                INSERT INTO session (
+                    session_type, start_date_time, end_date_time, max_capacity,
+                    room_id, created_by_admin_id, trainer_id, member_id
+                )
+                VALUES (
+                    p_session_type, p_start, p_end, p_max_capacity,
+                    p_room_id, p_admin_id, p_trainer_id, p_member_id
+                )
+                RETURNING session.session_id INTO v_new_id;
+            EXCEPTION WHEN exclusion_violation THEN
+                GET STACKED DIAGNOSTICS v_constraint = CONSTRAINT_NAME;
+
+                IF v_constraint LIKE '%member_no_overlap' THEN
+                    v_error_code := 'MEMBER_CONFLICT';
+                    SELECT s.session_id INTO v_conflict_id FROM session s
+                    WHERE s.member_id = p_member_id
+                      AND s.start_date_time < p_end
+                      AND s.start_date_time >= p_start - interval '1 month'
+                      AND tsrange(s.start_date_time, s.end_date_time) && tsrange(p_start, p_end)
+                    LIMIT 1;
+                ELSIF v_constraint LIKE '%trainer_no_overlap' THEN
+                    v_error_code := 'TRAINER_CONFLICT';
+                    SELECT s.session_id INTO v_conflict_id FROM session s
+                    WHERE s.trainer_id = p_trainer_id
+                      AND s.start_date_time < p_end
+                      AND s.start_date_time >= p_start - interval '1 month'
+                      AND tsrange(s.start_date_time, s.end_date_time) && tsrange(p_start, p_end)
+                    LIMIT 1;
+                ELSE
+                    v_error_code := 'ROOM_CONFLICT';
+                    SELECT s.session_id INTO v_conflict_id FROM session s
+                    WHERE s.room_id = p_room_id
+                      AND s.start_date_time < p_end
+                      AND s.start_date_time >= p_start - interval '1 month'
+                      AND tsrange(s.start_date_time, s.end_date_time) && tsrange(p_start, p_end)
+                    LIMIT 1;
+                END IF;
+
+                RETURN QUERY SELECT v_error_code, v_conflict_id, NULL::INTEGER;
+                RETURN;
+            END;
+
+            RETURN QUERY SELECT NULL::TEXT, NULL::INTEGER, v_new_id;
+        END;
+        $$ LANGUAGE plpgsql;
+    """))
+
+
+def create_dashboard_triggers(conn):
+    # 5) TRIGGERS: keep member_dashboard in sync with session, room and trainer
+    conn.execute(text("""
+        CREATE OR REPLACE FUNCTION sync_member_dashboard_session()
+        RETURNS trigger AS $$
+        BEGIN
+            -- only upcoming sessions that belong to a single member are shown
+            IF TG_OP = 'DELETE' OR NEW.member_id IS NULL OR NEW.start_date_time < NOW() THEN
+                DELETE FROM member_dashboard WHERE session_id = OLD.session_id;
+                RETURN NULL;
+            END IF;
+
+            INSERT INTO member_dashboard (
+                session_id, member_id, session_type, start_date_time, end_date_time,
+                room_id, room_name, trainer_id, trainer_first_name, trainer_last_name
+            )
+            SELECT NEW.session_id, NEW.member_id, NEW.session_type,
+                   NEW.start_date_time, NEW.end_date_time,
+                   r.room_id, r.room_name, t.trainer_id, t.first_name, t.last_name
+            FROM room r, trainer t
+            WHERE r.room_id = NEW.room_id
+              AND t.trainer_id = NEW.trainer_id
+            ON CONFLICT (session_id) DO UPDATE SET
+                member_id          = EXCLUDED.member_id,
+                session_type       = EXCLUDED.session_type,
+                start_date_time    = EXCLUDED.start_date_time,
+                end_date_time      = EXCLUDED.end_date_time,
+                room_id            = EXCLUDED.room_id,
+                room_name          = EXCLUDED.room_name,
+                trainer_id         = EXCLUDED.trainer_id,
+                trainer_first_name = EXCLUDED.trainer_first_name,
+                trainer_last_name  = EXCLUDED.trainer_last_name;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE FUNCTION sync_member_dashboard_room()
+        RETURNS trigger AS $$
+        BEGIN
+            UPDATE member_dashboard SET room_name = NEW.room_name
+            WHERE room_id = NEW.room_id;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE OR REPLACE FUNCTION sync_member_dashboard_trainer()
+        RETURNS trigger AS $$
+        BEGIN
+            UPDATE member_dashboard
+            SET trainer_first_name = NEW.first_name,
+                trainer_last_name  = NEW.last_name
+            WHERE trainer_id = NEW.trainer_id;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """))
+
+    # renames are rare, so those two triggers only fire when a name actually changes;
+    # the session trigger ignores enrolled_count, which changes on every class sign-up
+    conn.execute(text("""
+        DROP TRIGGER IF EXISTS trg_member_dashboard_session ON session;
+        CREATE TRIGGER trg_member_dashboard_session
+        AFTER INSERT OR DELETE
+           OR UPDATE OF session_type, start_date_time, end_date_time, room_id, trainer_id, member_id
+        ON session
+        FOR EACH ROW
+        EXECUTE FUNCTION sync_member_dashboard_session();
+
+        DROP TRIGGER IF EXISTS trg_member_dashboard_room ON room;
+        CREATE TRIGGER trg_member_dashboard_room
+        AFTER UPDATE OF room_name ON room
+        FOR EACH ROW
+        WHEN (OLD.room_name IS DISTINCT FROM NEW.room_name)
+        EXECUTE FUNCTION sync_member_dashboard_room();
+
+        DROP TRIGGER IF EXISTS trg_member_dashboard_trainer ON trainer;
+        CREATE TRIGGER trg_member_dashboard_trainer
+        AFTER UPDATE OF first_name, last_name ON trainer
+        FOR EACH ROW
+        WHEN (OLD.first_name IS DISTINCT FROM NEW.first_name
+              OR OLD.last_name IS DISTINCT FROM NEW.last_name)
+        EXECUTE FUNCTION sync_member_dashboard_trainer();
+    """))
+
+    # backfill anything that was booked before the triggers existed
+    conn.execute(text("""
+        INSERT INTO member_dashboard (
+            session_id, member_id, session_type, start_date_time, end_date_time,
+            room_id, room_name, trainer_id, trainer_first_name, trainer_last_name
+        )
+        SELECT s.session_id, s.member_id, s.session_type, s.start_date_time, s.end_date_time,
+               r.room_id, r.room_name, t.trainer_id, t.first_name, t.last_name
+        FROM session s
+        JOIN room r    ON r.room_id = s.room_id
+        JOIN trainer t ON t.trainer_id = s.trainer_id
+        WHERE s.member_id IS NOT NULL
+          AND s.start_date_time >= NOW()
+        ON CONFLICT (session_id) DO NOTHING;
+    """))
+
+
+def create_change_feed(conn):
+    # 6) CHANGE FEED: every change to the tables in CHANGE_FEED_TABLES is logged in
+    # change_feed and announced with NOTIFY, so the caches of other processes can
+    # drop what it affects (app/change_feed.py). An UPDATE is sent as the old row
+    # removed ("D") plus the new row added ("I"). txid is what a listener replays
+    # from after a reconnect; changed_at is what the prune job goes by.
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS change_feed (
+            change_id   BIGSERIAL PRIMARY KEY,
+            txid        XID8 NOT NULL DEFAULT pg_current_xact_id(),
+            changed_at  TIMESTAMP NOT NULL DEFAULT NOW(),
+            table_name  VARCHAR(40) NOT NULL,
+            operation   CHAR(1) NOT NULL,
+            row_data    TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_change_feed_txid ON change_feed (txid);
+        CREATE INDEX IF NOT EXISTS idx_change_feed_changed_at ON change_feed (changed_at);
+
+        -- TG_ARGV: the table name (partitions fire this with their own TG_TABLE_NAME),
+        -- then the columns to send, as comma-separated text ("" for NULL)
+        CREATE OR REPLACE FUNCTION record_change()
+        RETURNS trigger AS $$
+        DECLARE
+            v_operation TEXT;
+            v_row       JSONB;
+            v_row_data  TEXT;
+            v_change_id BIGINT;
+        BEGIN
+            FOREACH v_operation IN ARRAY
+                CASE TG_OP WHEN 'INSERT' THEN ARRAY['I']
+                           WHEN 'DELETE' THEN ARRAY['D']
+                           ELSE ARRAY['D', 'I'] END
+            LOOP
+                IF v_operation = 'D' THEN
+                    v_row := to_jsonb(OLD);
+                ELSE
+                    v_row := to_jsonb(NEW);
+                END IF;
+
+                SELECT string_agg(coalesce(v_row ->> c.column_name, ''), ',' ORDER BY c.position)
+                INTO v_row_data
+                FROM unnest(TG_ARGV[1 : TG_NARGS - 1]) WITH ORDINALITY AS c(column_name, position);
+
+                INSERT INTO change_feed (table_name, operation, row_data)
+                VALUES (TG_ARGV[0], v_operation, v_row_data)
+                RETURNING change_id INTO v_change_id;
+
+                -- delivered when (and only if) the transaction commits
+                PERFORM pg_notify('{CHANGE_FEED_CHANNEL}',
+                                  v_change_id || '|' || TG_ARGV[0] || '|' || v_operation || '|' || v_row_data);
+            END LOOP;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        -- for bulk loads that run with the feed triggers disabled: tells every
+        -- listener to drop everything it has cached
+        CREATE OR REPLACE FUNCTION record_change_feed_reset(p_reason TEXT)
+        RETURNS VOID AS $$
+        DECLARE
+            v_change_id BIGINT;
+        BEGIN
+            INSERT INTO change_feed (table_name, operation, row_data)
+            VALUES ('*', 'R', p_reason)
+            RETURNING change_id INTO v_change_id;
+            PERFORM pg_notify('{CHANGE_FEED_CHANNEL}', v_change_id || '|*|R|' || p_reason);
+        END;
+        $$ LANGUAGE plpgsql;
+    """))
+
+    for table_name, (row_columns, update_columns) in CHANGE_FEED_TABLES.items():
+        events = "DELETE" if table_name in CHANGE_FEED_UPDATE_ONLY_TABLES else "INSERT OR DELETE"
+        arguments = ", ".join(f"'{name}'" for name in (table_name, *row_columns))
+        conn.execute(text(f"""
+            DROP TRIGGER IF EXISTS trg_change_feed_{table_name} ON {table_name};
+            CREATE TRIGGER trg_change_feed_{table_name}
+            AFTER {events} OR UPDATE OF {", ".join(update_columns)} ON {table_name}
             FOR EACH ROW
-            EXECUTE FUNCTION prevent_room_overlap();
+            EXECUTE FUNCTION record_change({arguments});
         """))
 
+
+# Every step, in the order they have to run. Each one is idempotent (IF NOT EXISTS /
+# OR REPLACE), and app/migrations.py applies each one once, as its own schema version.
+DDL_STEPS = [
+    create_dashboard_view,
+    create_dashboard_table,
+    add_enrolled_count,
+    create_hot_path_indexes,
+    create_overlap_constraints,
+    create_booking_functions,
+    create_dashboard_triggers,
+    create_change_feed,
+]
+
+
+def create_view_index_trigger():
+    """
+    Run every step again, whatever the schema version says (to repair a database by hand).
+    init_db goes through app/migrations.py instead, which skips the steps already applied.
+    """
+
+    with get_engine().connect() as conn:
+        for step in DDL_STEPS:
+            step(conn)
+
         conn.commit()
-        print("View, index, and trigger created.")
-        
+        print("View, dashboard table, indexes, overlap constraints, booking functions, triggers, and change feed created.")
+
 
 if __name__ == "__main__":
-    create_view_index_trigger()
\ No newline at end of file
+    create_view_index_trigger()
@@ -0,0 +1,351 @@
+# app/generate_data.py
+#
+# Synthetic data generator for capacity planning and benchmarks.
+# seed_data.py inserts a handful of hand-written rows for the demo; this script builds
+# a production-sized dataset instead and bulk-loads it with COPY.
+#
+# Everything comes from one random.Random(seed), so the same arguments always give the
+# same rows. The data satisfies every constraint the services rely on:
+#   - each trainer has one availability block per working day (5 days a week, fixed shift),
+#     or, with --weekly-availability, one weekly rule per working weekday instead,
+#   - every session sits inside its trainer's availability block,
+#   - no room, trainer or member is ever double-booked (sessions are whole hours, and
+#     each hour uses a room / trainer / member at most once),
+#   - CLASS sessions never exceed their room's capacity, PT sessions have capacity 1.
+# Half of the weeks are in the past and half in the future by default, so dashboards
+# and schedules have something to show.
+#
+# Usage (from FINALPROJECT/):
+#   python -m app.generate_data --members 200000 --trainers 500 --rooms 40 --weeks 52
+#   python -m app.generate_data --members 5000 --trainers 50 --rooms 10 --weeks 8 --seed 7
+
+import argparse
+import io
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Ensure the project root (FINALPROJECT) is on sys.path so we can import `database`.
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+from database import get_engine
+from app.partitioning import create_month_partitions
+
+
+DEFAULT_SEED = 3005
+
+FIRST_NAMES = [
+    "Aaliyah", "Adam", "Aisha", "Alex", "Amara", "Ben", "Carlos", "Chloe", "Daniel", "Elena",
+    "Emma", "Farah", "Grace", "Hassan", "Isla", "Jack", "Jin", "Kai", "Layla", "Liam",
+    "Lucas", "Maya", "Mia", "Mohammed", "Noah", "Nora", "Olivia", "Omar", "Priya", "Ravi",
+    "Sara", "Sofia", "Tariq", "Theo", "Una", "Victor", "Wei", "Yara", "Yusuf", "Zoe",
+]
+LAST_NAMES = [
+    "Ahmed", "Brown", "Chen", "Diaz", "Evans", "Fischer", "Garcia", "Haddad", "Ito", "Johnson",
+    "Khan", "Lee", "Martin", "Nguyen", "O'Brien", "Patel", "Quinn", "Rossi", "Singh", "Smith",
+    "Tremblay", "Usman", "Virtanen", "Wilson", "Xu", "Yilmaz", "Zhang",
+]
+GENDERS = ["Male", "Female", "Other", "Prefer not to say"]
+GENDER_WEIGHTS = [46, 46, 5, 3]
+ROOM_KINDS = [("Studio", 15, 30), ("Weight Room", 8, 20), ("Cardio Room", 10, 25),
+              ("Spin Room", 12, 24), ("PT Suite", 2, 4), ("Yoga Room", 10, 20)]
+
+# generated tables whose inserts the change feed would otherwise send (see ddl_extras.py)
+CHANGE_FEED_BULK_TABLES = ("session", "trainer_availability", "trainer_availability_rule")
+
+# each trainer works one of these shifts (start hour, end hour) on their working days
+SHIFTS = [(6, 14), (10, 18), (14, 22)]
+
+
+def _copy_rows(cursor, table: str, columns: list[str], rows):
+    """COPY an iterable of tuples into `table` (None becomes NULL)."""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join("\\N" if value is None else str(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+
+
+def _next_id(conn, table: str, id_column: str) -> int:
+    return conn.execute(text(f"SELECT COALESCE(MAX({id_column}), 0) + 1 FROM {table}")).scalar()
+
+
+def _sync_sequence(conn, table: str, id_column: str):
+    # we COPY explicit ids, so move the serial sequence past them
+    conn.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{table}', '{id_column}'), "
+        f"(SELECT MAX({id_column}) FROM {table}))"
+    ))
+
+
+def generate_dataset(conn,
+                     members: int,
+                     trainers: int,
+                     rooms: int,
+                     weeks: int,
+                     seed: int = DEFAULT_SEED,
+                     start: datetime | None = None,
+                     utilization: float = 0.6,
+                     class_ratio: float = 0.15,
+                     weekly_availability: bool = False) -> dict:
+    """
+    Generate and COPY a synthetic dataset through an open Connection.
+
+    New rows get ids after the ones already in the tables, so this can run on top of
+    the seed data. Nothing is committed here; the caller owns the transaction
+    (plan_check.py, for example, rolls it back).
+
+    utilization is the share of on-shift trainers that have a session in a given hour
+    (capped by the number of rooms); class_ratio is the share of those sessions that
+    are CLASS sessions instead of PT. weekly_availability stores each trainer's shifts as
+    trainer_availability_rule rows (one per working weekday) instead of one
+    trainer_availability row per working day.
+
+    Returns a dict of table name -> rows inserted.
+    """
+    rng = random.Random(seed)
+
+    if start is None:
+        # half of the weeks in the past, half in the future
+        start = datetime.now() - timedelta(weeks=weeks // 2)
+    start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    days = weeks * 7
+
+    # every generated month gets its partition first; otherwise past months and months
+    # beyond PARTITION_MONTHS_AHEAD would all be loaded into the DEFAULT partitions
+    create_month_partitions(conn, start, start + timedelta(days=days - 1))
+
+    # the exclusion constraints are checked row by row during COPY, which is what we want;
+    # the member_dashboard trigger is not, it is backfilled in one statement at the end.
+    # Neither are the change feed triggers: one reset at the end replaces a feed row and
+    # a notification per generated row.
+    conn.execute(text("ALTER TABLE session DISABLE TRIGGER trg_member_dashboard_session"))
+    for table_name in CHANGE_FEED_BULK_TABLES:
+        conn.execute(text(f"ALTER TABLE {table_name} DISABLE TRIGGER trg_change_feed_{table_name}"))
+
+    cursor = conn.connection.cursor()
+    counts = {}
+
+    # --- Admin staff (one per ten rooms) ---
+    first_admin = _next_id(conn, "admin_staff", "admin_id")
+    admin_ids = list(range(first_admin, first_admin + max(1, rooms // 10)))
+    _copy_rows(cursor, "admin_staff", ["admin_id", "first_name", "last_name", "phone_number", "email"], (
+        (admin_id, rng.choice(FIRST_NAMES), "Admin", f"555-{admin_id:07d}",
+         f"admin{admin_id}@health.example.com")
+        for admin_id in admin_ids
+    ))
+    counts["admin_staff"] = len(admin_ids)
+
+    # --- Rooms ---
+    first_room = _next_id(conn, "room", "room_id")
+    room_ids = list(range(first_room, first_room + rooms))
+    room_capacity = {}
+    room_rows = []
+    for room_id in room_ids:
+        kind, low, high = rng.choice(ROOM_KINDS)
+        room_capacity[room_id] = rng.randint(low, high)
+        room_rows.append((room_id, f"{kind} {room_id}", room_capacity[room_id], rng.choice(admin_ids)))
+    _copy_rows(cursor, "room", ["room_id", "room_name", "max_capacity", "admin_id"], room_rows)
+    counts["room"] = rooms
+
+    # --- Trainers ---
+    first_trainer = _next_id(conn, "trainer", "trainer_id")
+    trainer_ids = list(range(first_trainer, first_trainer + trainers))
+    trainer_rows = []
+    for trainer_id in trainer_ids:
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        trainer_rows.append((
+            trainer_id, rng.choices(GENDERS, GENDER_WEIGHTS)[0], first_name, last_name,
+            f"{first_name}.{last_name}.t{trainer_id}@example.com".lower().replace("'", ""),
+        ))
+    _copy_rows(cursor, "trainer", ["trainer_id", "gender", "first_name", "last_name", "email"], trainer_rows)
+    counts["trainer"] = trainers
+
+    # --- Members ---
+    first_member = _next_id(conn, "member", "member_id")
+    member_ids = range(first_member, first_member + members)
+
+    def member_rows():
+        this_year = datetime.now().year
+        for member_id in member_ids:
+            first_name = rng.choice(FIRST_NAMES)
+            last_name = rng.choice(LAST_NAMES)
+            current_weight = round(rng.uniform(50, 120), 2)
+            goal_weight = round(current_weight * rng.uniform(0.85, 1.05), 2)
+            yield (
+                member_id, goal_weight, current_weight, rng.choices(GENDERS, GENDER_WEIGHTS)[0],
+                first_name, last_name,
+                rng.randint(this_year - 70, this_year - 16), rng.randint(1, 12), rng.randint(1, 28),
+                f"555-{member_id:07d}",
+                f"{first_name}.{last_name}.m{member_id}@example.com".lower().replace("'", ""),
+            )
+
+    _copy_rows(cursor, "member", [
+        "member_id", "goal_weight", "current_weight", "gender", "first_name", "last_name",
+        "year", "month", "day", "phone_number", "email",
+    ], member_rows())
+    counts["member"] = members
+
+    # --- Trainer availability: one block per working day, fixed shift per trainer ---
+    shift_of = {trainer_id: rng.choice(SHIFTS) for trainer_id in trainer_ids}
+    days_off = {trainer_id: set(rng.sample(range(7), 2)) for trainer_id in trainer_ids}
+
+    if weekly_availability:
+        # the same shifts as weekly rules covering the whole date range
+        rule_rows = [
+            (trainer_id, weekday, f"{shift_of[trainer_id][0]:02d}:00", f"{shift_of[trainer_id][1]:02d}:00",
+             start.date(), (start + timedelta(days=days - 1)).date())
+            for trainer_id in trainer_ids
+            for weekday in range(7)
+            if weekday not in days_off[trainer_id]
+        ]
+        _copy_rows(cursor, "trainer_availability_rule",
+                   ["trainer_id", "weekday", "start_time", "end_time", "effective_from", "effective_until"],
+                   rule_rows)
+        counts["trainer_availability_rule"] = len(rule_rows)
+    else:
+        availability_rows = []
+        for day in range(days):
+            day_start = start + timedelta(days=day)
+            for trainer_id in trainer_ids:
+                if day_start.weekday() in days_off[trainer_id]:
+                    continue
+                shift_start, shift_end = shift_of[trainer_id]
+                availability_rows.append((
+                    trainer_id,
+                    day_start + timedelta(hours=shift_start),
+                    day_start + timedelta(hours=shift_end),
+                ))
+        _copy_rows(cursor, "trainer_availability",
+                   ["trainer_id", "start_date_time", "end_date_time"], availability_rows)
+        counts["trainer_availability"] = len(availability_rows)
+
+    # on-shift trainers for every (weekday, hour)
+    on_shift = {}
+    for weekday in range(7):
+        for hour in range(24):
+            on_shift[(weekday, hour)] = [
+                trainer_id for trainer_id in trainer_ids
+                if weekday not in days_off[trainer_id]
+                and shift_of[trainer_id][0] <= hour < shift_of[trainer_id][1]
+            ]
+
+    # --- Sessions: whole-hour slots, each room / trainer / member used once per hour ---
+    first_session = _next_id(conn, "session", "session_id")
+
+    def session_rows():
+        for day in range(days):
+            day_start = start + timedelta(days=day)
+            for hour in range(24):
+                candidates = on_shift[(day_start.weekday(), hour)]
+                booked = min(rooms, round(len(candidates) * utilization))
+                if booked == 0:
+                    continue
+
+                slot_start = day_start + timedelta(hours=hour)
+                slot_end = slot_start + timedelta(hours=1)
+                busy_members = set()
+
+                for trainer_id, room_id in zip(rng.sample(candidates, booked), rng.sample(room_ids, booked)):
+                    if rng.random() < class_ratio:
+                        capacity = rng.randint(min(5, room_capacity[room_id]), room_capacity[room_id])
+                        yield ("CLASS", slot_start, slot_end, capacity, room_id,
+                               rng.choice(admin_ids), trainer_id, None)
+                        continue
+
+                    # CASE: tiny datasets can run out of free members in a busy hour
+                    if len(busy_members) == members:
+                        continue
+
+                    member_id = rng.choice(member_ids)
+                    while member_id in busy_members:
+                        member_id = rng.choice(member_ids)
+                    busy_members.add(member_id)
+                    yield ("PT", slot_start, slot_end, 1, room_id,
+                           rng.choice(admin_ids), trainer_id, member_id)
+
+    _copy_rows(cursor, "session", [
+        "session_type", "start_date_time", "end_date_time", "max_capacity",
+        "room_id", "created_by_admin_id", "trainer_id", "member_id",
+    ], session_rows())
+    counts["session"] = conn.execute(
+        text("SELECT COUNT(*) FROM session WHERE session_id >= :first"), {"first": first_session}
+    ).scalar()
+
+    for table_name, id_column in (("admin_staff", "admin_id"), ("room", "room_id"),
+                                  ("trainer", "trainer_id"), ("member", "member_id")):
+        _sync_sequence(conn, table_name, id_column)
+
+    # backfill member_dashboard for the new upcoming PT sessions, then re-enable the trigger
+    conn.execute(text("""
+        INSERT INTO member_dashboard (
+            session_id, member_id, session_type, start_date_time, end_date_time,
+            room_id, room_name, trainer_id, trainer_first_name, trainer_last_name
+        )
+        SELECT s.session_id, s.member_id, s.session_type, s.start_date_time, s.end_date_time,
+               r.room_id, r.room_name, t.trainer_id, t.first_name, t.last_name
+        FROM session s
+        JOIN room r    ON r.room_id = s.room_id
+        JOIN trainer t ON t.trainer_id = s.trainer_id
+        WHERE s.session_id >= :first
+          AND s.member_id IS NOT NULL
+          AND s.start_date_time >= NOW()
+        ON CONFLICT (session_id) DO NOTHING;
+    """), {"first": first_session})
+    conn.execute(text("ALTER TABLE session ENABLE TRIGGER trg_member_dashboard_session"))
+    for table_name in CHANGE_FEED_BULK_TABLES:
+        conn.execute(text(f"ALTER TABLE {table_name} ENABLE TRIGGER trg_change_feed_{table_name}"))
+    conn.execute(text("SELECT record_change_feed_reset('generate_data')"))
+
+    for table_name in ("admin_staff", "room", "trainer", "member", "trainer_availability",
+                       "trainer_availability_rule", "session", "member_dashboard"):
+        conn.execute(text(f"ANALYZE {table_name}"))
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load a reproducible synthetic dataset.")
+    parser.add_argument("--members", type=int, default=200000)
+    parser.add_argument("--trainers", type=int, default=500)
+    parser.add_argument("--rooms", type=int, default=40)
+    parser.add_argument("--weeks", type=int, default=52)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="RNG seed (same seed = same data)")
+    parser.add_argument("--start", type=datetime.fromisoformat, default=None,
+                        help="first day (YYYY-MM-DD); default puts half of the weeks in the past")
+    parser.add_argument("--utilization", type=float, default=0.6,
+                        help="share of on-shift trainers with a session each hour")
+    parser.add_argument("--class-ratio", type=float, default=0.15,
+                        help="share of sessions that are CLASS sessions")
+    parser.add_argument("--weekly-availability", action="store_true",
+                        help="store trainer shifts as weekly rules instead of one block per day")
+    args = parser.parse_args()
+
+    if args.members < 1 or args.trainers < 1 or args.rooms < 1 or args.weeks < 1:
+        parser.error("members, trainers, rooms and weeks must all be at least 1")
+    if not (0 <= args.utilization <= 1 and 0 <= args.class_ratio <= 1):
+        parser.error("utilization and class-ratio must be between 0 and 1")
+
+    started = time.perf_counter()
+
+    # the "batch" profile has no statement timeout, which the bulk load needs
+    with get_engine("batch").begin() as conn:
+        counts = generate_dataset(
+            conn, args.members, args.trainers, args.rooms, args.weeks,
+            seed=args.seed, start=args.start,
+            utilization=args.utilization, class_ratio=args.class_ratio,
+            weekly_availability=args.weekly_availability,
+        )
+
+    for table_name, rows in counts.items():
+        print(f"{table_name:<22} {rows:>10,}")
+    print(f"Synthetic data loaded in {time.perf_counter() - started:.1f}s (seed {args.seed}).")
+
+
+if __name__ == "__main__":
+    main()
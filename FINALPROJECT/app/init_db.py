@@ -6,27 +6,32 @@ import sys
 # Ensure the project root (FINALPROJECT) is on sys.path so we can import `database` and `models`.
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from database import engine, Base
-from app.ddl_extras import create_view_index_trigger
+from app.migrations import LATEST_VERSION, migrate
+from app.partitioning import create_partitions
 
 
-# Import all model modules so SQLAlchemy knows about every mapped class.
-from models import (
-    member,
-    trainer,
-    admin_staff,
-    room,
-    trainer_availability,
-    session,
-) 
+def init_db():
+    """
+    Bring the schema up to date and make sure this month and the next few have partitions.
 
+    Only the migrations the database does not have yet are applied (see app/migrations.py),
+    so on a current database this is a few catalog reads and locks nothing.
+    """
+    applied = migrate()
+    for migration in applied:
+        print(f"Applied migration {migration.version}: {migration.name}.")
 
-def init_db():
-    """Create all tables defined by the ORM models."""
-    Base.metadata.create_all(bind=engine)
-    create_view_index_trigger()
-    print("Database tables + view/index/trigger created (or already existed).")
+    # session / trainer_availability are partitioned by month
+    created = create_partitions()
+    for table_name, partitions in created.items():
+        if partitions:
+            print(f"Created {table_name} partitions: {', '.join(partitions)}.")
+
+    if applied:
+        print(f"Database schema created / upgraded to version {LATEST_VERSION}.")
+    else:
+        print(f"Database schema is up to date (version {LATEST_VERSION}).")
 
 
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    init_db()
@@ -0,0 +1,127 @@
+"""
+COMP3005 - Final Project: Health & Fitness Club Management System
+File: intervals.py
+
+Description:
+Small interval-algebra helpers used to work out free time. An interval is a
+(start, end) tuple of datetimes treated as half-open [start, end), which matches
+how the rest of the project decides overlap (start < other_end AND end > other_start),
+so back-to-back intervals do not overlap.
+
+Every function expects its input lists sorted by start time and runs in a single
+linear pass, so thousands of availability blocks and sessions stay cheap.
+
+Author: Abdul Malik
+"""
+
+from datetime import date, datetime, time, timedelta
+
+Interval = tuple[datetime, datetime]
+
+
+def merge_intervals(intervals: list[Interval]) -> list[Interval]:
+    """Merge overlapping (or touching) intervals. Input must be sorted by start."""
+    merged: list[Interval] = []
+
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            # CASE: overlaps / touches the previous one -> extend it
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+
+    return merged
+
+
+def subtract_intervals(blocks: list[Interval], busy: list[Interval]) -> list[Interval]:
+    """
+    Remove the busy intervals from each block and return what is left.
+
+    Blocks are handled one by one (they are not merged with each other), because a
+    booking has to fit inside a single availability block. `busy` must be sorted and
+    already merged (see merge_intervals).
+    """
+    free: list[Interval] = []
+    first_busy = 0
+
+    for block_start, block_end in blocks:
+        # skip busy intervals that end before this block (they also end before every later one)
+        while first_busy < len(busy) and busy[first_busy][1] <= block_start:
+            first_busy += 1
+
+        cursor = block_start
+        i = first_busy
+        while i < len(busy) and busy[i][0] < block_end:
+            busy_start, busy_end = busy[i]
+            if busy_start > cursor:
+                free.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+            i += 1
+
+        if cursor < block_end:
+            free.append((cursor, block_end))
+
+    return free
+
+
+def clip_intervals(intervals: list[Interval], window_start: datetime,
+                   window_end: datetime) -> list[Interval]:
+    """Cut every interval down to [window_start, window_end) and drop the empty ones."""
+    clipped: list[Interval] = []
+
+    for start, end in intervals:
+        start = max(start, window_start)
+        end = min(end, window_end)
+        if start < end:
+            clipped.append((start, end))
+
+    return clipped
+
+
+def at_least(intervals: list[Interval], duration: timedelta) -> list[Interval]:
+    """Keep only the intervals that are long enough to hold `duration`."""
+    return [(start, end) for start, end in intervals if end - start >= duration]
+
+
+def weekly_occurrences(weekday: int, start_time: time, end_time: time,
+                       effective_from: date, effective_until: date | None,
+                       skip_dates: set[date], window_start: datetime,
+                       window_end: datetime) -> list[Interval]:
+    """
+    Expand one weekly rule (weekday 0 = Monday) into the occurrences that overlap
+    [window_start, window_end), sorted, leaving out skip_dates.
+
+    Python twin of the rule branch of trainer_availability_windows() in ddl_extras.py.
+    """
+    first_day = max(effective_from, window_start.date())
+    last_day = window_end.date()
+    if effective_until is not None:
+        last_day = min(last_day, effective_until)
+
+    occurrences: list[Interval] = []
+    day = first_day + timedelta(days=(weekday - first_day.weekday()) % 7)
+    while day <= last_day:
+        start = datetime.combine(day, start_time)
+        end = datetime.combine(day, end_time)
+        if day not in skip_dates and start < window_end and end > window_start:
+            occurrences.append((start, end))
+        day += timedelta(days=7)
+
+    return occurrences
+
+
+def add_months(value: date | datetime, months: int) -> date | datetime:
+    """
+    Move a date / datetime by whole calendar months, like Postgres's "+ interval 'N months'":
+    the day is clamped to the end of a shorter month (Jan 31 + 1 month = Feb 28 / 29).
+    """
+    month_index = value.year * 12 + (value.month - 1) + months
+    year, month = divmod(month_index, 12)
+    month += 1
+
+    # last day of the target month: the day before the 1st of the month after it
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last_day = (next_month - timedelta(days=1)).day
+
+    return value.replace(year=year, month=month, day=min(value.day, last_day))
@@ -10,27 +10,18 @@ text-based menu system that lets us "pretend" to be different roles
 
 import os
 import sys
-from datetime import datetime
+from datetime import date, datetime, time, timedelta
 
 # Make sure the project root is on sys.path (so we can import the app package properly)
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from app.member_service import (
-    register_member,
-    update_member_profile,
-    get_member_dashboard,
-    schedule_pt_session,
-)
+# Only the standard library is imported here. Each menu imports its services (and with
+# them SQLAlchemy, the models and the engine) the first time it is opened, so the main
+# menu comes up at once on a freshly started terminal. The startup budget is checked by
+# benchmarks/startup_check.py.
 
-from app.trainer_service import (
-    set_trainer_availability,
-    get_trainer_schedule,
-)
-
-from app.admin_service import (
-    create_room,
-    create_class_session,
-)
+# where the "Query stats" option writes the Prometheus text dump
+METRICS_FILE = os.environ.get("HEALTH_CLUB_METRICS_FILE", "health_club_metrics.prom")
 
 
 # helper function that converts user input into a datetime object
@@ -49,16 +40,71 @@ def parse_datetime(prompt: str) -> datetime | None:
         return None
 
 
+# same idea for plain dates ("YYYY-MM-DD") and times of day ("HH:MM")
+# returns None for invalid input (and for empty input when the value is optional)
+def parse_date(prompt: str, optional: bool = False) -> date | None:
+    raw_input = input(f"{prompt} (YYYY-MM-DD{', blank for none' if optional else ''}): ").strip()
+    if raw_input == "" and optional:
+        return None
+
+    try:
+        return datetime.strptime(raw_input, "%Y-%m-%d").date()
+    except ValueError:
+        print("Invalid date format. Please use 'YYYY-MM-DD'.")
+        return None
+
+
+def parse_time(prompt: str) -> time | None:
+    raw_input = input(f"{prompt} (HH:MM): ").strip()
+
+    try:
+        return datetime.strptime(raw_input, "%H:%M").time()
+    except ValueError:
+        print("Invalid time format. Please use 'HH:MM'.")
+        return None
+
+
+# weekday from a number (0 = Monday) or a name ("Tuesday", "tue"); None if invalid
+def parse_weekday(prompt: str) -> int | None:
+    from app.trainer_service import WEEKDAY_NAMES
+
+    raw_input = input(f"{prompt} (0=Monday ... 6=Sunday, or a name): ").strip().lower()
+
+    if raw_input.isdigit() and int(raw_input) in range(7):
+        return int(raw_input)
+    for weekday, name in enumerate(WEEKDAY_NAMES):
+        if len(raw_input) >= 3 and name.lower().startswith(raw_input):
+            return weekday
+
+    print("Invalid weekday.")
+    return None
+
+
 # This function represents the "Member" menu.
 # It is called from the main loop and it keeps looping until the user decides
 # to go back to the main menu.
 def member_menu():
+    from app.member_service import (
+        register_member,
+        update_member_profile,
+        get_member_dashboard,
+        schedule_pt_session,
+        enroll_in_class,
+        unenroll_from_class,
+        list_upcoming_classes,
+    )
+    from app.trainer_service import find_open_slots
+
     while True:
         print("\n=== MEMBER MENU ===")
         print("1) Register new member")
         print("2) Update member profile")
         print("3) View member dashboard")
         print("4) Schedule PT session")
+        print("5) Find open PT slots for a trainer")
+        print("6) Join a CLASS session")
+        print("7) Leave a CLASS session")
+        print("9) Query stats")
         print("0) Back to main menu")
 
         choice = input("Choose an option: ").strip()
@@ -267,6 +313,134 @@ def member_menu():
                     f"from {session.start_date_time} to {session.end_date_time}"
                 )
 
+        # OPTION 5: Show when a trainer can still be booked
+        elif choice == "5":
+            print("\n--- Find Open PT Slots ---")
+            trainer_id_input = input("Trainer ID: ").strip()
+            room_id_input = input("Room ID (optional): ").strip()
+            duration_input = input("Session length in minutes (e.g., 60): ").strip()
+
+            # converting ids / duration to integers (room is optional)
+            try:
+                trainer_id = int(trainer_id_input)
+                room_id = int(room_id_input) if room_id_input != "" else None
+                duration_minutes = int(duration_input)
+            except ValueError:
+                print("Trainer ID, room ID, and session length must all be integers.")
+                continue
+
+            from_dt = parse_datetime("Search from")
+            if from_dt is None:
+                continue
+
+            to_dt = parse_datetime("Search until")
+            if to_dt is None:
+                continue
+
+            slots, error = find_open_slots(
+                trainer_id=trainer_id,
+                from_dt=from_dt,
+                to_dt=to_dt,
+                duration=timedelta(minutes=duration_minutes),
+                room_id=room_id,
+            )
+
+            if error is not None:
+                print("Error:", error)
+            elif len(slots) == 0:
+                print("No open slots for this trainer in that range.")
+            else:
+                print(f"\nOpen {duration_minutes}-minute slots for trainer {trainer_id}:\n")
+
+                print("+------------------+------------------+")
+                print("| Free from        | Free until       |")
+                print("+------------------+------------------+")
+
+                for slot_start, slot_end in slots:
+                    start_str = slot_start.strftime("%Y-%m-%d %H:%M")
+                    end_str = slot_end.strftime("%Y-%m-%d %H:%M")
+                    print(f"| {start_str.ljust(16)} | {end_str.ljust(16)} |")
+
+                print("+------------------+------------------+")
+                print("Book any start time inside a window that still leaves room for the full session.\n")
+
+        # OPTION 6: Show the next classes and join one
+        elif choice == "6":
+            print("\n--- Join a CLASS Session ---")
+            classes = list_upcoming_classes()
+
+            # CASE: nothing scheduled
+            if len(classes) == 0:
+                print("No upcoming CLASS sessions.")
+                continue
+
+            print("+----------+------------------+------------------+----------------------+----------------------+--------------+")
+            print("| Session  | Start            | End              | Room                 | Trainer              | Places left  |")
+            print("+----------+------------------+------------------+----------------------+----------------------+--------------+")
+
+            for row in classes:
+                start_str = row["start"].strftime("%Y-%m-%d %H:%M")
+                end_str = row["end"].strftime("%Y-%m-%d %H:%M")
+                places = f"{row['places_left']} / {row['max_capacity']}"
+
+                print(
+                    "| "
+                    f"{str(row['session_id']).ljust(8)} | "
+                    f"{start_str.ljust(16)} | "
+                    f"{end_str.ljust(16)} | "
+                    f"{row['room_name'][:20].ljust(20)} | "
+                    f"{row['trainer_name'][:20].ljust(20)} | "
+                    f"{places.ljust(12)} |"
+                )
+
+            print("+----------+------------------+------------------+----------------------+----------------------+--------------+")
+
+            member_id_input = input("Member ID: ").strip()
+            session_id_input = input("Session ID to join: ").strip()
+
+            try:
+                member_id = int(member_id_input)
+                session_id = int(session_id_input)
+            except ValueError:
+                print("Member ID and session ID must both be integers.")
+                continue
+
+            enrollment, error = enroll_in_class(member_id, session_id)
+
+            if error is not None:
+                print("Error:", error)
+            else:
+                print(
+                    f"Member {member_id} joined class {session_id} "
+                    f"({enrollment['enrolled_count']} of {enrollment['max_capacity']} places taken)."
+                )
+
+        # OPTION 7: Give up a place in a class
+        elif choice == "7":
+            member_id_input = input("Member ID: ").strip()
+            session_id_input = input("Session ID to leave: ").strip()
+
+            try:
+                member_id = int(member_id_input)
+                session_id = int(session_id_input)
+            except ValueError:
+                print("Member ID and session ID must both be integers.")
+                continue
+
+            enrollment, error = unenroll_from_class(member_id, session_id)
+
+            if error is not None:
+                print("Error:", error)
+            else:
+                print(
+                    f"Member {member_id} left class {session_id} "
+                    f"({enrollment['enrolled_count']} of {enrollment['max_capacity']} places taken)."
+                )
+
+        # OPTION 9: per-service query stats
+        elif choice == "9":
+            show_query_stats()
+
         # OPTION 0: go back to the main menu
         elif choice == "0":
             break
@@ -280,6 +454,16 @@ def member_menu():
 # It is called from the main loop and it keeps looping until the trainer decides
 # to go back to the main menu.
 def trainer_menu():
+    from app.trainer_service import (
+        set_trainer_availability,
+        set_recurring_availability,
+        skip_recurring_availability,
+        get_recurring_availability,
+        describe_availability_rule,
+        get_trainer_schedule,
+    )
+    from app.schedule_export import export_sessions
+
     print("\n=== TRAINER MENU ===")
     trainer_id_input = input("Enter your trainer ID (e.g., 100): ").strip()
 
@@ -294,6 +478,10 @@ def trainer_menu():
         print("\n=== TRAINER MENU ===")
         print("1) Set availability")
         print("2) View my upcoming sessions")
+        print("3) Export my schedule (CSV or iCalendar)")
+        print("4) Set weekly recurring availability")
+        print("5) Skip one day of a weekly availability")
+        print("9) Query stats")
         print("0) Back to main menu")
 
         choice = input("Choose an option: ").strip()
@@ -355,6 +543,98 @@ def trainer_menu():
 
                 print("+----------+----------+------------------+------------------+----------------------+----------------------+\n")
 
+        # OPTION 3: export upcoming sessions to a file for a spreadsheet or calendar app
+        elif choice == "3":
+            print("\n--- Export My Schedule ---")
+            out_path = input("Output file (.csv or .ics): ").strip()
+            export_format = "ics" if out_path.endswith(".ics") else "csv"
+
+            try:
+                with open(out_path, "w", newline="", encoding="utf-8") as out_file:
+                    count, error = export_sessions(
+                        out_file,
+                        export_format,
+                        trainer_id=trainer_id,
+                        from_dt=datetime.now(),
+                    )
+            except OSError as e:
+                print("Error: could not write the file:", e)
+                continue
+
+            if error is not None:
+                print("Error:", error)
+            else:
+                print(f"Exported {count} session(s) to {out_path}.")
+
+        # OPTION 4: weekly availability rule (e.g. every Monday 09:00-17:00)
+        elif choice == "4":
+            print("\n--- Set Weekly Availability ---")
+            weekday = parse_weekday("Weekday")
+            if weekday is None:
+                continue
+
+            start_time = parse_time("Start time")
+            if start_time is None:
+                continue
+
+            end_time = parse_time("End time")
+            if end_time is None:
+                continue
+
+            effective_from = parse_date("First day")
+            if effective_from is None:
+                continue
+
+            effective_until = parse_date("Last day", optional=True)
+
+            rule, error = set_recurring_availability(
+                trainer_id=trainer_id,
+                weekday=weekday,
+                start_time=start_time,
+                end_time=end_time,
+                effective_from=effective_from,
+                effective_until=effective_until,
+            )
+
+            if error is not None:
+                print("Error:", error)
+            else:
+                print(f"Weekly availability created with id = {rule.rule_id}: "
+                      f"{describe_availability_rule(rule)}")
+
+        # OPTION 5: take one day out of a weekly rule (holiday, day off, ...)
+        elif choice == "5":
+            print("\n--- Skip One Day ---")
+            rules = get_recurring_availability(trainer_id)
+
+            if len(rules) == 0:
+                print("You have no weekly availability set up.")
+                continue
+
+            for rule in rules:
+                print(f"  {rule.rule_id}: {describe_availability_rule(rule)}")
+
+            rule_id_input = input("Rule ID: ").strip()
+            try:
+                rule_id = int(rule_id_input)
+            except ValueError:
+                print("Invalid rule id. Please enter a numeric value.")
+                continue
+
+            skip_date = parse_date("Day to skip")
+            if skip_date is None:
+                continue
+
+            _, error = skip_recurring_availability(trainer_id, rule_id, skip_date)
+
+            if error is not None:
+                print("Error:", error)
+            else:
+                print(f"Weekly availability {rule_id} skipped on {skip_date}.")
+
+        # OPTION 9: per-service query stats
+        elif choice == "9":
+            show_query_stats()
 
         # OPTION 0: back to main menu
         elif choice == "0":
@@ -364,10 +644,73 @@ def trainer_menu():
             print("Invalid choice. Please try again.")
 
 
+# This function prints what every service function has sent to the database so far
+# (statements, rows and time, collected by the query hooks in database.py) and writes
+# the same numbers to METRICS_FILE in Prometheus text format.
+def show_query_stats():
+    from database import get_query_metrics, write_prometheus_metrics
+    from app.read_cache import get_read_cache
+    from app.change_feed import get_change_listener
+
+    metrics = get_query_metrics()
+
+    print("\n--- Query Stats (since the program started) ---")
+    if not metrics:
+        print("No queries have been run yet.")
+        return
+
+    print("+----------------------------------------+--------+------------+----------+--------------+--------------+")
+    print("| Operation                              | Calls  | Statements | Rows     | Avg call ms  | Avg stmt ms  |")
+    print("+----------------------------------------+--------+------------+----------+--------------+--------------+")
+    for operation, totals in sorted(metrics.items()):
+        avg_call_ms = totals["call_seconds"] * 1000 / totals["calls"] if totals["calls"] else 0.0
+        avg_statement_ms = (
+            totals["statement_seconds"] * 1000 / totals["statements"] if totals["statements"] else 0.0
+        )
+        print(
+            f"| {operation:<38} | {totals['calls']:>6} | {totals['statements']:>10} | "
+            f"{totals['rows']:>8} | {avg_call_ms:>12.2f} | {avg_statement_ms:>12.2f} |"
+        )
+    print("+----------------------------------------+--------+------------+----------+--------------+--------------+")
+
+    # read cache (only when HEALTH_CLUB_READ_CACHE is on)
+    read_cache = get_read_cache()
+    if read_cache is not None:
+        stats = read_cache.stats()
+        print(
+            f"Read cache: {stats['entries']}/{stats['max_entries']} entries, TTL {stats['ttl_seconds']:g}s, "
+            f"hit rate {stats['hit_rate']:.0%}, {stats['expired']} expired, "
+            f"{stats['evicted']} evicted, {stats['invalidated']} invalidated"
+        )
+        for operation, totals in sorted(metrics.items()):
+            lookups = totals["cache_hits"] + totals["cache_misses"]
+            if lookups:
+                print(f"  {operation}: {totals['cache_hits']} hits / {lookups} lookups")
+
+    # change feed listener (only when a cache has started one)
+    listener = get_change_listener()
+    if listener is not None:
+        stats = listener.stats()
+        print(
+            f"Change feed: {'connected' if stats['connected'] else 'NOT connected'}, "
+            f"{stats['received']} received, {stats['replayed']} replayed, "
+            f"{stats['resets']} resets, {stats['reconnects']} reconnects"
+        )
+
+    try:
+        write_prometheus_metrics(METRICS_FILE)
+        print(f"Prometheus metrics written to {METRICS_FILE}")
+    except OSError as e:
+        print(f"Could not write {METRICS_FILE}: {e}")
+
+
 # This function represents the "Admin_staff" menu.
 # It is called from the main loop and it keeps looping until the admin decides
 # to go back to the main menu.
 def admin_menu():
+    from app.admin_service import create_room, create_class_session, create_class_series
+    from app.member_import import import_members_csv
+
     print("\n=== ADMIN MENU ===")
     admin_id_input = input("Enter your admin ID (e.g., 1): ").strip()
 
@@ -382,6 +725,9 @@ def admin_menu():
         print("\n=== ADMIN MENU ===")
         print("1) Create a new room")
         print("2) Create a new CLASS session")
+        print("3) Import members from a CSV file")
+        print("4) Create a weekly CLASS series")
+        print("9) Query stats")
         print("0) Back to main menu")
 
         choice = input("Choose an option: ").strip()
@@ -461,6 +807,87 @@ def admin_menu():
                     f"in room {session.room.room_name} (capacity {session.max_capacity})"
                 )
 
+        # OPTION 3: bulk import members (e.g. a partner gym's roster)
+        elif choice == "3":
+            print("\n--- Import Members from CSV ---")
+            csv_path = input("Path to CSV file: ").strip()
+
+            try:
+                with open(csv_path, newline="", encoding="utf-8") as csv_file:
+                    imported, rejections, error = import_members_csv(csv_file)
+            except OSError as e:
+                print("Error: could not open the file:", e)
+                continue
+
+            if error is not None:
+                print("Error:", error)
+            else:
+                print(f"Imported {imported} member(s), rejected {len(rejections)}.")
+                for line_number, email, reason in rejections:
+                    print(f"  line {line_number}: {email or '(no email)'} -- {reason}")
+
+        # OPTION 4: the same class every week (e.g. a 12-week "Tuesday Spin")
+        elif choice == "4":
+            print("\n--- Create Weekly CLASS Series ---")
+            trainer_id_input = input("Trainer ID: ").strip()
+            room_id_input = input("Room ID: ").strip()
+            max_cap_input = input("Class max capacity: ").strip()
+            weeks_input = input("Number of weeks: ").strip()
+
+            try:
+                trainer_id = int(trainer_id_input)
+                room_id = int(room_id_input)
+                max_capacity = int(max_cap_input)
+                weeks = int(weeks_input)
+            except ValueError:
+                print("Trainer ID, Room ID, capacity and number of weeks must all be integers.")
+                continue
+
+            # the first class; the others are at the same time every following week
+            start_dt = parse_datetime("First class start")
+            if start_dt is None:
+                continue
+
+            end_dt = parse_datetime("First class end")
+            if end_dt is None:
+                continue
+
+            sessions, conflicts, error = create_class_series(
+                admin_id, trainer_id, room_id, start_dt, end_dt, max_capacity, weeks,
+            )
+
+            # CASE: some weeks clash -> show them and offer to book the free ones
+            if error is not None and conflicts:
+                print("Error:", error)
+                for conflict_start, reason in conflicts:
+                    print(f"  {conflict_start:%Y-%m-%d %H:%M}: {reason}")
+
+                if len(conflicts) == weeks:
+                    continue
+                answer = input(f"Create the other {weeks - len(conflicts)} class(es) anyway? (y/n): ")
+                if answer.strip().lower() != "y":
+                    continue
+
+                sessions, conflicts, error = create_class_series(
+                    admin_id, trainer_id, room_id, start_dt, end_dt, max_capacity, weeks,
+                    skip_conflicts=True,
+                )
+
+            if error is not None:
+                print("Error:", error)
+                continue
+
+            print(f"Created {len(sessions)} CLASS session(s):")
+            for session in sessions:
+                print(f"  id {session.session_id}: {session.start_date_time:%Y-%m-%d %H:%M} - "
+                      f"{session.end_date_time:%H:%M} in room {session.room.room_name}")
+            for conflict_start, reason in conflicts:
+                print(f"  skipped {conflict_start:%Y-%m-%d %H:%M}: {reason}")
+
+        # OPTION 9: per-service query stats
+        elif choice == "9":
+            show_query_stats()
+
         # OPTION 0: back to main menu
         elif choice == "0":
             break
@@ -477,6 +904,7 @@ def main():
         print("1) Member role")
         print("2) Trainer role")
         print("3) Admin role")
+        print("4) Query stats")
         print("0) Exit")
 
         menu_choice = input("Choose an option: ").strip()
@@ -487,6 +915,8 @@ def main():
             trainer_menu()
         elif menu_choice == "3":
             admin_menu()
+        elif menu_choice == "4":
+            show_query_stats()
         elif menu_choice == "0":
             print("Exiting program. Goodbye.")
             break
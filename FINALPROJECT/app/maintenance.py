@@ -0,0 +1,188 @@
+# app/maintenance.py
+#
+# Background / housekeeping jobs that are not part of any role's menu.
+#
+# Usage (from FINALPROJECT/):
+#   python -m app.maintenance prune-dashboard              (run once)
+#   python -m app.maintenance prune-dashboard --every 300  (keep running, every 5 minutes)
+#   python -m app.maintenance create-partitions --months-ahead 3
+#   python -m app.maintenance archive-partitions --keep-months 12
+#   python -m app.maintenance archive-partitions --before 2025-01
+#   python -m app.maintenance partition-tables             (one-off, for older databases)
+#   python -m app.maintenance prune-change-feed --every 600
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+# Ensure the project root (FINALPROJECT) is on sys.path so we can import `database`.
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+from database import get_session
+from app.change_feed import CHANGE_FEED_RETENTION_MINUTES, prune_change_feed
+from app.intervals import add_months
+from app.partitioning import (
+    PARTITION_MONTHS_AHEAD,
+    archive_partitions,
+    create_partitions,
+    month_start,
+    partition_tables,
+)
+
+
+def prune_member_dashboard() -> int:
+    """
+    Delete member_dashboard rows for sessions that have already started.
+
+    get_member_dashboard() ignores those rows anyway; pruning just keeps the table
+    (and its index) down to upcoming sessions only. Returns the number of rows removed.
+    """
+    with get_session("batch") as db:
+        result = db.execute(text(
+            "DELETE FROM member_dashboard WHERE start_date_time < NOW();"
+        ))
+        return result.rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Health club maintenance jobs.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    prune_parser = subcommands.add_parser(
+        "prune-dashboard",
+        help="remove past sessions from the member_dashboard table",
+    )
+    prune_parser.add_argument(
+        "--every",
+        type=int,
+        default=None,
+        help="keep running and prune every N seconds",
+    )
+
+    create_parser = subcommands.add_parser(
+        "create-partitions",
+        help="create the monthly session / trainer_availability partitions ahead of time",
+    )
+    create_parser.add_argument(
+        "--months-ahead",
+        type=int,
+        default=PARTITION_MONTHS_AHEAD,
+        help=f"months after the current one to create (default {PARTITION_MONTHS_AHEAD})",
+    )
+    create_parser.add_argument(
+        "--every",
+        type=int,
+        default=None,
+        help="keep running and check every N seconds",
+    )
+
+    archive_parser = subcommands.add_parser(
+        "archive-partitions",
+        help="detach old monthly partitions into the archive schema",
+    )
+    cutoff = archive_parser.add_mutually_exclusive_group()
+    cutoff.add_argument(
+        "--keep-months",
+        type=int,
+        default=12,
+        help="archive months older than the last N full months (default 12, at least 1)",
+    )
+    cutoff.add_argument(
+        "--before",
+        default=None,
+        help="archive months before this one (YYYY-MM)",
+    )
+
+    convert_parser = subcommands.add_parser(
+        "partition-tables",
+        help="convert unpartitioned session / trainer_availability tables (locks them while it runs)",
+    )
+    convert_parser.add_argument(
+        "--months-ahead",
+        type=int,
+        default=PARTITION_MONTHS_AHEAD,
+        help=f"months after the current one to create (default {PARTITION_MONTHS_AHEAD})",
+    )
+
+    feed_parser = subcommands.add_parser(
+        "prune-change-feed",
+        help="remove old rows from the change_feed table",
+    )
+    feed_parser.add_argument(
+        "--keep-minutes",
+        type=int,
+        default=CHANGE_FEED_RETENTION_MINUTES,
+        help=f"keep the last N minutes (default {CHANGE_FEED_RETENTION_MINUTES}; listeners "
+             "that were away longer than that reset their caches, so keep it at least as "
+             "long as HEALTH_CLUB_CHANGE_FEED_RETENTION)",
+    )
+    feed_parser.add_argument(
+        "--every",
+        type=int,
+        default=None,
+        help="keep running and prune every N seconds",
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "prune-dashboard":
+        while True:
+            removed = prune_member_dashboard()
+            print(f"Pruned {removed} past session(s) from member_dashboard.")
+
+            if args.every is None:
+                break
+            time.sleep(args.every)
+
+    elif args.command == "create-partitions":
+        while True:
+            created = create_partitions(args.months_ahead)
+            for table_name, names in created.items():
+                print(f"{table_name}: created {len(names)} partition(s) {', '.join(names)}".rstrip())
+
+            if args.every is None:
+                break
+            time.sleep(args.every)
+
+    elif args.command == "archive-partitions":
+        # CASE: explicit cutoff month
+        if args.before is not None:
+            try:
+                before_month = month_start(datetime.strptime(args.before, "%Y-%m"))
+            except ValueError:
+                parser.error("--before must look like YYYY-MM")
+        else:
+            # CASE: last month's rows can still run into this one (see archive_partitions())
+            if args.keep_months < 1:
+                parser.error("--keep-months must be at least 1")
+            before_month = add_months(month_start(datetime.now()), -args.keep_months)
+
+        try:
+            archived = archive_partitions(before_month)
+        except ValueError as e:
+            parser.error(str(e))
+        for table_name, names in archived.items():
+            print(f"{table_name}: archived {len(names)} partition(s) {', '.join(names)}".rstrip())
+
+    elif args.command == "partition-tables":
+        converted = partition_tables(args.months_ahead)
+        if converted:
+            print(f"Converted to monthly partitions: {', '.join(converted)}.")
+        else:
+            print("Nothing to convert (already partitioned).")
+
+    elif args.command == "prune-change-feed":
+        while True:
+            removed = prune_change_feed(args.keep_minutes)
+            print(f"Pruned {removed} change(s) from change_feed.")
+
+            if args.every is None:
+                break
+            time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+# app/member_import.py
+#
+# Bulk member import (e.g. onboarding a partner gym's roster).
+#
+# The CSV is streamed through COPY into a temporary staging table, checked with a few
+# set-based UPDATEs, and merged into member with one INSERT ... ON CONFLICT DO NOTHING.
+# Bad rows are not fatal: each one gets a rejection reason and the rest of the batch
+# is imported. The checks mirror validate_registration() in member_service.py.
+#
+# The first line of the CSV must be a header naming the columns (any order, any subset
+# that includes the required ones):
+#   first_name, last_name, gender, email                      (required)
+#   phone_number, dob_year, dob_month, dob_day, goal_weight, current_weight
+#
+# Usage (from FINALPROJECT/):
+#   python -m app.member_import roster.csv
+
+import argparse
+import csv
+import os
+import sys
+
+# Ensure the project root (FINALPROJECT) is on sys.path so we can import `database`.
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from database import get_engine, instrumented
+from app.member_service import ALLOWED_GENDERS
+
+
+REQUIRED_COLUMNS = ["first_name", "last_name", "gender", "email"]
+OPTIONAL_COLUMNS = ["phone_number", "dob_year", "dob_month", "dob_day", "goal_weight", "current_weight"]
+
+# everything is text in the staging table, so a bad value becomes a rejection instead of
+# a COPY error; line_no follows the order rows arrive in
+_CREATE_STAGING_SQL = text(f"""
+    CREATE TEMP TABLE member_import_staging (
+        line_no        bigint GENERATED ALWAYS AS IDENTITY,
+        {", ".join(f"{column} text" for column in REQUIRED_COLUMNS + OPTIONAL_COLUMNS)},
+        reject_reason  text
+    ) ON COMMIT DROP;
+""")
+
+_NUMBER = r"'^\s*[0-9]{1,9}(\.[0-9]+)?\s*$'"
+_INTEGER = r"'^\s*[0-9]{1,9}\s*$'"
+
+# row-level checks, first failing reason wins (same order as validate_registration())
+_VALIDATE_ROWS_SQL = text(f"""
+    UPDATE member_import_staging
+    SET reject_reason = CASE
+        WHEN COALESCE(btrim(first_name), '') = '' OR COALESCE(btrim(last_name), '') = ''
+             OR COALESCE(btrim(email), '') = ''
+            THEN 'missing first name, last name or email'
+        WHEN length(btrim(first_name)) > 50 OR length(btrim(last_name)) > 50
+             OR length(btrim(email)) > 255 OR length(btrim(phone_number)) > 20
+            THEN 'value too long'
+        WHEN gender IS NULL OR btrim(gender) <> ALL(:genders)
+            THEN 'invalid gender ' || COALESCE(quote_literal(gender), 'NULL')
+        WHEN num_nonnulls(NULLIF(btrim(dob_year), ''), NULLIF(btrim(dob_month), ''),
+                          NULLIF(btrim(dob_day), '')) NOT IN (0, 3)
+            THEN 'incomplete date of birth'
+        WHEN NULLIF(btrim(dob_year), '') !~ {_INTEGER}
+             OR NULLIF(btrim(dob_month), '') !~ {_INTEGER}
+             OR NULLIF(btrim(dob_day), '') !~ {_INTEGER}
+            THEN 'date of birth must be whole numbers'
+        WHEN NULLIF(btrim(dob_year), '')::int <= 0
+             OR NULLIF(btrim(dob_month), '')::int NOT BETWEEN 1 AND 12
+             OR NULLIF(btrim(dob_day), '')::int NOT BETWEEN 1 AND 31
+            THEN 'date of birth out of range'
+        WHEN NULLIF(btrim(goal_weight), '') !~ {_NUMBER}
+             OR NULLIF(btrim(current_weight), '') !~ {_NUMBER}
+            THEN 'weights must be positive numbers'
+        WHEN NULLIF(btrim(goal_weight), '')::numeric <= 0
+             OR NULLIF(btrim(current_weight), '')::numeric <= 0
+            THEN 'weights must be positive numbers'
+        WHEN NULLIF(btrim(goal_weight), '')::numeric >= 1000
+             OR NULLIF(btrim(current_weight), '')::numeric >= 1000
+            THEN 'weights must be below 1000'
+    END
+    WHERE reject_reason IS NULL;
+""")
+
+# duplicates inside the file (the first occurrence wins) and against existing members
+# (line numbers in messages count the header as line 1, like the returned rejections)
+_DUPLICATES_SQL = text("""
+    UPDATE member_import_staging s
+    SET reject_reason = 'duplicate email in file (first seen on line ' || d.first_line + 1 || ')'
+    FROM (
+        SELECT line_no, min(line_no) OVER (PARTITION BY btrim(email)) AS first_line
+        FROM member_import_staging
+        WHERE reject_reason IS NULL
+    ) d
+    WHERE s.line_no = d.line_no AND d.line_no <> d.first_line;
+
+    UPDATE member_import_staging s
+    SET reject_reason = 'duplicate phone in file (first seen on line ' || d.first_line + 1 || ')'
+    FROM (
+        SELECT line_no, min(line_no) OVER (PARTITION BY btrim(phone_number)) AS first_line
+        FROM member_import_staging
+        WHERE reject_reason IS NULL AND NULLIF(btrim(phone_number), '') IS NOT NULL
+    ) d
+    WHERE s.line_no = d.line_no AND d.line_no <> d.first_line;
+
+    UPDATE member_import_staging s
+    SET reject_reason = 'duplicate email (member ' || m.member_id || ')'
+    FROM member m
+    WHERE s.reject_reason IS NULL AND m.email = btrim(s.email);
+
+    UPDATE member_import_staging s
+    SET reject_reason = 'duplicate phone (member ' || m.member_id || ')'
+    FROM member m
+    WHERE s.reject_reason IS NULL AND m.phone_number = btrim(s.phone_number);
+""")
+
+# the unique constraints still have the last word (a concurrent registration can take an
+# email between the checks above and this INSERT); those rows are rejected, not fatal
+_MERGE_SQL = text("""
+    WITH inserted AS (
+        INSERT INTO member (first_name, last_name, gender, email, phone_number,
+                            year, month, day, goal_weight, current_weight)
+        SELECT btrim(first_name), btrim(last_name), btrim(gender), btrim(email),
+               NULLIF(btrim(phone_number), ''),
+               NULLIF(btrim(dob_year), '')::int, NULLIF(btrim(dob_month), '')::int,
+               NULLIF(btrim(dob_day), '')::int,
+               NULLIF(btrim(goal_weight), '')::numeric, NULLIF(btrim(current_weight), '')::numeric
+        FROM member_import_staging
+        WHERE reject_reason IS NULL
+        ORDER BY line_no
+        ON CONFLICT DO NOTHING
+        RETURNING email
+    )
+    UPDATE member_import_staging s
+    SET reject_reason = 'email or phone registered by someone else during the import'
+    WHERE s.reject_reason IS NULL
+      AND NOT EXISTS (SELECT 1 FROM inserted i WHERE i.email = btrim(s.email));
+""")
+
+
+def read_header(csv_file) -> list[str]:
+    """Read and check the header line; returns the staging columns in file order."""
+    header = next(csv.reader([csv_file.readline()]), [])
+    columns = [name.strip().lower() for name in header]
+
+    unknown = [name for name in columns if name not in REQUIRED_COLUMNS + OPTIONAL_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown column(s) in CSV header: {', '.join(unknown)}")
+
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise ValueError(f"CSV header is missing required column(s): {', '.join(missing)}")
+
+    return columns
+
+
+@instrumented("member_import.import_members_csv")
+def import_members_csv(csv_file):
+    """
+    Import every valid member in an open CSV file (text mode, header first).
+
+    Returns:
+        (imported_count, rejections, error_message)
+        - imported_count: number of new members
+        - rejections: list of (line_number, email, reason) for rows that were skipped;
+          line_number counts the header as line 1, like a spreadsheet
+        - error_message: set (and nothing imported) only if the file itself is unusable
+          or the database refused the batch
+    """
+    try:
+        columns = read_header(csv_file)
+    except ValueError as e:
+        return 0, [], str(e)
+
+    # the "batch" profile has no statement timeout, which a big roster may need
+    try:
+        with get_engine("batch").begin() as conn:
+            conn.execute(_CREATE_STAGING_SQL)
+
+            # stream the rest of the file straight into COPY
+            cursor = conn.connection.cursor()
+            try:
+                cursor.copy_expert(
+                    f"COPY member_import_staging ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                    csv_file,
+                )
+            except Exception as e:
+                # CASE: malformed CSV (wrong number of columns, bad quoting, ...)
+                raise ValueError(f"Could not read the CSV: {str(e).strip()}") from e
+
+            conn.execute(_VALIDATE_ROWS_SQL, {"genders": ALLOWED_GENDERS})
+            conn.execute(_DUPLICATES_SQL)
+            conn.execute(_MERGE_SQL)
+
+            rejections = [
+                (row.line_no + 1, row.email, row.reject_reason)
+                for row in conn.execute(text("""
+                    SELECT line_no, email, reject_reason
+                    FROM member_import_staging
+                    WHERE reject_reason IS NOT NULL
+                    ORDER BY line_no
+                """))
+            ]
+            total = conn.execute(text("SELECT COUNT(*) FROM member_import_staging")).scalar()
+    except ValueError as e:
+        # the whole transaction (staging table included) was rolled back
+        return 0, [], str(e)
+    except DBAPIError as e:
+        # CASE: a value the checks above let through, a lock timeout, ... (also rolled back)
+        return 0, [], f"Could not import members: {str(e.orig).splitlines()[0]}"
+
+    return total - len(rejections), rejections, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import members from a CSV file.")
+    parser.add_argument("csv_path", help="CSV file with a header line")
+    args = parser.parse_args()
+
+    with open(args.csv_path, newline="", encoding="utf-8") as csv_file:
+        imported, rejections, error = import_members_csv(csv_file)
+
+    if error is not None:
+        print("Error:", error)
+        sys.exit(1)
+
+    print(f"Imported {imported} member(s), rejected {len(rejections)}.")
+    for line_number, email, reason in rejections:
+        print(f"  line {line_number}: {email or '(no email)'} -- {reason}")
+
+
+if __name__ == "__main__":
+    main()
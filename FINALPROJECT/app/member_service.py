@@ -17,36 +17,53 @@ from datetime import datetime
 # Make sure the project root is on sys.path so that we can import `database` and `models`
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from sqlalchemy import text
-from database import get_session
+from sqlalchemy import select, text, exists, literal
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from database import get_session, get_read_session, instrumented, run_transaction
 from models.member import Member
 from models.session import Session as SessionModel
 from models.trainer import Trainer
 from models.room import Room
 from models.admin_staff import Admin_staff
-from models.trainer_availability import TrainerAvailability  # for PT availability check
-
-
-# This function is responsible for registering a brand new member.
-# It takes basic information such as first name, last name, gender, email, phone number,
-# plus some optional fitness details (date of birth and weights).
-# If the email is already in use OR the gender is invalid, we return an error message instead.
-def register_member(first_name: str,
-                    last_name: str,
-                    gender: str,
-                    email: str,
-                    phone_number: str | None = None,
-                    dob_year: int | None = None,
-                    dob_month: int | None = None,
-                    dob_day: int | None = None,
-                    goal_weight: float | None = None,
-                    current_weight: float | None = None):
+from models.trainer_availability import TrainerAvailability
+from app.booking import SESSION_BY_KEY, book_session, precheck_booking, record_booking
+from app.intervals import add_months
+from app.read_cache import (
+    get_read_cache,
+    invalidate_read_cache,
+    dashboard_key,
+    member_tag,
+    not_started,
+    room_tag,
+    trainer_tag,
+)
+
+
+# Shared validation / query helpers.
+# The synchronous functions below and their async twins in async_services.py both use
+# these, so the two versions can never disagree about what is valid.
+
+# list of valid gender values (must match our CHECK constraint in the database)
+ALLOWED_GENDERS = ["Male", "Female", "Other", "Prefer not to say"]
+
+
+def validate_registration(first_name: str,
+                          last_name: str,
+                          gender: str,
+                          email: str,
+                          phone_number: str | None = None,
+                          dob_year: int | None = None,
+                          dob_month: int | None = None,
+                          dob_day: int | None = None,
+                          goal_weight: float | None = None,
+                          current_weight: float | None = None):
     """
-    Create a new member row if the email (and phone, if provided) are not already in use.
+    Clean up and validate the registration inputs (no database access).
 
     Returns:
-        (member_id, error_message)
-        - member_id: the newly created member_id (or None if there was an error)
+        (member_fields, error_message)
+        - member_fields: keyword arguments for Member(...) (or None if there was an error)
         - error_message: a string describing what went wrong (or None on success)
     """
 
@@ -62,12 +79,9 @@ def register_member(first_name: str,
         if phone_number == "":
             phone_number = None
 
-    # list of valid gender values (must match our CHECK constraint in the database)
-    allowed_genders = ["Male", "Female", "Other", "Prefer not to say"]
-
     # CASE: user passes an invalid gender
-    if gender not in allowed_genders:
-        return None, f"Gender must be one of {allowed_genders}"
+    if gender not in ALLOWED_GENDERS:
+        return None, f"Gender must be one of {ALLOWED_GENDERS}"
 
     # optional: basic DOB validation (only if the user tried to provide some values)
     if dob_year is not None or dob_month is not None or dob_day is not None:
@@ -89,45 +103,381 @@ def register_member(first_name: str,
     if current_weight is not None and current_weight <= 0:
         return None, "Current weight must be a positive number."
 
-    # normal case: attempt to insert into the database
-    with get_session() as db:
-        # first check if someone with this email already exists
-        existing_member = db.query(Member).filter_by(email=email).first()
-        if existing_member is not None:
-            return None, "A member with that email already exists."
-
-        # optional: if a phone number was provided, make sure it is not already in use
-        if phone_number is not None:
-            existing_phone = (
-                db.query(Member)
-                .filter(Member.phone_number == phone_number)
-                .first()
-            )
-            if existing_phone is not None:
-                return None, "Another member already uses that phone number."
+    member_fields = {
+        "goal_weight": goal_weight,
+        "current_weight": current_weight,
+        "gender": gender,
+        "first_name": first_name,
+        "last_name": last_name,
+        "year": dob_year,
+        "month": dob_month,
+        "day": dob_day,
+        "phone_number": phone_number,
+        "email": email,
+    }
+    return member_fields, None
+
+
+def register_member_statement(member_fields: dict):
+    """
+    One statement that registers a member and explains a failure.
 
-        # creating the new member object
-        new_member = Member(
-            goal_weight=goal_weight,
-            current_weight=current_weight,
-            gender=gender,
-            first_name=first_name,
-            last_name=last_name,
-            year=dob_year,
-            month=dob_month,
-            day=dob_day,
-            phone_number=phone_number,
-            email=email,
-        )
+    INSERT ... ON CONFLICT DO NOTHING lets the unique constraints on email and phone
+    decide (so two registrations racing for the same email cannot both win). The
+    outer SELECT returns the new member_id, or NULL plus which of the two values was
+    already taken (both flags come from the snapshot before the insert).
+    """
+    inserted = (
+        insert(Member)
+        .values(**member_fields)
+        .on_conflict_do_nothing()
+        .returning(Member.member_id)
+        .cte("inserted")
+    )
+
+    if member_fields["phone_number"] is None:
+        phone_taken = literal(False)
+    else:
+        phone_taken = exists().where(Member.phone_number == member_fields["phone_number"])
+
+    return select(
+        select(inserted.c.member_id).scalar_subquery().label("member_id"),
+        exists().where(Member.email == member_fields["email"]).label("email_taken"),
+        phone_taken.label("phone_taken"),
+    )
+
+
+def registration_result(row):
+    """Turn a register_member_statement() row into (member_id, error_message)."""
+    if row.member_id is not None:
+        return row.member_id, None
+
+    # CASE: one of the unique constraints fired
+    if row.email_taken:
+        return None, "A member with that email already exists."
+    if row.phone_taken:
+        return None, "Another member already uses that phone number."
+
+    # CASE: someone else registered the same email / phone a moment ago
+    return None, "A member with that email or phone number already exists."
+
+
+def member_with_email_query(email: str, exclude_member_id: int | None = None):
+    """SELECT the id of a member using this email (optionally ignoring one member)."""
+    query = select(Member.member_id).where(Member.email == email)
+    if exclude_member_id is not None:
+        query = query.where(Member.member_id != exclude_member_id)
+    return query.limit(1)
+
+
+def member_with_phone_query(phone_number: str, exclude_member_id: int | None = None):
+    """SELECT the id of a member using this phone number (optionally ignoring one member)."""
+    query = select(Member.member_id).where(Member.phone_number == phone_number)
+    if exclude_member_id is not None:
+        query = query.where(Member.member_id != exclude_member_id)
+    return query.limit(1)
+
+
+def clean_optional_text(value: str | None) -> str | None:
+    """Strip a text input; blank (or missing) means "leave it unchanged" -> None."""
+    if value is None or value.strip() == "":
+        return None
+    return value.strip()
+
+
+# selecting only the columns we care about for display
+# (rows that already started are ignored even if the prune job has not removed them yet)
+DASHBOARD_QUERY = text(
+    """
+    SELECT
+        session_id,
+        session_type,
+        start_date_time,
+        end_date_time,
+        room_id,
+        room_name,
+        trainer_id,
+        trainer_first_name,
+        trainer_last_name
+    FROM member_dashboard
+    WHERE member_id = :mid
+      AND start_date_time >= NOW()
+
+    UNION ALL
+
+    -- CLASS sessions the member enrolled in (member_dashboard only holds sessions
+    -- that belong to a single member)
+    SELECT
+        s.session_id,
+        s.session_type,
+        s.start_date_time,
+        s.end_date_time,
+        s.room_id,
+        r.room_name,
+        s.trainer_id,
+        t.first_name,
+        t.last_name
+    FROM class_enrollment e
+    JOIN session s ON s.session_id = e.session_id
+    JOIN room r    ON r.room_id = s.room_id
+    JOIN trainer t ON t.trainer_id = s.trainer_id
+    WHERE e.member_id = :mid
+      AND s.start_date_time >= NOW()
+
+    ORDER BY start_date_time;
+    """
+)
+
+
+def dashboard_row_to_dict(row) -> dict:
+    """Turn one DASHBOARD_QUERY row into the dictionary the CLI prints."""
+    return {
+        "session_id": row.session_id,
+        "session_type": row.session_type,
+        "start": row.start_date_time,
+        "end": row.end_date_time,
+        "room_name": row.room_name,
+        "trainer_name": f"{row.trainer_first_name} {row.trainer_last_name}",
+    }
+
+
+def dashboard_cache_tags(member_id: int, rows) -> set:
+    """Read-cache tags of a dashboard: the member plus every trainer and room it shows."""
+    tags = {member_tag(member_id)}
+    for row in rows:
+        tags.add(trainer_tag(row.trainer_id))
+        tags.add(room_tag(row.room_id))
+    return tags
+
+
+# Class enrollment.
+# session.enrolled_count is the number of class_enrollment rows for that class. A place is
+# claimed by a conditional UPDATE of the counter ("only if enrolled_count < max_capacity")
+# in the same statement as the INSERT of the enrollment row, so:
+#   - concurrent sign-ups for one class queue on that session's row lock only for the
+#     length of one statement, and each re-checks the condition against the latest count
+#     once it gets the lock (Postgres re-evaluates the WHERE on the updated row);
+#   - nobody ever counts enrollment rows under a lock;
+#   - if the INSERT fails (the same member signing up twice at the same moment), the
+#     whole statement is rolled back, counter included.
+# The CHECK constraint ck_session_enrolled_within_capacity is the last line of defence.
+ENROLL_STATEMENT = text(
+    """
+    WITH claimed AS (
+        UPDATE session
+        SET enrolled_count = enrolled_count + 1
+        WHERE session_id = :sid
+          AND session_type = 'CLASS'
+          AND start_date_time > NOW()
+          AND enrolled_count < max_capacity
+          AND EXISTS (SELECT 1 FROM member WHERE member_id = :mid)
+          AND NOT EXISTS (
+              SELECT 1 FROM class_enrollment WHERE session_id = :sid AND member_id = :mid
+          )
+        RETURNING session_id, start_date_time, enrolled_count, max_capacity
+    ), enrolled AS (
+        INSERT INTO class_enrollment (session_id, session_start, member_id)
+        SELECT session_id, start_date_time, :mid FROM claimed
+        RETURNING session_id
+    )
+    SELECT c.session_id, c.enrolled_count, c.max_capacity
+    FROM claimed c
+    JOIN enrolled e ON e.session_id = c.session_id;
+    """
+)
+
+# leaving gives the place back in the same statement; a second, concurrent "leave" for
+# the same enrollment finds the row already deleted and changes nothing
+UNENROLL_STATEMENT = text(
+    """
+    WITH removed AS (
+        DELETE FROM class_enrollment e
+        USING session s
+        WHERE e.session_id = :sid
+          AND e.member_id = :mid
+          AND s.session_id = e.session_id
+          AND s.start_date_time > NOW()
+        RETURNING e.session_id
+    )
+    UPDATE session s
+    SET enrolled_count = s.enrolled_count - 1
+    FROM removed r
+    WHERE s.session_id = r.session_id
+      AND s.start_date_time > NOW()
+    RETURNING s.session_id, s.enrolled_count, s.max_capacity;
+    """
+)
+
+# only run after ENROLL_STATEMENT / UNENROLL_STATEMENT changed nothing, to say why
+CLASS_STATUS_QUERY = text(
+    """
+    SELECT
+        s.session_id,
+        s.session_type,
+        s.start_date_time,
+        s.enrolled_count,
+        s.max_capacity,
+        EXISTS (SELECT 1 FROM member WHERE member_id = :mid) AS member_exists,
+        EXISTS (
+            SELECT 1 FROM class_enrollment WHERE session_id = :sid AND member_id = :mid
+        ) AS is_enrolled
+    FROM (SELECT 1) AS one
+    LEFT JOIN session s ON s.session_id = :sid;
+    """
+)
+
+# upcoming classes in start order (partial index idx_session_class_start); the counter
+# means "places left" needs no join or count
+UPCOMING_CLASSES_QUERY = text(
+    """
+    SELECT
+        s.session_id,
+        s.start_date_time,
+        s.end_date_time,
+        s.enrolled_count,
+        s.max_capacity,
+        r.room_name,
+        t.first_name AS trainer_first_name,
+        t.last_name  AS trainer_last_name
+    FROM session s
+    JOIN room r    ON r.room_id = s.room_id
+    JOIN trainer t ON t.trainer_id = s.trainer_id
+    WHERE s.session_type = 'CLASS'
+      AND s.start_date_time > NOW()
+    ORDER BY s.start_date_time, s.session_id
+    LIMIT :limit;
+    """
+)
+
+
+def enrollment_result(row) -> dict:
+    """Turn the row returned by ENROLL_STATEMENT / UNENROLL_STATEMENT into a dictionary."""
+    return {
+        "session_id": row.session_id,
+        "enrolled_count": row.enrolled_count,
+        "max_capacity": row.max_capacity,
+    }
+
+
+# how many times enroll_in_class() / unenroll_from_class() re-run their statement when the
+# class changed under them (a place freed up between the statement and the status check)
+ENROLLMENT_ATTEMPTS = 3
+
+
+def enrollment_error_message(status, member_id: int, session_id: int, enrolling: bool) -> str | None:
+    """
+    Explain, from a CLASS_STATUS_QUERY row, why an enroll / unenroll changed nothing.
+
+    Returns None when the current state does not explain it (e.g. the class was full, but
+    somebody left in the meantime); the caller should then simply run the statement again.
+    """
+    # CASE: no such member / class
+    if not status.member_exists:
+        return f"Member with id {member_id} not found."
+    if status.session_id is None:
+        return f"Session with id {session_id} not found."
+
+    # CASE: a PT session (those are booked with schedule_pt_session())
+    if status.session_type != "CLASS":
+        return f"Session {session_id} is not a CLASS session."
+
+    if enrolling and status.is_enrolled:
+        return f"Member {member_id} is already enrolled in class {session_id}."
+    if not enrolling and not status.is_enrolled:
+        return f"Member {member_id} is not enrolled in class {session_id}."
+
+    # CASE: enrollment closes when the class starts
+    if status.start_date_time <= datetime.now():
+        return f"Class {session_id} has already started."
+
+    if enrolling and status.enrolled_count >= status.max_capacity:
+        return f"Class {session_id} is full ({status.max_capacity} of {status.max_capacity} places taken)."
 
-        # adding and flushing so that member_id is assigned
-        db.add(new_member)
-        db.flush()
+    # CASE: the class changed between the two statements (e.g. a place just freed up)
+    return None
 
-        # IMPORTANT: grab the primitive id while the session is still open
-        new_member_id = new_member.member_id
 
-        return new_member_id, None
+# message for the (very unlikely) case that the class keeps changing under every attempt
+ENROLLMENT_BUSY_MESSAGE = "The class is changing too quickly right now, please try again."
+
+
+def upcoming_class_row_to_dict(row) -> dict:
+    """Turn one UPCOMING_CLASSES_QUERY row into the dictionary the CLI prints."""
+    return {
+        "session_id": row.session_id,
+        "start": row.start_date_time,
+        "end": row.end_date_time,
+        "room_name": row.room_name,
+        "trainer_name": f"{row.trainer_first_name} {row.trainer_last_name}",
+        "enrolled_count": row.enrolled_count,
+        "max_capacity": row.max_capacity,
+        "places_left": row.max_capacity - row.enrolled_count,
+    }
+
+
+def is_duplicate_enrollment(error: Exception) -> bool:
+    """True if `error` is the class_enrollment primary key rejecting a second sign-up."""
+    return (
+        isinstance(error, IntegrityError)
+        and getattr(error.orig, "pgcode", None) == "23505"
+        and "class_enrollment" in str(error.orig)
+    )
+
+
+def validate_pt_window(start_dt: datetime, end_dt: datetime) -> str | None:
+    """Check a PT booking's time window before hitting the database (error message or None)."""
+    # CASE: user accidentally picks an end time that is before (or equal to) the start time
+    if end_dt <= start_dt:
+        return "End time must be after start time."
+
+    # sessions are stored in monthly partitions and may not span more than one month
+    if end_dt > add_months(start_dt, 1):
+        return "A PT session cannot last longer than one month."
+
+    # optional extra: PT sessions must start in the future
+    if start_dt < datetime.now():
+        return "You can't book a PT session in the past – please pick a future time."
+
+    return None
+
+
+# This function is responsible for registering a brand new member.
+# It takes basic information such as first name, last name, gender, email, phone number,
+# plus some optional fitness details (date of birth and weights).
+# If the email is already in use OR the gender is invalid, we return an error message instead.
+# The duplicate checks are left to the unique constraints (see register_member_statement()),
+# so a registration is one round trip and two racing registrations cannot both succeed.
+@instrumented("member_service.register_member")
+def register_member(first_name: str,
+                    last_name: str,
+                    gender: str,
+                    email: str,
+                    phone_number: str | None = None,
+                    dob_year: int | None = None,
+                    dob_month: int | None = None,
+                    dob_day: int | None = None,
+                    goal_weight: float | None = None,
+                    current_weight: float | None = None):
+    """
+    Create a new member row if the email (and phone, if provided) are not already in use.
+
+    Returns:
+        (member_id, error_message)
+        - member_id: the newly created member_id (or None if there was an error)
+        - error_message: a string describing what went wrong (or None on success)
+    """
+
+    member_fields, error = validate_registration(
+        first_name, last_name, gender, email, phone_number,
+        dob_year, dob_month, dob_day, goal_weight, current_weight,
+    )
+    if error is not None:
+        return None, error
+
+    # normal case: a single INSERT ... ON CONFLICT round trip
+    with get_session() as db:
+        row = db.execute(register_member_statement(member_fields)).one()
+        return registration_result(row)
 
 
 # This function lets an existing member update parts of their profile.
@@ -135,6 +485,7 @@ def register_member(first_name: str,
 # We perform a couple of checks:
 #   - The member_id must exist in the database.
 #   - The new email (if provided) must not already belong to some other member.
+@instrumented("member_service.update_member_profile")
 def update_member_profile(member_id: int,
                           new_phone: str | None = None,
                           new_email: str | None = None):
@@ -147,45 +498,34 @@ def update_member_profile(member_id: int,
         - error_message: a string describing what went wrong (or None on success)
     """
 
+    cleaned_phone = clean_optional_text(new_phone)
+    cleaned_email = clean_optional_text(new_email)
+
     with get_session() as db:
         # look up the member we want to update
-        member = db.query(Member).filter_by(member_id=member_id).first()
+        member = db.get(Member, member_id)
 
         # CASE: no such member exists
         if member is None:
             return None, f"Member with id {member_id} not found."
 
         # update the phone number if something non-empty was provided
-        if new_phone is not None and new_phone.strip() != "":
-            cleaned_phone = new_phone.strip()
-
+        if cleaned_phone is not None:
             # optional: check if some OTHER member already has this phone number
-            duplicate_phone = (
-                db.query(Member)
-                .filter(
-                    Member.phone_number == cleaned_phone,
-                    Member.member_id != member_id,
-                )
-                .first()
-            )
+            duplicate_phone = db.execute(
+                member_with_phone_query(cleaned_phone, exclude_member_id=member_id)
+            ).first()
             if duplicate_phone is not None:
                 return None, "Another member already uses that phone number."
 
             member.phone_number = cleaned_phone
 
         # update the email address if something non-empty was provided
-        if new_email is not None and new_email.strip() != "":
-            cleaned_email = new_email.strip()
-
+        if cleaned_email is not None:
             # check if some OTHER member already has this email
-            duplicate = (
-                db.query(Member)
-                .filter(
-                    Member.email == cleaned_email,
-                    Member.member_id != member_id,
-                )
-                .first()
-            )
+            duplicate = db.execute(
+                member_with_email_query(cleaned_email, exclude_member_id=member_id)
+            ).first()
             if duplicate is not None:
                 return None, "Another member already uses that email."
 
@@ -195,50 +535,40 @@ def update_member_profile(member_id: int,
         return member, None
 
 
-# This function uses the member_dashboard_view we created earlier in ddl_extras.py.
+# This function reads the member_dashboard table we created in ddl_extras.py.
 # The idea is that the "dashboard" is just a convenient way of seeing all upcoming
 # sessions for a given member: session type, start/end time, room, and trainer.
+# member_dashboard is a denormalized copy of member_dashboard_view that triggers keep
+# up to date, so PT sessions are a single index range scan with no joins; enrolled
+# classes are added from class_enrollment (a member is in a handful at most).
+# This is a pure read, so it goes through get_read_session() (read replica when one is set up).
+@instrumented("member_service.get_member_dashboard")
 def get_member_dashboard(member_id: int) -> list[dict]:
     """
-    Return a list of upcoming sessions for this member using member_dashboard_view.
+    Return a list of upcoming sessions for this member using the member_dashboard table.
 
     Each item in the returned list is a simple dictionary. This makes it easy
     to format and display inside a text-based menu / CLI.
     """
 
-    with get_session() as db:
-        # selecting only the columns we care about for display
-        query_text = text(
-            """
-            SELECT
-                session_id,
-                session_type,
-                start_date_time,
-                end_date_time,
-                room_name,
-                trainer_first_name,
-                trainer_last_name
-            FROM member_dashboard_view
-            WHERE member_id = :mid
-            ORDER BY start_date_time;
-            """
-        )
+    # served from the read cache when it is on and holds a fresh copy
+    read_cache = get_read_cache()
+    if read_cache is not None:
+        cached_rows = read_cache.get(dashboard_key(member_id))
+        if cached_rows is not None:
+            return not_started(cached_rows)
+        generation = read_cache.generation
+
+    with get_read_session() as db:
+        # executing the query with the specific member id
+        rows = db.execute(DASHBOARD_QUERY, {"mid": member_id}).all()
+
+    # build the list of "dashboard rows" in one go
+    dashboard_rows = [dashboard_row_to_dict(row) for row in rows]
 
-        # executing the view with the specific member id
-        result = db.execute(query_text, {"mid": member_id})
-
-        # build the list of "dashboard rows" in one go
-        dashboard_rows = [
-            {
-                "session_id": row.session_id,
-                "session_type": row.session_type,
-                "start": row.start_date_time,
-                "end": row.end_date_time,
-                "room_name": row.room_name,
-                "trainer_name": f"{row.trainer_first_name} {row.trainer_last_name}",
-            }
-            for row in result
-        ]
+    if read_cache is not None:
+        read_cache.put(dashboard_key(member_id), dashboard_rows,
+                       dashboard_cache_tags(member_id, rows), generation)
 
     return dashboard_rows
 
@@ -247,7 +577,9 @@ def get_member_dashboard(member_id: int) -> list[dict]:
 # For now, to keep things manageable for the final project, we:
 #   - Assume an admin is the one "creating" the session record (we can hard-code admin_id=1).
 #   - Treat every PT session as having max_capacity = 1 by design.
-#   - Rely on the database trigger to prevent overlapping bookings in the same room.
+#   - Let the book_session() database function (see booking.py) do every existence,
+#     availability and overlap check plus the INSERT in a single round trip.
+@instrumented("member_service.schedule_pt_session")
 def schedule_pt_session(member_id: int,
                         trainer_id: int,
                         room_id: int,
@@ -264,94 +596,152 @@ def schedule_pt_session(member_id: int,
     """
 
     # basic sanity check on times before hitting the database
-    # CASE: user accidentally picks an end time that is before (or equal to) the start time
-    if end_dt <= start_dt:
-        return None, "End time must be after start time."
+    error = validate_pt_window(start_dt, end_dt)
+    if error is not None:
+        return None, error
+
+    # fast path: reject obvious conflicts from the in-memory index (only if it is enabled)
+    error = precheck_booking(trainer_id, room_id, member_id, start_dt, end_dt)
+    if error is not None:
+        return None, error
+
+    def book(db):
+        new_session_id, error_code, error_message = book_session(
+            db,
+            session_type="PT",
+            member_id=member_id,
+            trainer_id=trainer_id,
+            room_id=room_id,
+            admin_id=created_by_admin_id,
+            start_dt=start_dt,
+            end_dt=end_dt,
+            max_capacity=1,      # by definition, PT session is 1-on-1
+        )
 
-    # optional extra: PT sessions must start in the future
-    if start_dt < datetime.now():
-        return None, "You can't book a PT session in the past – please pick a future time."
+        # CASE: one of the booking checks failed (member/trainer/room not found, overlap, ...)
+        if error_code is not None:
+            return None, error_message
 
-    with get_session() as db:
-        # look up all the referenced entities (foreign keys)
-        member = db.query(Member).filter_by(member_id=member_id).first()
-        trainer = db.query(Trainer).filter_by(trainer_id=trainer_id).first()
-        room = db.query(Room).filter_by(room_id=room_id).first()
-        admin = db.query(Admin_staff).filter_by(admin_id=created_by_admin_id).first()
+        # normal case: everything worked; load the new row so the caller gets a Session object
+        new_session = SESSION_BY_KEY.scalars(
+            db, SessionModel, {"session_id": new_session_id, "start_dt": start_dt}
+        ).one()
+        return new_session, None
 
-        # series of checks to make sure everything exists
-        if member is None:
-            return None, f"Member with id {member_id} not found."
-        if trainer is None:
-            return None, f"Trainer with id {trainer_id} not found."
-        if room is None:
-            return None, f"Room with id {room_id} not found."
-        if admin is None:
-            return None, f"Admin_staff with id {created_by_admin_id} not found."
-
-        # check that the trainer is actually available for this time range
-        availability = (
-            db.query(TrainerAvailability)
-            .filter(
-                TrainerAvailability.trainer_id == trainer_id,
-                TrainerAvailability.start_date_time <= start_dt,
-                TrainerAvailability.end_date_time >= end_dt,
-            )
-            .first()
-        )
-        if availability is None:
-            return None, (
-                "Trainer is not available for the requested time range. "
-                "Please choose a window inside one of their availability blocks."
-            )
-
-        # prevent member double-booking across different rooms
-        overlap_member = (
-            db.query(SessionModel)
-            .filter(
-                SessionModel.member_id == member_id,
-                SessionModel.start_date_time < end_dt,
-                SessionModel.end_date_time > start_dt,
-            )
-            .first()
-        )
-        if overlap_member is not None:
-            return None, "Member already has a session that overlaps this time."
-
-        # prevent trainer double-booking across different rooms
-        overlap_trainer = (
-            db.query(SessionModel)
-            .filter(
-                SessionModel.trainer_id == trainer_id,
-                SessionModel.start_date_time < end_dt,
-                SessionModel.end_date_time > start_dt,
-            )
-            .first()
-        )
-        if overlap_trainer is not None:
-            return None, "Trainer already has a session that overlaps this time."
+    # run_transaction() retries the booking if it loses a deadlock / serialization check
+    try:
+        new_session, error = run_transaction(book)
+    except Exception as e:
+        # CASE: something went wrong (some other constraint or DB issue)
+        return None, f"Could not schedule session: {str(e)}"
 
-        # constructing the new PT session
-        new_session = SessionModel(
-            session_type="PT",
-            start_date_time=start_dt,
-            end_date_time=end_dt,
-            max_capacity=1,      # by definition, PT session is 1-on-1
-            room=room,
-            created_by_admin=admin,
-            trainer=trainer,
-            member=member,
-        )
+    if error is not None:
+        return None, error
+    new_session_id = new_session.session_id
+
+    # the booking is committed now, so it is safe to add it to the in-memory index
+    record_booking(new_session_id, room_id, trainer_id, member_id, start_dt, end_dt)
+
+    return new_session, None
+
+
+# This function is used when a member wants to join a CLASS session.
+# The counter update and the enrollment row go in together in one statement (see
+# ENROLL_STATEMENT above), so a popular class can never be oversold, however many
+# members sign up at the same moment.
+@instrumented("member_service.enroll_in_class")
+def enroll_in_class(member_id: int, session_id: int):
+    """
+    Give a member a place in a CLASS session, if one is left.
+
+    Returns:
+        (enrollment, error_message)
+        - enrollment: {"session_id", "enrolled_count", "max_capacity"} after joining
+          (or None if there was an error)
+        - error_message: a string describing what went wrong (or None on success)
+    """
+
+    def enroll(db):
+        # each statement sees the latest committed state (READ COMMITTED), so a retry
+        # picks up a place that was freed after the previous attempt
+        for _ in range(ENROLLMENT_ATTEMPTS):
+            row = db.execute(ENROLL_STATEMENT, {"sid": session_id, "mid": member_id}).first()
+
+            # normal case: a place was claimed
+            if row is not None:
+                return enrollment_result(row), None
+
+            # CASE: nothing changed; find out why (class full, already enrolled, ...)
+            status = db.execute(CLASS_STATUS_QUERY, {"sid": session_id, "mid": member_id}).one()
+            error = enrollment_error_message(status, member_id, session_id, enrolling=True)
+            if error is not None:
+                return None, error
+
+        return None, ENROLLMENT_BUSY_MESSAGE
+
+    try:
+        enrollment, error = run_transaction(enroll)
+    except IntegrityError as e:
+        # CASE: the same member signed up twice at the same moment and the other one won
+        if is_duplicate_enrollment(e):
+            return None, f"Member {member_id} is already enrolled in class {session_id}."
+        return None, f"Could not enroll in class: {str(e)}"
+    except Exception as e:
+        # CASE: something went wrong (some other constraint or DB issue)
+        return None, f"Could not enroll in class: {str(e)}"
+
+    # write hook: the class now shows on the member's dashboard
+    if enrollment is not None:
+        invalidate_read_cache(dashboard_key(member_id))
+
+    return enrollment, error
+
+
+# This function is used when a member leaves a CLASS session before it starts;
+# their place goes back to the class in the same statement.
+@instrumented("member_service.unenroll_from_class")
+def unenroll_from_class(member_id: int, session_id: int):
+    """
+    Remove a member from a CLASS session that has not started yet.
+
+    Returns:
+        (enrollment, error_message)
+        - enrollment: {"session_id", "enrolled_count", "max_capacity"} after leaving
+          (or None if there was an error)
+        - error_message: a string describing what went wrong (or None on success)
+    """
+
+    def unenroll(db):
+        for _ in range(ENROLLMENT_ATTEMPTS):
+            row = db.execute(UNENROLL_STATEMENT, {"sid": session_id, "mid": member_id}).first()
+
+            if row is not None:
+                return enrollment_result(row), None
+
+            # CASE: nothing changed; find out why (not enrolled, class already started, ...)
+            status = db.execute(CLASS_STATUS_QUERY, {"sid": session_id, "mid": member_id}).one()
+            error = enrollment_error_message(status, member_id, session_id, enrolling=False)
+            if error is not None:
+                return None, error
+
+        return None, ENROLLMENT_BUSY_MESSAGE
+
+    try:
+        enrollment, error = run_transaction(unenroll)
+    except Exception as e:
+        return None, f"Could not leave class: {str(e)}"
+
+    # write hook: the class is gone from the member's dashboard
+    if enrollment is not None:
+        invalidate_read_cache(dashboard_key(member_id))
 
-        db.add(new_session)
+    return enrollment, error
 
-        try:
-            # this is the moment where the trigger will fire and
-            # complain if there is a room conflict
-            db.flush()
-        except Exception as e:
-            # CASE: something went wrong (likely the trigger or another constraint)
-            return None, f"Could not schedule session: {str(e)}"
 
-        # normal case: everything worked
-        return new_session, None
\ No newline at end of file
+# Upcoming CLASS sessions with the number of places left, for members to pick from.
+@instrumented("member_service.list_upcoming_classes")
+def list_upcoming_classes(limit: int = 20) -> list[dict]:
+    """Return the next `limit` CLASS sessions (soonest first) as simple dictionaries."""
+    with get_read_session() as db:
+        result = db.execute(UPCOMING_CLASSES_QUERY, {"limit": limit})
+        return [upcoming_class_row_to_dict(row) for row in result]
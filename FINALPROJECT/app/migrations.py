@@ -0,0 +1,240 @@
+# app/migrations.py
+#
+# Versioned schema migrations.
+#
+# The schema is built by an ordered list of steps (MIGRATIONS below), and the
+# schema_migrations table records every version that has been applied. migrate() applies
+# the missing ones, each exactly once, each in its own transaction together with its
+# schema_migrations row: Postgres DDL is transactional, so a step that fails leaves nothing
+# behind and is simply tried again next time.
+#
+# When the schema is current, migrate() is two catalog reads and takes no lock on any
+# table, so init_db can run on every deploy / start. Only when there is something to
+# apply does it take the MIGRATION_LOCK_KEY advisory lock (two processes starting at once
+# never both apply a step) and a lock_timeout per step (a step waiting for a lock on
+# session gives up instead of making every booking queue behind it).
+#
+# Databases created before this module have no schema_migrations table. Every step is
+# idempotent (IF NOT EXISTS / OR REPLACE / tables already partitioned are skipped), so the
+# first run applies them all once and records them.
+#
+# Changing the schema: append a Migration with the next version; never edit, reorder or
+# remove one that has shipped. When a step from ddl_extras.py changes (a new
+# HOT_PATH_INDEXES entry, a new book_session(), ...), ship it by appending a migration
+# that runs that step again.
+#
+# Usage (from FINALPROJECT/):
+#   python -m app.migrations           (apply what is missing; init_db does the same)
+#   python -m app.migrations status    (every version, and when it was applied)
+
+import argparse
+import os
+import sys
+import time
+from typing import Callable, NamedTuple
+
+# Ensure the project root (FINALPROJECT) is on sys.path so we can import `database` and `models`.
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from database import Base, get_engine
+from app import ddl_extras
+from app.partitioning import PARTITIONED_TABLES, partition_table
+
+# Import all model modules so SQLAlchemy knows about every mapped class.
+from models import (
+    member,
+    trainer,
+    admin_staff,
+    room,
+    trainer_availability,
+    trainer_availability_rule,
+    trainer_availability_exception,
+    session,
+    class_enrollment,
+)
+
+
+# key of the session-level advisory lock held while migrations are applied
+MIGRATION_LOCK_KEY = 3005_0001
+
+# how long one step may wait for a table lock before it gives up (see the top)
+MIGRATION_LOCK_TIMEOUT = "5s"
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    # apply(conn): runs the DDL inside the migration's transaction (never commits)
+    apply: Callable
+
+
+# created by its own migration, after partition_by_month (see create_class_enrollment())
+LATE_TABLES = ("class_enrollment",)
+
+
+def create_tables(conn):
+    """Every table of the ORM models but LATE_TABLES (tables that already exist are left alone)."""
+    Base.metadata.create_all(
+        bind=conn,
+        tables=[table for table in Base.metadata.sorted_tables if table.name not in LATE_TABLES],
+    )
+
+
+def partition_by_month(conn):
+    """Convert session and trainer_availability to monthly partitions (older databases)."""
+    for table_name in PARTITIONED_TABLES:
+        partition_table(conn, table_name)
+
+
+def create_class_enrollment(conn):
+    """
+    class_enrollment points at session's (session_id, start_date_time) key, which a
+    database from before partitioning only has once partition_by_month has converted
+    session, so the table cannot be created together with the others.
+    """
+    class_enrollment.ClassEnrollment.__table__.create(bind=conn, checkfirst=True)
+
+
+MIGRATIONS = [
+    Migration(1, "create tables", create_tables),
+    Migration(2, "partition session and trainer_availability by month", partition_by_month),
+    Migration(3, "class enrollment", create_class_enrollment),
+    Migration(4, "member dashboard view", ddl_extras.create_dashboard_view),
+    Migration(5, "member dashboard table", ddl_extras.create_dashboard_table),
+    Migration(6, "session enrolled_count", ddl_extras.add_enrolled_count),
+    Migration(7, "hot path indexes", ddl_extras.create_hot_path_indexes),
+    Migration(8, "session overlap constraints", ddl_extras.create_overlap_constraints),
+    Migration(9, "booking functions", ddl_extras.create_booking_functions),
+    Migration(10, "member dashboard triggers", ddl_extras.create_dashboard_triggers),
+    Migration(11, "change feed", ddl_extras.create_change_feed),
+]
+
+_versions = [migration.version for migration in MIGRATIONS]
+if _versions != sorted(set(_versions)):
+    raise ValueError("MIGRATIONS must be listed in increasing version order, without duplicates.")
+
+LATEST_VERSION = _versions[-1]
+
+
+def applied_versions(conn) -> set[int]:
+    """Versions recorded in schema_migrations (empty if the table does not exist yet)."""
+    if conn.execute(text("SELECT to_regclass('schema_migrations')")).scalar() is None:
+        return set()
+    return set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+
+def migrate() -> list[Migration]:
+    """
+    Apply every migration the database does not have yet, in order. Returns the ones
+    applied (empty when the schema was already current).
+    """
+    engine = get_engine("batch")
+
+    with engine.connect() as conn:
+        applied = applied_versions(conn)
+
+    unknown = sorted(version for version in applied if version not in _versions)
+    if unknown:
+        # CASE: a newer release already migrated this database; it stays usable by this one
+        print(f"[migrations] the database has versions this code does not know: {unknown}",
+              file=sys.stderr)
+
+    # CASE: nothing to do (the usual start): no lock taken, no DDL sent
+    if all(migration.version in applied for migration in MIGRATIONS):
+        return []
+
+    done = []
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        conn.commit()
+        try:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version      INTEGER PRIMARY KEY,
+                    name         VARCHAR(200) NOT NULL,
+                    applied_at   TIMESTAMP NOT NULL DEFAULT NOW(),
+                    duration_ms  INTEGER NOT NULL
+                )
+            """))
+            # another process may have applied some while we waited for the lock
+            applied = applied_versions(conn)
+            conn.commit()
+
+            for migration in MIGRATIONS:
+                if migration.version in applied:
+                    continue
+
+                started = time.perf_counter()
+                try:
+                    with conn.begin():
+                        conn.execute(text(f"SET LOCAL lock_timeout = '{MIGRATION_LOCK_TIMEOUT}'"))
+                        migration.apply(conn)
+                        conn.execute(
+                            text("""
+                                INSERT INTO schema_migrations (version, name, duration_ms)
+                                VALUES (:version, :name, :duration_ms)
+                            """),
+                            {
+                                "version": migration.version,
+                                "name": migration.name,
+                                "duration_ms": round((time.perf_counter() - started) * 1000),
+                            },
+                        )
+                except DBAPIError as e:
+                    # CASE: the step failed (or could not get its locks in time); it was
+                    # rolled back, and the steps before it stay applied
+                    raise RuntimeError(
+                        f"Schema migration {migration.version} ({migration.name}) failed: "
+                        f"{str(e.orig).splitlines()[0]}"
+                    ) from e
+                done.append(migration)
+        finally:
+            conn.rollback()
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            conn.commit()
+
+    return done
+
+
+def print_status():
+    """Print every migration, and when it was applied (or that it is still pending)."""
+    with get_engine("batch").connect() as conn:
+        rows = {}
+        if applied_versions(conn):
+            rows = {
+                row.version: row
+                for row in conn.execute(text("SELECT * FROM schema_migrations ORDER BY version"))
+            }
+
+    for migration in MIGRATIONS:
+        row = rows.pop(migration.version, None)
+        applied = (
+            f"applied {row.applied_at:%Y-%m-%d %H:%M} ({row.duration_ms} ms)"
+            if row is not None else "pending"
+        )
+        print(f"{migration.version:>4}  {migration.name:<55} {applied}")
+
+    # CASE: versions from a newer release
+    for version, row in rows.items():
+        print(f"{version:>4}  {row.name:<55} applied {row.applied_at:%Y-%m-%d %H:%M} (unknown to this code)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Versioned schema migrations.")
+    parser.add_argument("command", nargs="?", choices=["migrate", "status"], default="migrate")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        print_status()
+        return
+
+    applied = migrate()
+    for migration in applied:
+        print(f"Applied migration {migration.version}: {migration.name}.")
+    print(f"Schema is at version {LATEST_VERSION}" + ("." if applied else " (nothing to apply)."))
+
+
+if __name__ == "__main__":
+    main()
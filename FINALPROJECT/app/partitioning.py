@@ -0,0 +1,426 @@
+# app/partitioning.py
+#
+# Monthly range partitioning for the two tables that only ever grow: session and
+# trainer_availability, both partitioned on start_date_time.
+#
+#   - every month is its own partition (session_p2026_10, ...). The hot queries all look
+#     at "now and later" or at one small window, so they only touch a few small partitions
+#     and indexes instead of years of history;
+#   - a DEFAULT partition catches rows for months that have no partition yet (e.g. a
+#     booking far ahead); create_partitions() moves them out when their month is created;
+#   - archive_partitions() detaches months that are over and moves them into the
+#     "archive" schema, where they can still be queried (or dumped and dropped).
+#
+# Rows may span at most one month (ck_session_at_most_a_month / ck_availability_at_most_a_month),
+# so a row can only reach into the month after its own. Queries use that as a lower bound
+# on start_date_time so Postgres can skip older partitions, and book_session() uses it to
+# check the few sessions that cross a month boundary (each partition has its own
+# exclusion constraints; see app/ddl_extras.py).
+#
+# init_db() converts an older, unpartitioned database (schema migration 2, see
+# app/migrations.py).
+# The scheduled jobs are in app/maintenance.py (create-partitions, archive-partitions).
+
+import os
+import re
+import sys
+from datetime import date, datetime
+
+# Ensure the project root (FINALPROJECT) is on sys.path so we can import `database`.
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+from database import get_engine
+from app.ddl_extras import add_session_overlap_constraints
+from app.intervals import add_months
+
+
+# partitioned table -> its id column (the primary key is (id column, start_date_time))
+PARTITIONED_TABLES = {
+    "session": "session_id",
+    "trainer_availability": "availability_id",
+}
+
+# the one-month span limit, by table (see the comment at the top)
+SPAN_CONSTRAINTS = {
+    "session": "ck_session_at_most_a_month",
+    "trainer_availability": "ck_availability_at_most_a_month",
+}
+
+ARCHIVE_SCHEMA = "archive"
+
+# months created ahead of the current one by create_partitions()
+PARTITION_MONTHS_AHEAD = 3
+
+# partition DDL needs a short exclusive lock on the parent table; rather than queue behind
+# a long query (and make every booking queue behind us), give up and try again later
+PARTITION_LOCK_TIMEOUT = "5s"
+
+_BOUND_PATTERN = re.compile(r"FROM \('(\d{4})-(\d{2})-01")
+
+
+def month_start(value: date | datetime) -> date:
+    """First day of the month `value` falls in."""
+    return date(value.year, value.month, 1)
+
+
+def partition_name(table_name: str, month: date) -> str:
+    """e.g. ("session", 2026-10-01) -> "session_p2026_10"."""
+    return f"{table_name}_p{month:%Y_%m}"
+
+
+def is_partitioned(conn, table_name: str) -> bool:
+    """True if the table exists and is already a partitioned table."""
+    return conn.execute(
+        text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": table_name},
+    ).scalar() is True
+
+
+def monthly_partitions(conn, table_name: str) -> dict[date, str]:
+    """month -> partition name, for every monthly partition currently attached."""
+    rows = conn.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) AS bound
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:name AS regclass)
+    """), {"name": table_name})
+
+    partitions = {}
+    for row in rows:
+        match = _BOUND_PATTERN.search(row.bound)
+        # CASE: the DEFAULT partition has no range
+        if match is not None:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = row.relname
+    return partitions
+
+
+def _set_lock_timeout(conn):
+    conn.execute(text(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'"))
+
+
+def _create_default_partition(conn, table_name: str):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {table_name}_default PARTITION OF {table_name} DEFAULT"
+    ))
+    if table_name == "session":
+        add_session_overlap_constraints(conn, f"{table_name}_default")
+
+
+def _create_month_partition(conn, table_name: str, month: date) -> int:
+    """
+    Create one month's partition, moving that month's rows out of the DEFAULT partition
+    first (Postgres refuses to add a partition while DEFAULT holds rows for its range).
+    Returns the number of rows moved.
+    """
+    name = partition_name(table_name, month)
+    bounds = {"lower": month, "upper": add_months(month, 1)}
+    in_range = "start_date_time >= :lower AND start_date_time < :upper"
+
+    # the rows are deleted and re-inserted through the parent, so the member_dashboard
+    # trigger drops and re-adds them. Enrollments in those classes are set aside first and
+    # put back last: a foreign key only sees the partition a row is deleted from, so it
+    # would reject (or, being ON DELETE CASCADE, drop) them even though the class is back.
+    if table_name == "session":
+        conn.execute(text("""
+            CREATE TEMP TABLE enrollment_move (LIKE class_enrollment) ON COMMIT DROP;
+
+            WITH moved AS (
+                DELETE FROM class_enrollment
+                WHERE session_start >= :lower AND session_start < :upper
+                RETURNING *
+            )
+            INSERT INTO enrollment_move SELECT * FROM moved;
+        """), bounds)
+    conn.execute(text(f"CREATE TEMP TABLE partition_move (LIKE {table_name}) ON COMMIT DROP"))
+    moved = conn.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {table_name}_default WHERE {in_range} RETURNING *
+        )
+        INSERT INTO partition_move SELECT * FROM moved
+    """), bounds).rowcount
+
+    conn.execute(text(
+        f"CREATE TABLE {name} PARTITION OF {table_name} FOR VALUES FROM (:lower) TO (:upper)"
+    ), bounds)
+    if table_name == "session":
+        add_session_overlap_constraints(conn, name)
+
+    if moved:
+        conn.execute(text(f"INSERT INTO {table_name} SELECT * FROM partition_move"))
+    conn.execute(text("DROP TABLE partition_move"))
+
+    if table_name == "session":
+        conn.execute(text("""
+            INSERT INTO class_enrollment SELECT * FROM enrollment_move;
+            DROP TABLE enrollment_move;
+        """))
+
+    return moved
+
+
+def create_month_partitions(conn, first_month: date, last_month: date) -> dict[str, list[str]]:
+    """
+    Make sure every partitioned table has a partition for each month from `first_month`
+    to `last_month`, inside the caller's transaction (bulk loads such as generate_data,
+    so their rows land in monthly partitions instead of the DEFAULT one). Tables that are
+    not partitioned yet are skipped. Returns table -> names of the partitions it created.
+    """
+    first_month, last_month = month_start(first_month), month_start(last_month)
+    created = {}
+
+    for table_name in PARTITIONED_TABLES:
+        created[table_name] = []
+        if not is_partitioned(conn, table_name):
+            continue
+
+        _create_default_partition(conn, table_name)
+        existing = monthly_partitions(conn, table_name)
+        month = first_month
+        while month <= last_month:
+            if month not in existing:
+                _create_month_partition(conn, table_name, month)
+                created[table_name].append(partition_name(table_name, month))
+            month = add_months(month, 1)
+
+    return created
+
+
+def create_partitions(months_ahead: int = PARTITION_MONTHS_AHEAD,
+                      from_month: date | None = None) -> dict[str, list[str]]:
+    """
+    Make sure every partitioned table has a DEFAULT partition and a partition for each
+    month from `from_month` (default: the current month) to `months_ahead` months ahead.
+
+    Safe to run as often as you like (a scheduled job, init_db, ...). Tables that are not
+    partitioned yet are skipped. Returns table -> names of the partitions it created.
+    """
+    first_month = month_start(from_month or datetime.now())
+    months = [add_months(first_month, offset) for offset in range(months_ahead + 1)]
+    created = {}
+
+    for table_name in PARTITIONED_TABLES:
+        created[table_name] = []
+
+        # one short transaction per partition, so bookings only ever wait a moment
+        with get_engine("batch").begin() as conn:
+            if not is_partitioned(conn, table_name):
+                continue
+
+            # CASE: nothing to create. Looking the names up takes no lock, while reading the
+            # partition bounds (monthly_partitions()) waits for anything that locked the
+            # table, so the usual run (init_db, the scheduled job) never queues behind a
+            # long transaction.
+            expected = [f"{table_name}_default"] + [partition_name(table_name, month) for month in months]
+            if conn.execute(
+                text("SELECT bool_and(to_regclass(name) IS NOT NULL) FROM unnest(CAST(:names AS text[])) AS name"),
+                {"names": expected},
+            ).scalar():
+                continue
+
+            _set_lock_timeout(conn)
+            _create_default_partition(conn, table_name)
+            existing = monthly_partitions(conn, table_name)
+
+        for month in months:
+            if month in existing:
+                continue
+            with get_engine("batch").begin() as conn:
+                _set_lock_timeout(conn)
+                _create_month_partition(conn, table_name, month)
+            created[table_name].append(partition_name(table_name, month))
+
+    return created
+
+
+def archive_partitions(before_month: date) -> dict[str, list[str]]:
+    """
+    Detach every monthly partition that ends on or before `before_month` and move it to
+    the archive schema. Enrollments in archived classes move to archive.class_enrollment.
+
+    Rows can reach up to a month past their partition's month (ck_*_at_most_a_month), so
+    last month's partition may still hold availability that is live now, and it holds the
+    sessions cross_month_session_conflict() checks new bookings against. Only months
+    before last month can be archived. Returns table -> archived partition names.
+    """
+    # CASE: the cutoff would take last month (or a later one) away
+    if before_month > add_months(month_start(datetime.now()), -1):
+        raise ValueError(
+            "Only months before last month can be archived (the cutoff must be last month or earlier)."
+        )
+
+    archived = {}
+    for table_name in PARTITIONED_TABLES:
+        archived[table_name] = []
+
+        with get_engine("batch").begin() as conn:
+            if not is_partitioned(conn, table_name):
+                continue
+            conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+            old_months = sorted(
+                (month, name) for month, name in monthly_partitions(conn, table_name).items()
+                if add_months(month, 1) <= before_month
+            )
+
+        # one transaction per partition: the parent is locked for a moment each time
+        for month, name in old_months:
+            bounds = {"lower": month, "upper": add_months(month, 1)}
+            with get_engine("batch").begin() as conn:
+                _set_lock_timeout(conn)
+
+                if table_name == "session":
+                    # rows that point into the partition would block the detach
+                    conn.execute(text(f"""
+                        CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.class_enrollment
+                            (LIKE class_enrollment INCLUDING DEFAULTS);
+
+                        WITH moved AS (
+                            DELETE FROM class_enrollment
+                            WHERE session_start >= :lower AND session_start < :upper
+                            RETURNING *
+                        )
+                        INSERT INTO {ARCHIVE_SCHEMA}.class_enrollment SELECT * FROM moved;
+
+                        DELETE FROM member_dashboard
+                        WHERE start_date_time >= :lower AND start_date_time < :upper;
+                    """), bounds)
+
+                conn.execute(text(f"ALTER TABLE {table_name} DETACH PARTITION {name}"))
+                conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+
+            archived[table_name].append(f"{ARCHIVE_SCHEMA}.{name}")
+
+    return archived
+
+
+def _convert_table(conn, table_name: str, months_ahead: int):
+    """Rebuild one plain table as a partitioned one (see partition_tables())."""
+    id_column = PARTITIONED_TABLES[table_name]
+    old_name = f"{table_name}_unpartitioned"
+
+    conn.execute(text(f"LOCK TABLE {table_name} IN ACCESS EXCLUSIVE MODE"))
+    conn.execute(text(f"ALTER TABLE {table_name} RENAME TO {old_name}"))
+
+    # what has to be recreated on the new table once the old one is gone
+    foreign_keys = conn.execute(text("""
+        SELECT conname, pg_get_constraintdef(oid) AS definition
+        FROM pg_constraint
+        WHERE conrelid = CAST(:name AS regclass) AND contype = 'f'
+    """), {"name": old_name}).all()
+    referencing = conn.execute(text("""
+        SELECT conrelid::regclass::text AS table_name, conname
+        FROM pg_constraint
+        WHERE confrelid = CAST(:name AS regclass) AND contype = 'f'
+    """), {"name": old_name}).all()
+    sequence = conn.execute(
+        text("SELECT pg_get_serial_sequence(:name, :column)"),
+        {"name": old_name, "column": id_column},
+    ).scalar()
+    months_with_rows = conn.execute(text(
+        f"SELECT DISTINCT CAST(date_trunc('month', start_date_time) AS date) FROM {old_name}"
+    )).scalars().all()
+
+    # columns, defaults (the id sequence included) and CHECK constraints come along
+    conn.execute(text(f"""
+        CREATE TABLE {table_name} (LIKE {old_name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+        PARTITION BY RANGE (start_date_time)
+    """))
+
+    # a partition for this month and the next `months_ahead`, and for every earlier month
+    # that has rows; rows further ahead go to DEFAULT until create_partitions() gets there
+    # (every partition costs the planner a little, so no empty ones in between)
+    this_month = month_start(datetime.now())
+    upcoming = [add_months(this_month, offset) for offset in range(months_ahead + 1)]
+    months = sorted(set(upcoming) | {month for month in months_with_rows if month < this_month})
+    for month in months:
+        conn.execute(text(
+            f"CREATE TABLE {partition_name(table_name, month)} PARTITION OF {table_name} "
+            f"FOR VALUES FROM (:lower) TO (:upper)"
+        ), {"lower": month, "upper": add_months(month, 1)})
+    conn.execute(text(f"CREATE TABLE {table_name}_default PARTITION OF {table_name} DEFAULT"))
+
+    conn.execute(text(f"INSERT INTO {table_name} SELECT * FROM {old_name}"))
+
+    # keep the id sequence when the old table is dropped
+    if sequence is not None:
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table_name}.{id_column}"))
+
+    # everything that depends on the old table goes with it; ddl_extras recreates the
+    # view, indexes, exclusion constraints and triggers afterwards
+    for row in referencing:
+        conn.execute(text(f"ALTER TABLE {row.table_name} DROP CONSTRAINT {row.conname}"))
+    conn.execute(text("DROP VIEW IF EXISTS member_dashboard_view"))
+    conn.execute(text(f"DROP TABLE {old_name}"))
+
+    conn.execute(text(f"ALTER TABLE {table_name} ADD PRIMARY KEY ({id_column}, start_date_time)"))
+    for row in foreign_keys:
+        conn.execute(text(f"ALTER TABLE {table_name} ADD CONSTRAINT {row.conname} {row.definition}"))
+
+    # CASE: rows longer than a month would break the partition pruning bounds
+    try:
+        conn.execute(text(f"""
+            ALTER TABLE {table_name} ADD CONSTRAINT {SPAN_CONSTRAINTS[table_name]}
+            CHECK (end_date_time <= start_date_time + interval '1 month')
+        """))
+    except Exception as e:
+        raise ValueError(
+            f"{table_name} has rows longer than one month; shorten or remove them before "
+            f"partitioning ({str(e).splitlines()[0]})"
+        ) from e
+
+    # CASE: class_enrollment exists already (databases from before partitioning that had
+    # classes); otherwise schema migration 3 creates it with the right key
+    if table_name == "session" and conn.execute(text("SELECT to_regclass('class_enrollment')")).scalar():
+        _repoint_class_enrollment(conn)
+
+    conn.execute(text(f"ANALYZE {table_name}"))
+
+
+def _repoint_class_enrollment(conn):
+    """Give class_enrollment the (session_id, session_start) foreign key a partitioned session needs."""
+    conn.execute(text("""
+        ALTER TABLE class_enrollment ADD COLUMN IF NOT EXISTS session_start TIMESTAMP;
+
+        UPDATE class_enrollment e
+        SET session_start = s.start_date_time
+        FROM session s
+        WHERE s.session_id = e.session_id AND e.session_start IS DISTINCT FROM s.start_date_time;
+
+        ALTER TABLE class_enrollment ALTER COLUMN session_start SET NOT NULL;
+
+        ALTER TABLE class_enrollment DROP CONSTRAINT IF EXISTS fk_class_enrollment_session;
+        ALTER TABLE class_enrollment ADD CONSTRAINT fk_class_enrollment_session
+            FOREIGN KEY (session_id, session_start)
+            REFERENCES session (session_id, start_date_time)
+            ON DELETE CASCADE
+            ON UPDATE CASCADE;
+    """))
+
+
+def partition_tables(months_ahead: int = PARTITION_MONTHS_AHEAD) -> list[str]:
+    """
+    Convert session and trainer_availability to monthly partitioned tables, if they are
+    still plain tables (databases created before partitioning). Each table is rebuilt in
+    one transaction that locks it for the duration, so run this while the club is closed.
+
+    Returns the names of the tables that were converted (empty if there was nothing to do).
+    """
+    converted = []
+    for table_name in PARTITIONED_TABLES:
+        with get_engine("batch").begin() as conn:
+            if partition_table(conn, table_name, months_ahead):
+                converted.append(table_name)
+
+    return converted
+
+
+def partition_table(conn, table_name: str, months_ahead: int = PARTITION_MONTHS_AHEAD) -> bool:
+    """
+    partition_tables() for one table, inside the caller's transaction (app/migrations.py).
+    Returns False if the table does not exist or is already partitioned.
+    """
+    exists = conn.execute(text("SELECT to_regclass(:name)"), {"name": table_name}).scalar()
+    if exists is None or is_partitioned(conn, table_name):
+        return False
+    _convert_table(conn, table_name, months_ahead)
+    return True
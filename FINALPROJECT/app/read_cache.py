@@ -0,0 +1,273 @@
+"""
+COMP3005 - Final Project: Health & Fitness Club Management System
+File: read_cache.py
+
+Description:
+Optional in-process cache for the two reads that are repeated all day: a member's
+dashboard (get_member_dashboard()) and a trainer's schedule (get_trainer_schedule()).
+
+Entries are bounded twice: by age (a TTL, so a write made by another process shows up
+within that many seconds at the latest) and by count (least recently used entries are
+dropped first). Writes made by this process remove exactly the entries they affect,
+through the write hooks the services call after a successful commit:
+  - a booking (PT session, class, class series) drops its member's dashboard and its
+    trainer's schedule, an enrollment its member's dashboard, new trainer availability
+    that trainer's schedule;
+  - every entry is also tagged with the members, trainers and rooms its rows show
+    (names), so a change to one of those drops every entry that mentions it.
+
+Hits and misses are counted per service function in the query metrics (database.py), so
+they show up next to the statement counts in "Query stats" and the Prometheus dump.
+
+Writes made by other processes arrive through the change feed (change_feed.py): a
+session, enrollment or name change drops the same entries the write hooks above would.
+The TTL stays as a backstop for when the feed is turned off or not connected. The cache
+is off by default; turn it on with HEALTH_CLUB_READ_CACHE=1 (or enable_read_cache()).
+
+Author: Abdul Malik
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+# Make sure the project root is on sys.path so that we can import `database`
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from database import record_cache_lookup
+from app.change_feed import start_change_listener, subscribe
+
+
+# seconds an entry is served before it is read again from the database
+READ_CACHE_TTL_SECONDS = float(os.environ.get("HEALTH_CLUB_READ_CACHE_TTL", "30"))
+# entries kept at most (least recently used first out)
+READ_CACHE_MAX_ENTRIES = int(os.environ.get("HEALTH_CLUB_READ_CACHE_SIZE", "10000"))
+
+
+def dashboard_key(member_id: int | None) -> tuple:
+    return ("member_dashboard", member_id)
+
+
+def schedule_key(trainer_id: int) -> tuple:
+    return ("trainer_schedule", trainer_id)
+
+
+def member_tag(member_id: int) -> tuple:
+    return ("member", member_id)
+
+
+def trainer_tag(trainer_id: int) -> tuple:
+    return ("trainer", trainer_id)
+
+
+def room_tag(room_id: int) -> tuple:
+    return ("room", room_id)
+
+
+class ReadCache:
+    """TTL + LRU cache of read results, with tag-based invalidation."""
+
+    def __init__(self, ttl_seconds: float = READ_CACHE_TTL_SECONDS,
+                 max_entries: int = READ_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # key -> (expires_at, value, tags), least recently used first
+        self._entries: OrderedDict = OrderedDict()
+        # tag -> keys of the entries carrying it
+        self._keys_by_tag: dict[tuple, set] = {}
+        # bumped by every invalidation; see put()
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        self.invalidated = 0
+
+    def get(self, key):
+        """Return the cached value for `key`, or None on a miss (expired entries are misses)."""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            # CASE: cached, but too old
+            if entry is not None and entry[0] <= time.monotonic():
+                self._remove(key)
+                self.expired += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+
+        record_cache_lookup(entry is not None)
+        return None if entry is None else entry[1]
+
+    def put(self, key, value, tags, generation: int):
+        """
+        Store `value` under `key` with its tags (the key itself is always one of them).
+
+        `generation` is self.generation as read before the database was queried. If any
+        write invalidated entries since then, the value may already be stale, so it is
+        not stored (the next read simply goes to the database again).
+        """
+        with self._lock:
+            if generation != self.generation:
+                return
+
+            tags = set(tags) | {key}
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value, frozenset(tags))
+            for tag in tags:
+                self._keys_by_tag.setdefault(tag, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evicted += 1
+
+    def invalidate(self, tags) -> int:
+        """Drop every entry carrying one of `tags`; returns how many were dropped."""
+        with self._lock:
+            self.generation += 1
+            keys = set()
+            for tag in tags:
+                keys |= self._keys_by_tag.get(tag, set())
+            for key in keys:
+                self._remove(key)
+            self.invalidated += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._keys_by_tag.clear()
+
+    def stats(self) -> dict:
+        """Counters for tuning the TTL and size (hit rate is hits / lookups)."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "expired": self.expired,
+                "evicted": self.evicted,
+                "invalidated": self.invalidated,
+            }
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+
+# the process-wide cache (None while it is disabled)
+_read_cache = None
+_enabled = os.environ.get("HEALTH_CLUB_READ_CACHE", "").strip().lower() in ("1", "true", "yes", "on")
+_create_lock = threading.Lock()
+
+
+def enable_read_cache(enabled: bool = True):
+    """Turn the read cache on or off for this process (off drops every entry)."""
+    global _enabled, _read_cache
+    _enabled = enabled
+    if not enabled:
+        _read_cache = None
+
+
+def get_read_cache() -> ReadCache | None:
+    """Return the process-wide cache, or None if it is disabled."""
+    global _read_cache
+
+    if not _enabled:
+        return None
+
+    if _read_cache is None:
+        # follow other processes' writes before anything is cached
+        start_change_listener()
+        with _create_lock:
+            if _read_cache is None:
+                _read_cache = ReadCache()
+
+    return _read_cache
+
+
+def read_cache_ready() -> bool:
+    """True if get_read_cache() returns at once (the cache is disabled or already created)."""
+    return not _enabled or _read_cache is not None
+
+
+def not_started(rows: list[dict]) -> list[dict]:
+    """
+    Cached dashboard / schedule rows minus sessions that started since they were cached
+    (the queries only return upcoming sessions, so neither should a cache hit).
+    """
+    now = datetime.now()
+    return [row for row in rows if row["start"] >= now]
+
+
+def invalidate_read_cache(*tags):
+    """
+    Write hook: drop every cached read carrying one of `tags` -- entry keys
+    (dashboard_key(), schedule_key()) or member / trainer / room tags. Call it after the
+    write has committed.
+    """
+    read_cache = get_read_cache()
+    if read_cache is not None:
+        read_cache.invalidate(tags)
+
+
+def _apply_change(change):
+    """
+    Change feed subscriber: drop what a change (made by any process) affects. This
+    process's own writes were already handled by their write hooks; seeing them again
+    costs nothing more than a second, empty invalidation.
+    """
+    read_cache = _read_cache
+    if read_cache is None:
+        return
+
+    values = change.values
+    if change.table == "session":
+        # session_id, room_id, trainer_id, member_id, start, end
+        tags = [schedule_key(int(values[2]))]
+        if values[3]:
+            tags.append(dashboard_key(int(values[3])))
+    elif change.table == "class_enrollment":
+        # session_id, member_id
+        tags = [dashboard_key(int(values[1]))]
+    elif change.table == "room":
+        tags = [room_tag(int(values[0]))]
+    elif change.table == "member":
+        tags = [member_tag(int(values[0]))]
+    elif change.table == "trainer":
+        tags = [trainer_tag(int(values[0]))]
+    else:
+        # availability is not shown on a dashboard or a schedule
+        return
+
+    read_cache.invalidate(tags)
+
+
+def _reset():
+    read_cache = _read_cache
+    if read_cache is not None:
+        read_cache.clear()
+
+
+subscribe(_apply_change, _reset)
@@ -0,0 +1,272 @@
+# app/schedule_export.py
+#
+# Export sessions to CSV or iCalendar (.ics) so trainers, members and admins can load
+# them into a spreadsheet or their calendar app.
+#
+# Rows are streamed from a server-side cursor (yield_per) and written out one at a time,
+# so memory stays flat whether the export is one trainer's week or a year of sessions
+# for every room in the club.
+#
+# Usage (from FINALPROJECT/):
+#   python -m app.schedule_export --trainer 1 --format ics -o johnny.ics
+#   python -m app.schedule_export --room 2 --from 2026-01-01 --to 2027-01-01 -o room2.csv
+#   python -m app.schedule_export --from 2026-01-01 --to 2027-01-01 --format csv -o club.csv
+
+import argparse
+import csv
+import os
+import sys
+from datetime import datetime, timezone
+
+# Ensure the project root (FINALPROJECT) is on sys.path so we can import `database` and `models`.
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import exists, or_, select
+from database import get_read_session, instrumented
+from models.session import Session as SessionModel
+from models.room import Room
+from models.trainer import Trainer
+from models.member import Member
+from models.class_enrollment import ClassEnrollment
+# imported so every mapper the query touches can resolve its relationships
+from models.admin_staff import Admin_staff
+from app.intervals import add_months
+from models.trainer_availability import TrainerAvailability
+
+
+# rows fetched from the server-side cursor per round trip
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FORMATS = ("csv", "ics")
+
+CSV_COLUMNS = ["session_id", "session_type", "start", "end", "room", "trainer", "member", "max_capacity"]
+
+
+def export_query(trainer_id: int | None = None,
+                 member_id: int | None = None,
+                 room_id: int | None = None,
+                 from_dt: datetime | None = None,
+                 to_dt: datetime | None = None):
+    """SELECT the exported columns of every matching session, in start order."""
+    query = (
+        select(
+            SessionModel.session_id,
+            SessionModel.session_type,
+            SessionModel.start_date_time,
+            SessionModel.end_date_time,
+            SessionModel.max_capacity,
+            Room.room_name,
+            Trainer.first_name.label("trainer_first_name"),
+            Trainer.last_name.label("trainer_last_name"),
+            Member.first_name.label("member_first_name"),
+            Member.last_name.label("member_last_name"),
+        )
+        .join(Room, Room.room_id == SessionModel.room_id)
+        .join(Trainer, Trainer.trainer_id == SessionModel.trainer_id)
+        # CLASS sessions have no member, hence the outer join
+        .outerjoin(Member, Member.member_id == SessionModel.member_id)
+        .order_by(SessionModel.start_date_time, SessionModel.session_id)
+    )
+
+    if trainer_id is not None:
+        query = query.where(SessionModel.trainer_id == trainer_id)
+    if member_id is not None:
+        # the member's PT sessions and the classes they enrolled in
+        query = query.where(or_(
+            SessionModel.member_id == member_id,
+            exists().where(
+                ClassEnrollment.session_id == SessionModel.session_id,
+                ClassEnrollment.session_start == SessionModel.start_date_time,
+                ClassEnrollment.member_id == member_id,
+            ),
+        ))
+    if room_id is not None:
+        query = query.where(SessionModel.room_id == room_id)
+    # sessions that overlap the range at all are included; none lasts longer than a
+    # month, so the lower bound on the start only keeps older partitions out of the scan
+    if from_dt is not None:
+        query = query.where(
+            SessionModel.end_date_time > from_dt,
+            SessionModel.start_date_time >= add_months(from_dt, -1),
+        )
+    if to_dt is not None:
+        query = query.where(SessionModel.start_date_time < to_dt)
+
+    return query
+
+
+def _member_name(row) -> str:
+    if row.member_first_name is None:
+        return ""
+    return f"{row.member_first_name} {row.member_last_name}"
+
+
+def write_csv(rows, out_file) -> int:
+    """Write rows as CSV (header first); returns the number of sessions written."""
+    writer = csv.writer(out_file)
+    writer.writerow(CSV_COLUMNS)
+
+    count = 0
+    for row in rows:
+        writer.writerow([
+            row.session_id,
+            row.session_type,
+            row.start_date_time.isoformat(sep=" ", timespec="minutes"),
+            row.end_date_time.isoformat(sep=" ", timespec="minutes"),
+            row.room_name,
+            f"{row.trainer_first_name} {row.trainer_last_name}",
+            _member_name(row),
+            row.max_capacity,
+        ])
+        count += 1
+
+    return count
+
+
+def _ics_text(value: str) -> str:
+    """Escape a TEXT value (RFC 5545 section 3.3.11)."""
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\n", "\\n")
+    )
+
+
+def _ics_line(line: str) -> str:
+    """Fold a content line at 75 octets (RFC 5545 section 3.1) and add the CRLF."""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # never split a multi-byte character
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode("utf-8"))
+        encoded = encoded[cut:]
+        limit = 74  # continuation lines start with a space
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _ics_time(value: datetime) -> str:
+    # the database stores local (naive) times, so these are "floating" times
+    return value.strftime("%Y%m%dT%H%M%S")
+
+
+def write_ics(rows, out_file) -> int:
+    """Write rows as an iCalendar file; returns the number of sessions written."""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    out_file.write(_ics_line("BEGIN:VCALENDAR"))
+    out_file.write(_ics_line("VERSION:2.0"))
+    out_file.write(_ics_line("PRODID:-//COMP3005 Health Club//Schedule Export//EN"))
+    out_file.write(_ics_line("CALSCALE:GREGORIAN"))
+
+    count = 0
+    for row in rows:
+        trainer_name = f"{row.trainer_first_name} {row.trainer_last_name}"
+        member_name = _member_name(row)
+        if row.session_type == "PT":
+            summary = f"PT: {member_name} with {trainer_name}"
+        else:
+            summary = f"CLASS with {trainer_name} (capacity {row.max_capacity})"
+
+        out_file.write(_ics_line("BEGIN:VEVENT"))
+        out_file.write(_ics_line(f"UID:session-{row.session_id}@health-club"))
+        out_file.write(_ics_line(f"DTSTAMP:{stamp}"))
+        out_file.write(_ics_line(f"DTSTART:{_ics_time(row.start_date_time)}"))
+        out_file.write(_ics_line(f"DTEND:{_ics_time(row.end_date_time)}"))
+        out_file.write(_ics_line(f"SUMMARY:{_ics_text(summary)}"))
+        out_file.write(_ics_line(f"LOCATION:{_ics_text(row.room_name)}"))
+        out_file.write(_ics_line(f"DESCRIPTION:{_ics_text(f'Session {row.session_id}')}"))
+        out_file.write(_ics_line("END:VEVENT"))
+        count += 1
+
+    out_file.write(_ics_line("END:VCALENDAR"))
+    return count
+
+
+@instrumented("schedule_export.export_sessions")
+def export_sessions(out_file,
+                    export_format: str = "csv",
+                    trainer_id: int | None = None,
+                    member_id: int | None = None,
+                    room_id: int | None = None,
+                    from_dt: datetime | None = None,
+                    to_dt: datetime | None = None):
+    """
+    Stream every matching session into out_file (opened in text mode, newline="").
+
+    Leave trainer_id / member_id / room_id as None to export the whole club.
+
+    Returns:
+        (count, error_message)
+        - count: number of sessions written (or None if there was an error)
+        - error_message: a string describing what went wrong (or None on success)
+    """
+
+    if export_format not in EXPORT_FORMATS:
+        return None, f"Format must be one of {list(EXPORT_FORMATS)}."
+
+    if from_dt is not None and to_dt is not None and to_dt <= from_dt:
+        return None, "End of the export range must be after its start."
+
+    writer = write_csv if export_format == "csv" else write_ics
+    query = export_query(trainer_id, member_id, room_id, from_dt, to_dt)
+
+    # the "batch" profile has no statement timeout, so a big export is never cut off;
+    # yield_per turns on a server-side cursor and fetches EXPORT_BATCH_SIZE rows at a time
+    with get_read_session("batch") as db:
+        rows = db.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        count = writer(rows, out_file)
+
+    return count, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export sessions to CSV or iCalendar.")
+    parser.add_argument("--trainer", type=int, help="only this trainer's sessions")
+    parser.add_argument("--member", type=int, help="only this member's sessions (PT sessions and enrolled classes)")
+    parser.add_argument("--room", type=int, help="only this room's sessions")
+    parser.add_argument("--from", dest="from_dt", type=datetime.fromisoformat,
+                        help="start of the range (YYYY-MM-DD[ HH:MM]); default: now")
+    parser.add_argument("--to", dest="to_dt", type=datetime.fromisoformat,
+                        help="end of the range (YYYY-MM-DD[ HH:MM]); default: no limit")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default=None,
+                        help="default: taken from the output file extension, else csv")
+    parser.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    args = parser.parse_args()
+
+    export_format = args.format
+    if export_format is None:
+        export_format = "ics" if args.output.endswith(".ics") else "csv"
+
+    from_dt = args.from_dt if args.from_dt is not None else datetime.now()
+
+    if args.output == "-":
+        try:
+            count, error = export_sessions(sys.stdout, export_format, args.trainer, args.member,
+                                           args.room, from_dt, args.to_dt)
+        except BrokenPipeError:
+            # CASE: piped into something like `head` that stopped reading early;
+            # point stdout at devnull so the interpreter's final flush does not fail again
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(1)
+    else:
+        with open(args.output, "w", newline="", encoding="utf-8") as out_file:
+            count, error = export_sessions(out_file, export_format, args.trainer, args.member,
+                                           args.room, from_dt, args.to_dt)
+
+    if error is not None:
+        print("Error:", error, file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Exported {count} session(s).", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
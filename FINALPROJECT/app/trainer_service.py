@@ -12,17 +12,352 @@ Author: Abdul Malik
 
 import os
 import sys
-from datetime import datetime
+from datetime import date, datetime, time, timedelta
 
 # Make sure the project root is on sys.path so that we can import `database` and `models`
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from database import get_session
+from sqlalchemy import func, or_, select, text
+from database import PreparedStatement, get_session, get_read_session, instrumented
 from models.trainer import Trainer
 from models.trainer_availability import TrainerAvailability
+from models.trainer_availability_rule import TrainerAvailabilityRule
+from models.trainer_availability_exception import TrainerAvailabilityException
 from models.session import Session as SessionModel
 from models.room import Room
 from models.member import Member
+from models.admin_staff import Admin_staff  # needed so the Session mapper can resolve its relationships
+from app.conflict_index import get_conflict_index
+from app.read_cache import (
+    get_read_cache,
+    invalidate_read_cache,
+    schedule_key,
+    member_tag,
+    not_started,
+    room_tag,
+    trainer_tag,
+)
+from app.intervals import merge_intervals, subtract_intervals, clip_intervals, at_least, add_months
+
+
+# Shared validation / query helpers.
+# The synchronous functions below and their async twins in async_services.py both use
+# these, so the two versions can never disagree about what is valid.
+
+def validate_availability_window(start_dt: datetime, end_dt: datetime) -> str | None:
+    """Check a new availability window before hitting the database (error message or None)."""
+    # quick sanity check on times before hitting the database
+    if end_dt <= start_dt:
+        return "End time must be after start time."
+
+    # blocks are stored in monthly partitions and may not span more than one month
+    if end_dt > add_months(start_dt, 1):
+        return "An availability window cannot last longer than one month."
+
+    # do not allow availability blocks that start in the past
+    if start_dt < datetime.now():
+        return "Availability must start in the future."
+
+    return None
+
+
+# Setting availability runs these two statements (prepared once per pooled connection,
+# see PreparedStatement in database.py).
+#
+# AVAILABILITY_CHECK finds the trainer and, in the same round trip, an availability block
+# of theirs that overlaps the window (no row = no such trainer). Overlap means
+#   existing.start < new_end AND existing.end > new_start
+# A trainer's blocks never overlap each other, so if any block overlaps the window the
+# last one starting before new_end does. Checking only that one keeps this a single
+# index probe, instead of a scan over every past block of the trainer.
+# No block lasts longer than a month, so an overlapping one starts at most a month
+# before the window (:earliest_start); that lower bound lets Postgres skip the older
+# partitions.
+AVAILABILITY_CHECK = PreparedStatement(
+    "availability_check",
+    """
+    SELECT t.trainer_id, a.availability_id, a.start_date_time, a.end_date_time
+    FROM trainer t
+    LEFT JOIN LATERAL (
+        SELECT availability_id, start_date_time, end_date_time
+        FROM trainer_availability
+        WHERE trainer_id = :trainer_id
+          AND start_date_time < :end_dt
+          AND start_date_time >= :earliest_start
+        ORDER BY start_date_time DESC
+        LIMIT 1
+    ) a ON a.end_date_time > :start_dt
+    WHERE t.trainer_id = :trainer_id
+    """,
+    {"trainer_id": "integer", "start_dt": "timestamp", "end_dt": "timestamp", "earliest_start": "timestamp"},
+)
+
+INSERT_AVAILABILITY = PreparedStatement(
+    "insert_availability",
+    """
+    INSERT INTO trainer_availability (trainer_id, start_date_time, end_date_time)
+    VALUES (:trainer_id, :start_dt, :end_dt)
+    RETURNING availability_id, trainer_id, start_date_time, end_date_time
+    """,
+    {"trainer_id": "integer", "start_dt": "timestamp", "end_dt": "timestamp"},
+)
+
+
+def availability_params(trainer_id: int, start_dt: datetime, end_dt: datetime) -> dict:
+    """Parameters for AVAILABILITY_CHECK and INSERT_AVAILABILITY."""
+    return {
+        "trainer_id": trainer_id,
+        "start_dt": start_dt,
+        "end_dt": end_dt,
+        "earliest_start": add_months(start_dt, -1),
+    }
+
+
+def availability_conflict_message(overlapping=None) -> str:
+    """Error shown when a new window overlaps an existing one (details if we have the row)."""
+    if overlapping is None:
+        return "This availability conflicts with an existing availability window."
+    return (
+        "This availability conflicts with an existing availability window "
+        f"({overlapping.start_date_time} -> {overlapping.end_date_time})."
+    )
+
+
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def validate_availability_rule(weekday: int,
+                               start_time: time,
+                               end_time: time,
+                               effective_from: date,
+                               effective_until: date | None) -> str | None:
+    """Check a new weekly availability rule before hitting the database (error message or None)."""
+    if weekday not in range(7):
+        return "Weekday must be 0 (Monday) to 6 (Sunday)."
+
+    # occurrences never cross midnight
+    if end_time <= start_time:
+        return "End time must be after start time."
+
+    if effective_from < date.today():
+        return "Weekly availability cannot start in the past."
+
+    if effective_until is not None and effective_until < effective_from:
+        return "Last day must be on or after the first day."
+
+    return None
+
+
+def availability_rule_overlap_query(trainer_id: int,
+                                    weekday: int,
+                                    start_time: time,
+                                    end_time: time,
+                                    effective_from: date,
+                                    effective_until: date | None):
+    """SELECT one weekly rule of this trainer with the same weekday, overlapping times and dates."""
+    query = select(TrainerAvailabilityRule).where(
+        TrainerAvailabilityRule.trainer_id == trainer_id,
+        TrainerAvailabilityRule.weekday == weekday,
+        TrainerAvailabilityRule.start_time < end_time,
+        TrainerAvailabilityRule.end_time > start_time,
+        or_(
+            TrainerAvailabilityRule.effective_until.is_(None),
+            TrainerAvailabilityRule.effective_until >= effective_from,
+        ),
+    )
+    if effective_until is not None:
+        query = query.where(TrainerAvailabilityRule.effective_from <= effective_until)
+    return query.limit(1)
+
+
+def describe_availability_rule(rule) -> str:
+    """One-line description of a weekly rule, e.g. "Monday 09:00-17:00 from 2026-01-05"."""
+    description = (
+        f"{WEEKDAY_NAMES[rule.weekday]} {rule.start_time:%H:%M}-{rule.end_time:%H:%M} "
+        f"from {rule.effective_from}"
+    )
+    if rule.effective_until is not None:
+        description += f" until {rule.effective_until}"
+    return description
+
+
+def availability_rule_conflict_message(overlapping) -> str:
+    return (
+        "This weekly availability overlaps an existing one "
+        f"(rule {overlapping.rule_id}: {describe_availability_rule(overlapping)})."
+    )
+
+
+def validate_skip_day(rule, trainer_id: int, rule_id: int, skip_date: date) -> str | None:
+    """Check that `rule` (None if not found) is this trainer's and applies on skip_date (error message or None)."""
+    # CASE: no such rule (or it belongs to another trainer)
+    if rule is None or rule.trainer_id != trainer_id:
+        return f"Weekly availability {rule_id} not found for trainer {trainer_id}."
+
+    # CASE: the rule does not apply on that day anyway
+    if (skip_date.weekday() != rule.weekday
+            or skip_date < rule.effective_from
+            or (rule.effective_until is not None and skip_date > rule.effective_until)):
+        return f"Weekly availability {rule_id} does not cover {skip_date}."
+
+    return None
+
+
+def sessions_during_rule_query(trainer_id: int, rule, skip_date: date):
+    """SELECT COUNT of the trainer's sessions overlapping the rule's hours on skip_date."""
+    day_start = datetime.combine(skip_date, rule.start_time)
+    return (
+        select(func.count())
+        .select_from(SessionModel)
+        .where(
+            SessionModel.trainer_id == trainer_id,
+            SessionModel.start_date_time < datetime.combine(skip_date, rule.end_time),
+            SessionModel.start_date_time >= add_months(day_start, -1),
+            SessionModel.end_date_time > day_start,
+        )
+    )
+
+
+def sessions_during_rule_message(booked: int, skip_date: date) -> str:
+    return (
+        f"Trainer already has {booked} session(s) booked during that time on "
+        f"{skip_date}; move them first."
+    )
+
+
+def recurring_availability_query(trainer_id: int, today: date):
+    """SELECT the trainer's weekly rules that still apply on `today` or later, by weekday and time."""
+    return (
+        select(
+            TrainerAvailabilityRule.rule_id,
+            TrainerAvailabilityRule.weekday,
+            TrainerAvailabilityRule.start_time,
+            TrainerAvailabilityRule.end_time,
+            TrainerAvailabilityRule.effective_from,
+            TrainerAvailabilityRule.effective_until,
+        )
+        .where(
+            TrainerAvailabilityRule.trainer_id == trainer_id,
+            or_(
+                TrainerAvailabilityRule.effective_until.is_(None),
+                TrainerAvailabilityRule.effective_until >= today,
+            ),
+        )
+        .order_by(TrainerAvailabilityRule.weekday, TrainerAvailabilityRule.start_time)
+    )
+
+
+def trainer_schedule_query(trainer_id: int, now: datetime):
+    """SELECT the printed columns of every upcoming session for this trainer, in start order."""
+    return (
+        select(
+            SessionModel.session_id,
+            SessionModel.session_type,
+            SessionModel.start_date_time,
+            SessionModel.end_date_time,
+            SessionModel.room_id,
+            Room.room_name,
+            SessionModel.member_id,
+            Member.first_name,
+            Member.last_name,
+        )
+        .join(Room, Room.room_id == SessionModel.room_id)
+        # CLASS sessions have no member, hence the outer join
+        .outerjoin(Member, Member.member_id == SessionModel.member_id)
+        .where(
+            SessionModel.trainer_id == trainer_id,
+            SessionModel.start_date_time >= now,
+        )
+        .order_by(SessionModel.start_date_time)
+    )
+
+
+def schedule_row_to_dict(row) -> dict:
+    """Turn one trainer_schedule_query() row into the dictionary the CLI prints."""
+    # if this is a PT session, there should be a single member attached
+    if row.first_name is not None:
+        member_name = f"{row.first_name} {row.last_name}"
+    else:
+        # CLASS session or something with no single member
+        member_name = "(no single member)"
+
+    return {
+        "session_id": row.session_id,
+        "session_type": row.session_type,
+        "start": row.start_date_time,
+        "end": row.end_date_time,
+        "room_name": row.room_name,
+        "member_name": member_name,
+    }
+
+
+def schedule_cache_tags(trainer_id: int, rows) -> set:
+    """Read-cache tags of a schedule: the trainer plus every room and PT member it shows."""
+    tags = {trainer_tag(trainer_id)}
+    for row in rows:
+        tags.add(room_tag(row.room_id))
+        if row.member_id is not None:
+            tags.add(member_tag(row.member_id))
+    return tags
+
+
+def validate_slot_search(from_dt: datetime, to_dt: datetime, duration: timedelta):
+    """
+    Check find_open_slots() inputs and move the start of the range up to "now".
+
+    Returns:
+        (from_dt, error_message) - the (possibly later) start of the range, or None and an error
+    """
+    if to_dt <= from_dt:
+        return None, "End of the search range must be after its start."
+
+    if duration <= timedelta(0):
+        return None, "Duration must be a positive amount of time."
+
+    # nothing in the past can be booked
+    return max(from_dt, datetime.now()), None
+
+
+# kind 'A' = availability block, kind 'B' = busy (a session for the trainer or room)
+# availability blocks include the weekly rules, expanded for this window only
+# the room branch simply returns nothing when room_id is NULL
+# sessions last at most a month, so the "starts a month before :from_dt" bound loses
+# nothing and keeps the session scans to the partitions of the window
+OPEN_SLOT_SOURCES_QUERY = text(
+    """
+    SELECT 'A' AS kind, start_date_time, end_date_time
+    FROM trainer_availability_windows(:tid, :from_dt, :to_dt)
+    UNION ALL
+    SELECT 'B', start_date_time, end_date_time
+    FROM session
+    WHERE trainer_id = :tid
+      AND start_date_time < :to_dt
+      AND start_date_time >= CAST(:from_dt AS timestamp) - interval '1 month'
+      AND end_date_time > :from_dt
+    UNION ALL
+    SELECT 'B', start_date_time, end_date_time
+    FROM session
+    WHERE room_id = :rid
+      AND start_date_time < :to_dt
+      AND start_date_time >= CAST(:from_dt AS timestamp) - interval '1 month'
+      AND end_date_time > :from_dt
+    ORDER BY start_date_time;
+    """
+)
+
+
+def open_slots_from_rows(rows, from_dt: datetime, to_dt: datetime, duration: timedelta):
+    """Interval algebra on OPEN_SLOT_SOURCES_QUERY rows: free = blocks - busy, clipped, long enough."""
+    blocks = []
+    busy = []
+    for row in rows:
+        if row.kind == "A":
+            blocks.append((row.start_date_time, row.end_date_time))
+        else:
+            busy.append((row.start_date_time, row.end_date_time))
+
+    free = subtract_intervals(blocks, merge_intervals(busy))
+    return at_least(clip_intervals(free, from_dt, to_dt), duration)
 
 
 # This function lets a trainer define a new availability window.
@@ -30,6 +365,7 @@ from models.member import Member
 # For now we keep the logic simple:
 #   - End time must be after start time.
 #   - Trainer must exist in the database.
+@instrumented("trainer_service.set_trainer_availability")
 def set_trainer_availability(trainer_id: int,
                              start_dt: datetime,
                              end_dt: datetime):
@@ -42,63 +378,184 @@ def set_trainer_availability(trainer_id: int,
         - error_message: a string describing what went wrong (or None on success)
     """
 
-    # quick sanity check on times before hitting the database
-    if end_dt <= start_dt:
-        return None, "End time must be after start time."
+    error = validate_availability_window(start_dt, end_dt)
+    if error is not None:
+        return None, error
 
-    # do not allow availability blocks that start in the past
-    if start_dt < datetime.now():
-        return None, "Availability must start in the future."
+    # fast path: reject an obvious overlap from the in-memory index (only if it is enabled)
+    conflict_index = get_conflict_index()
+    if conflict_index is not None:
+        if conflict_index.find_availability_overlap(trainer_id, start_dt, end_dt) is not None:
+            return None, availability_conflict_message()
+
+    params = availability_params(trainer_id, start_dt, end_dt)
+
+    with get_session() as db:
+        # look up the trainer and any overlapping availability of theirs in one go
+        row = AVAILABILITY_CHECK.execute(db, params).first()
+
+        # CASE: no such trainer
+        if row is None:
+            return None, f"Trainer with id {trainer_id} not found."
+
+        # CASE: overlaps one of the trainer's existing windows
+        if row.availability_id is not None:
+            return None, availability_conflict_message(row)
+
+        try:
+            # this is where any CHECK constraints would fire
+            new_availability = INSERT_AVAILABILITY.scalars(db, TrainerAvailability, params).one()
+        except Exception as e:
+            # CASE: something went wrong (constraint, etc.)
+            return None, f"Could not set availability: {str(e)}"
+
+    # the new window is committed now, so it is safe to add it to the in-memory index
+    if conflict_index is not None:
+        conflict_index.add_availability(new_availability.availability_id, trainer_id, start_dt, end_dt)
+    invalidate_read_cache(schedule_key(trainer_id))
+
+    # normal case: everything worked
+    return new_availability, None
+
+
+# This function lets a trainer set up a weekly recurring availability block
+# (e.g. every Monday 09:00-17:00 from next week on) instead of one window per day.
+# The rule is stored as one row; bookings and open slot searches expand it for the
+# window they look at (see trainer_availability_windows() in ddl_extras.py).
+#   - Two rules of the same trainer may not overlap (same weekday, overlapping times
+#     and dates). One-off windows can be added on top, e.g. for extra hours.
+@instrumented("trainer_service.set_recurring_availability")
+def set_recurring_availability(trainer_id: int,
+                               weekday: int,
+                               start_time: time,
+                               end_time: time,
+                               effective_from: date,
+                               effective_until: date | None = None):
+    """
+    Create a TrainerAvailabilityRule: every `weekday` (0 = Monday) from start_time to
+    end_time, between effective_from and effective_until (None = no end date).
+
+    Returns:
+        (rule, error_message)
+        - rule: the newly created TrainerAvailabilityRule object (or None if there was an error)
+        - error_message: a string describing what went wrong (or None on success)
+    """
+
+    error = validate_availability_rule(weekday, start_time, end_time, effective_from, effective_until)
+    if error is not None:
+        return None, error
 
     with get_session() as db:
-        # look up the trainer we are adding availability for
-        trainer = db.query(Trainer).filter_by(trainer_id=trainer_id).first()
+        trainer = db.get(Trainer, trainer_id)
 
         # CASE: no such trainer
         if trainer is None:
             return None, f"Trainer with id {trainer_id} not found."
 
-        # check for overlapping availability for this trainer
-        # condition for overlap:
-        #   existing.start < new_end AND existing.end > new_start
-        overlapping = (
-            db.query(TrainerAvailability)
-            .filter(
-                TrainerAvailability.trainer_id == trainer_id,
-                TrainerAvailability.start_date_time < end_dt,
-                TrainerAvailability.end_date_time > start_dt,
+        overlapping = db.scalars(
+            availability_rule_overlap_query(
+                trainer_id, weekday, start_time, end_time, effective_from, effective_until
             )
-            .first()
-        )
+        ).first()
 
         if overlapping is not None:
-            return None, (
-                "This availability conflicts with an existing availability window "
-                f"({overlapping.start_date_time} -> {overlapping.end_date_time})."
-            )
+            return None, availability_rule_conflict_message(overlapping)
 
-        # construct the availability row
-        new_availability = TrainerAvailability(
-            trainer=trainer,
-            start_date_time=start_dt,
-            end_date_time=end_dt,
+        new_rule = TrainerAvailabilityRule(
+            trainer_id=trainer_id,
+            weekday=weekday,
+            start_time=start_time,
+            end_time=end_time,
+            effective_from=effective_from,
+            effective_until=effective_until,
         )
-
-        db.add(new_availability)
+        db.add(new_rule)
 
         try:
-            # this is where any CHECK constraints would fire
             db.flush()
         except Exception as e:
             # CASE: something went wrong (constraint, etc.)
-            return None, f"Could not set availability: {str(e)}"
+            return None, f"Could not set weekly availability: {str(e)}"
+
+    # the rule is committed now, so it is safe to add it to the in-memory index
+    conflict_index = get_conflict_index()
+    if conflict_index is not None:
+        conflict_index.add_availability_rule(
+            new_rule.rule_id, trainer_id, weekday, start_time, end_time, effective_from, effective_until
+        )
+    invalidate_read_cache(schedule_key(trainer_id))
+
+    return new_rule, None
+
+
+# This function takes one day out of a weekly rule (holiday, day off, ...).
+# The day is refused if the trainer already has sessions booked during it, since
+# they would end up outside the trainer's availability.
+@instrumented("trainer_service.skip_recurring_availability")
+def skip_recurring_availability(trainer_id: int,
+                                rule_id: int,
+                                skip_date: date):
+    """
+    Record that rule `rule_id` does not apply on skip_date.
+
+    Returns:
+        (exception, error_message)
+        - exception: the new TrainerAvailabilityException object (or None if there was an error)
+        - error_message: a string describing what went wrong (or None on success)
+    """
+
+    if skip_date < date.today():
+        return None, "Cannot skip a day in the past."
+
+    with get_session() as db:
+        rule = db.get(TrainerAvailabilityRule, rule_id)
+
+        error = validate_skip_day(rule, trainer_id, rule_id, skip_date)
+        if error is not None:
+            return None, error
+
+        if db.get(TrainerAvailabilityException, (rule_id, skip_date)) is not None:
+            return None, f"{skip_date} is already skipped."
+
+        booked = db.scalar(sessions_during_rule_query(trainer_id, rule, skip_date))
+        if booked:
+            return None, sessions_during_rule_message(booked, skip_date)
+
+        new_exception = TrainerAvailabilityException(rule_id=rule_id, exception_date=skip_date)
+        db.add(new_exception)
+
+        try:
+            db.flush()
+        except Exception as e:
+            return None, f"Could not skip the day: {str(e)}"
+
+    conflict_index = get_conflict_index()
+    if conflict_index is not None:
+        conflict_index.add_availability_exception(rule_id, skip_date)
+    invalidate_read_cache(schedule_key(trainer_id))
+
+    return new_exception, None
+
+
+# This function lists a trainer's weekly rules that still apply today or later.
+@instrumented("trainer_service.get_recurring_availability")
+def get_recurring_availability(trainer_id: int) -> list:
+    """
+    Return the trainer's current and future weekly rules, by weekday and time.
 
-        # normal case: everything worked
-        return new_availability, None
+    Each row has rule_id, weekday, start_time, end_time, effective_from and effective_until
+    (plain rows, so they stay usable after the read-only session is closed).
+    """
+    with get_read_session() as db:
+        return db.execute(recurring_availability_query(trainer_id, date.today())).all()
 
 
 # This function returns all upcoming sessions for a given trainer.
-# We use the Session ORM model and rely on relationships to pull room and member info.
+# We select only the columns the CLI prints, joining room and (for PT sessions) member
+# in the same query, so the whole schedule is one SELECT no matter how many sessions
+# the trainer has (no lazy loading of sess.room / sess.member per row).
+# This is a pure read, so it goes through get_read_session() (read replica when one is set up).
+@instrumented("trainer_service.get_trainer_schedule")
 def get_trainer_schedule(trainer_id: int) -> list[dict]:
     """
     Return a list of upcoming sessions for this trainer.
@@ -112,41 +569,64 @@ def get_trainer_schedule(trainer_id: int) -> list[dict]:
         - member_name (or a label if this is a CLASS with no single member)
     """
 
-    schedule_rows: list[dict] = []
-    now = datetime.now()
+    # served from the read cache when it is on and holds a fresh copy
+    read_cache = get_read_cache()
+    if read_cache is not None:
+        cached_rows = read_cache.get(schedule_key(trainer_id))
+        if cached_rows is not None:
+            return not_started(cached_rows)
+        generation = read_cache.generation
 
-    with get_session() as db:
+    with get_read_session() as db:
         # grab all future sessions for this trainer, ordered by start time
-        sessions = (
-            db.query(SessionModel)
-            .filter(
-                SessionModel.trainer_id == trainer_id,
-                SessionModel.start_date_time >= now,
-            )
-            .order_by(SessionModel.start_date_time)
-            .all()
-        )
+        rows = db.execute(trainer_schedule_query(trainer_id, datetime.now())).all()
+
+    # build a list of dictionaries suitable for printing in the CLI
+    schedule = [schedule_row_to_dict(row) for row in rows]
+
+    if read_cache is not None:
+        read_cache.put(schedule_key(trainer_id), schedule,
+                       schedule_cache_tags(trainer_id, rows), generation)
+
+    return schedule
+
+
+# This function answers "when can I book this trainer?" so members do not have to guess.
+# One query pulls the trainer's availability blocks plus every session that keeps the
+# trainer (or the chosen room) busy in the window; the rest is interval algebra in Python:
+#   free = (availability blocks) - (busy sessions), clipped to the window,
+#   keeping only the gaps that are at least `duration` long.
+@instrumented("trainer_service.find_open_slots")
+def find_open_slots(trainer_id: int,
+                    from_dt: datetime,
+                    to_dt: datetime,
+                    duration: timedelta,
+                    room_id: int | None = None):
+    """
+    Find the time windows in [from_dt, to_dt) where this trainer can be booked.
+
+    If room_id is given, sessions already booked in that room also count as busy.
+    Every returned window fits inside a single availability block and is at least
+    `duration` long; any start time inside a window that leaves `duration` before
+    its end is bookable.
+
+    Returns:
+        (slots, error_message)
+        - slots: a list of (start, end) datetime tuples sorted by start (or None if there was an error)
+        - error_message: a string describing what went wrong (or None on success)
+    """
+
+    # quick sanity checks before hitting the database
+    from_dt, error = validate_slot_search(from_dt, to_dt, duration)
+    if error is not None:
+        return None, error
+    if to_dt <= from_dt:
+        return [], None
+
+    with get_read_session() as db:
+        rows = db.execute(
+            OPEN_SLOT_SOURCES_QUERY,
+            {"tid": trainer_id, "rid": room_id, "from_dt": from_dt, "to_dt": to_dt},
+        ).all()
 
-        # build a list of dictionaries suitable for printing in the CLI
-        for sess in sessions:
-            # room should be available via the relationship; we guard against None just in case
-            room_name = sess.room.room_name if sess.room is not None else "Unknown room"
-
-            # if this is a PT session, there should be a single member attached
-            if sess.member is not None:
-                member_name = f"{sess.member.first_name} {sess.member.last_name}"
-            else:
-                # CLASS session or something with no single member
-                member_name = "(no single member)"
-
-            row_dict = {
-                "session_id": sess.session_id,
-                "session_type": sess.session_type,
-                "start": sess.start_date_time,
-                "end": sess.end_date_time,
-                "room_name": room_name,
-                "member_name": member_name,
-            }
-            schedule_rows.append(row_dict)
-
-    return schedule_rows
\ No newline at end of file
+    return open_slots_from_rows(rows, from_dt, to_dt, duration), None
@@ -0,0 +1 @@
+# Marks `benchmarks` as a Python package (run the scripts with `python -m benchmarks.<name>`).
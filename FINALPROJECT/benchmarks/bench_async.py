@@ -0,0 +1,128 @@
+"""
+COMP3005 - Final Project: Health & Fitness Club Management System
+File: benchmarks/bench_async.py
+
+Description:
+Compares throughput of the synchronous services with their asyncio versions
+(app/async_services.py). Each side books N PT sessions and then reads the member
+dashboard N times; the sync side does one call after another (like the CLI), the
+async side keeps up to --concurrency calls in flight with asyncio.gather().
+
+The services use the default engine profile, so this script defaults it to "api"
+(the "cli" pool only has 4 connections). How much the async side gains depends on
+the database round-trip time and the cores available: against a local server on
+a single core there is nothing to overlap and the async path is slower per call.
+
+Usage (from FINALPROJECT/):
+    python -m benchmarks.bench_async --calls 200 --concurrency 10
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+# must be set before database.py is imported (it picks the default profile at import time)
+os.environ.setdefault("HEALTH_CLUB_DB_PROFILE", "api")
+
+from database import get_async_engine
+from app import async_services
+from app.member_service import get_member_dashboard, schedule_pt_session
+from benchmarks.bench_booking import create_fixture, drop_fixture
+
+
+def slot(ids, i, slot_minutes):
+    start_dt = ids["first_slot"] + timedelta(minutes=slot_minutes * i)
+    return start_dt, start_dt + timedelta(minutes=slot_minutes)
+
+
+def booking_kwargs(ids, i, slot_minutes):
+    start_dt, end_dt = slot(ids, i, slot_minutes)
+    return {
+        "member_id": ids["member_id"],
+        "trainer_id": ids["trainer_id"],
+        "room_id": ids["room_id"],
+        "start_dt": start_dt,
+        "end_dt": end_dt,
+        "created_by_admin_id": ids["admin_id"],
+    }
+
+
+def run_sync(ids, calls, slot_minutes):
+    """Book slots [0, calls) then read the dashboard `calls` times; return seconds per phase."""
+    started = time.perf_counter()
+    for i in range(calls):
+        _, error = schedule_pt_session(**booking_kwargs(ids, i, slot_minutes))
+        if error is not None:
+            raise RuntimeError(f"sync booking {i} failed: {error}")
+    booking_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(calls):
+        get_member_dashboard(ids["member_id"])
+    dashboard_seconds = time.perf_counter() - started
+
+    return booking_seconds, dashboard_seconds
+
+
+async def run_async(ids, calls, slot_minutes, concurrency):
+    """Same as run_sync() on slots [calls, 2 * calls), with `concurrency` calls in flight."""
+    limit = asyncio.Semaphore(concurrency)
+
+    async def book(i):
+        async with limit:
+            _, error = await async_services.schedule_pt_session(**booking_kwargs(ids, calls + i, slot_minutes))
+        if error is not None:
+            raise RuntimeError(f"async booking {i} failed: {error}")
+
+    async def read_dashboard():
+        async with limit:
+            await async_services.get_member_dashboard(ids["member_id"])
+
+    # open the pool before timing (the sync engine is warmed up by create_fixture())
+    await async_services.get_member_dashboard(ids["member_id"])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(book(i) for i in range(calls)))
+    booking_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await asyncio.gather(*(read_dashboard() for _ in range(calls)))
+    dashboard_seconds = time.perf_counter() - started
+
+    await get_async_engine().dispose()
+    return booking_seconds, dashboard_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync vs asyncio service throughput.")
+    parser.add_argument("--calls", type=int, default=200, help="bookings and dashboard reads per side")
+    parser.add_argument("--concurrency", type=int, default=10, help="async calls in flight at once")
+    args = parser.parse_args()
+
+    slot_minutes = 30
+    ids = create_fixture(args.calls, slot_minutes)
+
+    try:
+        sync_booking, sync_dashboard = run_sync(ids, args.calls, slot_minutes)
+        async_booking, async_dashboard = asyncio.run(
+            run_async(ids, args.calls, slot_minutes, args.concurrency)
+        )
+    finally:
+        drop_fixture(ids)
+
+    print(f"{'':<12} {'sync calls/s':>14} {'async calls/s':>14} {'speed-up':>9}")
+    for label, sync_seconds, async_seconds in (
+        ("booking", sync_booking, async_booking),
+        ("dashboard", sync_dashboard, async_dashboard),
+    ):
+        print(f"{label:<12} {args.calls / sync_seconds:>14.0f} {args.calls / async_seconds:>14.0f} "
+              f"{sync_seconds / async_seconds:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+COMP3005 - Final Project: Health & Fitness Club Management System
+File: benchmarks/bench_booking.py
+
+Description:
+Measures per-booking latency of schedule_pt_session() with the single round trip
+book_session() path, against the old ORM path that looked up member, trainer, room and
+admin one by one, ran the availability and overlap checks, then flushed the INSERT.
+
+The benchmark creates its own admin/trainer/room/member rows (plus an availability
+block far in the future), books N back-to-back PT slots with each approach, prints
+the latency numbers and deletes everything it created.
+
+Usage (from FINALPROJECT/):
+    python -m benchmarks.bench_booking --bookings 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from database import get_session
+from models.member import Member
+from models.trainer import Trainer
+from models.room import Room
+from models.admin_staff import Admin_staff
+from models.trainer_availability import TrainerAvailability
+from models.session import Session as SessionModel
+from app.member_service import schedule_pt_session
+
+
+def legacy_schedule_pt_session(member_id, trainer_id, room_id, start_dt, end_dt,
+                               created_by_admin_id):
+    """The pre-booking-engine version of schedule_pt_session(), kept here as the baseline."""
+    with get_session() as db:
+        member = db.query(Member).filter_by(member_id=member_id).first()
+        trainer = db.query(Trainer).filter_by(trainer_id=trainer_id).first()
+        room = db.query(Room).filter_by(room_id=room_id).first()
+        admin = db.query(Admin_staff).filter_by(admin_id=created_by_admin_id).first()
+        if member is None or trainer is None or room is None or admin is None:
+            return None, "not found"
+
+        availability = (
+            db.query(TrainerAvailability)
+            .filter(
+                TrainerAvailability.trainer_id == trainer_id,
+                TrainerAvailability.start_date_time <= start_dt,
+                TrainerAvailability.end_date_time >= end_dt,
+            )
+            .first()
+        )
+        if availability is None:
+            return None, "unavailable"
+
+        for column, value in ((SessionModel.member_id, member_id),
+                              (SessionModel.trainer_id, trainer_id)):
+            overlap = (
+                db.query(SessionModel)
+                .filter(
+                    column == value,
+                    SessionModel.start_date_time < end_dt,
+                    SessionModel.end_date_time > start_dt,
+                )
+                .first()
+            )
+            if overlap is not None:
+                return None, "overlap"
+
+        new_session = SessionModel(
+            session_type="PT",
+            start_date_time=start_dt,
+            end_date_time=end_dt,
+            max_capacity=1,
+            room=room,
+            created_by_admin=admin,
+            trainer=trainer,
+            member=member,
+        )
+        db.add(new_session)
+        db.flush()
+        return new_session, None
+
+
+def create_fixture(bookings: int, slot_minutes: int):
+    """Insert the rows the benchmark books against and return their ids."""
+    # far enough in the future that we never collide with real data
+    first_slot = datetime.now().replace(second=0, microsecond=0) + timedelta(days=3650)
+    # two runs (legacy + engine) worth of back-to-back slots
+    window_end = first_slot + timedelta(minutes=slot_minutes * bookings * 2 + slot_minutes)
+    tag = f"bench{int(time.time())}"
+
+    with get_session() as db:
+        admin = Admin_staff(first_name="Bench", last_name="Admin", email=f"{tag}.admin@bench.local")
+        trainer = Trainer(first_name="Bench", last_name="Trainer", gender="Other",
+                          email=f"{tag}.trainer@bench.local")
+        member = Member(first_name="Bench", last_name="Member", gender="Other",
+                        email=f"{tag}.member@bench.local")
+        db.add_all([admin, trainer, member])
+        db.flush()
+
+        room = Room(room_name=f"{tag} room", max_capacity=1, admin=admin)
+        availability = TrainerAvailability(trainer=trainer, start_date_time=first_slot,
+                                           end_date_time=window_end)
+        db.add_all([room, availability])
+        db.flush()
+
+        return {
+            "admin_id": admin.admin_id,
+            "trainer_id": trainer.trainer_id,
+            "member_id": member.member_id,
+            "room_id": room.room_id,
+            "first_slot": first_slot,
+        }
+
+
+def drop_fixture(ids: dict):
+    """Delete everything create_fixture() and the benchmark runs inserted."""
+    with get_session() as db:
+        db.query(SessionModel).filter(SessionModel.trainer_id == ids["trainer_id"]).delete()
+        db.query(TrainerAvailability).filter(
+            TrainerAvailability.trainer_id == ids["trainer_id"]
+        ).delete()
+        db.query(Room).filter(Room.room_id == ids["room_id"]).delete()
+        db.query(Member).filter(Member.member_id == ids["member_id"]).delete()
+        db.query(Trainer).filter(Trainer.trainer_id == ids["trainer_id"]).delete()
+        db.query(Admin_staff).filter(Admin_staff.admin_id == ids["admin_id"]).delete()
+
+
+def run(label, booking_function, ids, first_slot, bookings, slot_minutes):
+    """Book `bookings` consecutive slots and return the per-booking latencies (ms)."""
+    latencies = []
+    for i in range(bookings):
+        start_dt = first_slot + timedelta(minutes=slot_minutes * i)
+        end_dt = start_dt + timedelta(minutes=slot_minutes)
+
+        started = time.perf_counter()
+        _, error = booking_function(
+            member_id=ids["member_id"],
+            trainer_id=ids["trainer_id"],
+            room_id=ids["room_id"],
+            start_dt=start_dt,
+            end_dt=end_dt,
+            created_by_admin_id=ids["admin_id"],
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        if error is not None:
+            raise RuntimeError(f"{label}: booking {i} failed: {error}")
+
+    return latencies
+
+
+def report(label, latencies):
+    """Print mean / median / p95 for one run."""
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1] if len(ordered) >= 20 else ordered[-1]
+    print(
+        f"{label:<16} n={len(ordered):<5} "
+        f"mean={statistics.mean(ordered):7.2f} ms  "
+        f"p50={statistics.median(ordered):7.2f} ms  "
+        f"p95={p95:7.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-booking latency: legacy ORM path vs book_session().")
+    parser.add_argument("--bookings", type=int, default=200, help="bookings per approach")
+    parser.add_argument("--slot-minutes", type=int, default=30, help="length of each booked slot")
+    args = parser.parse_args()
+
+    ids = create_fixture(args.bookings, args.slot_minutes)
+    try:
+        legacy_start = ids["first_slot"]
+        engine_start = legacy_start + timedelta(minutes=args.slot_minutes * args.bookings)
+
+        legacy = run("legacy", legacy_schedule_pt_session, ids, legacy_start,
+                     args.bookings, args.slot_minutes)
+        engine = run("book_session", schedule_pt_session, ids, engine_start,
+                     args.bookings, args.slot_minutes)
+
+        report("legacy ORM", legacy)
+        report("book_session()", engine)
+        print(f"median speed-up: {statistics.median(legacy) / statistics.median(engine):.2f}x")
+    finally:
+        drop_fixture(ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+COMP3005 - Final Project: Health & Fitness Club Management System
+File: benchmarks/bench_change_feed.py
+
+Description:
+Checks that bookings made by another process reach this process's conflict index and
+read cache through the change feed (app/change_feed.py), and measures how long that
+takes. A worker process books one session at a time for the benchmark member / trainer;
+after each booking this process waits until its listener has applied the change, then
+checks that the conflict index rejects the same slot and that the (cached) dashboard and
+schedule show the new session. Halfway through, the listener's connection is killed and
+a booking is made while it is down, so the replay after the reconnect is covered too.
+
+Usage (from FINALPROJECT/):
+    python -m benchmarks.bench_change_feed --bookings 50
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from datetime import timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+from database import get_session
+from app.change_feed import enable_change_feed, start_change_listener
+from app.conflict_index import enable_conflict_index, get_conflict_index
+from app.read_cache import enable_read_cache
+from app.member_service import get_member_dashboard
+from app.trainer_service import get_trainer_schedule
+from benchmarks.bench_booking import create_fixture, drop_fixture, report
+from benchmarks.bench_read_cache import SLOT_MINUTES, book
+
+
+# how long to wait for one change to arrive before giving up (seconds)
+ARRIVAL_TIMEOUT = 60
+
+
+def booking_worker(ids, requests, committed):
+    """Other process: book each requested slot and report when its commit returned."""
+    # nothing cached here, so nothing to listen for either
+    enable_change_feed(False)
+    while True:
+        index = requests.get()
+        if index is None:
+            break
+        book(ids, index)
+        committed.put(time.time())
+
+
+def kill_listener_connection() -> int:
+    """Terminate this process's LISTEN connection (it reconnects and replays)."""
+    with get_session() as db:
+        return db.execute(text("""
+            SELECT count(pg_terminate_backend(pid))
+            FROM pg_stat_activity
+            WHERE application_name = 'health_club_change_feed'
+        """)).scalar()
+
+
+def wait_until_applied(listener, seen: int, ids, start_dt):
+    """Wait until the listener has applied a new change and the index holds the slot."""
+    deadline = time.monotonic() + ARRIVAL_TIMEOUT
+    end_dt = start_dt + timedelta(minutes=SLOT_MINUTES)
+    while time.monotonic() < deadline:
+        conflict_index = get_conflict_index()
+        error_code, _ = conflict_index.check_booking(ids["trainer_id"], ids["room_id"],
+                                                    ids["member_id"], start_dt, end_dt)
+        if listener.received + listener.replayed > seen and error_code is not None:
+            return time.time()
+        time.sleep(0.0002)
+    raise RuntimeError(f"the booking at {start_dt} never reached this process")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-process invalidation through the change feed.")
+    parser.add_argument("--bookings", type=int, default=50, help="sessions booked by the other process")
+    args = parser.parse_args()
+
+    ids = create_fixture(args.bookings + 1, SLOT_MINUTES)
+    context = multiprocessing.get_context("spawn")
+    requests, committed = context.Queue(), context.Queue()
+    worker = context.Process(target=booking_worker, args=(ids, requests, committed))
+    worker.start()
+
+    try:
+        enable_conflict_index(True)
+        enable_read_cache(True)
+        listener = start_change_listener()
+        get_conflict_index()
+
+        latencies = []
+        replayed_ms = None
+        for i in range(args.bookings):
+            # fill the cache, so a stale copy would be served if the change did not arrive
+            get_member_dashboard(ids["member_id"])
+            get_trainer_schedule(ids["trainer_id"])
+
+            reconnect_round = i == args.bookings // 2
+            if reconnect_round:
+                kill_listener_connection()
+
+            seen = listener.received + listener.replayed
+            requests.put(i)
+            committed_at = committed.get(timeout=ARRIVAL_TIMEOUT)
+            applied_at = wait_until_applied(listener, seen, ids,
+                                            ids["first_slot"] + timedelta(minutes=SLOT_MINUTES * i))
+            elapsed_ms = max(0.0, applied_at - committed_at) * 1000
+
+            if reconnect_round:
+                replayed_ms = elapsed_ms
+            else:
+                latencies.append(elapsed_ms)
+
+            dashboard = get_member_dashboard(ids["member_id"])
+            schedule = get_trainer_schedule(ids["trainer_id"])
+            if len(dashboard) != i + 1 or len(schedule) != i + 1:
+                raise RuntimeError(f"stale cache: expected {i + 1} sessions, "
+                                   f"got {len(dashboard)} / {len(schedule)}")
+
+        stats = listener.stats()
+        report("commit -> applied", latencies)
+        print(f"booked while disconnected: applied {replayed_ms:.0f} ms after its commit (replay)")
+        print(f"listener: {stats['received']} received, {stats['replayed']} replayed, "
+              f"{stats['reconnects']} reconnects, {stats['resets']} resets")
+        print("dashboard / schedule / conflict index were never stale")
+    finally:
+        requests.put(None)
+        worker.join()
+        enable_read_cache(False)
+        enable_conflict_index(False)
+        enable_change_feed(False)
+        drop_fixture(ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+COMP3005 - Final Project: Health & Fitness Club Management System
+File: benchmarks/bench_conflict_index.py
+
+Description:
+Measures how long schedule_pt_session() takes to reject a conflicting booking with
+and without the in-memory conflict index (app/conflict_index.py). It books N sessions
+for a benchmark trainer, then tries to book every one of those slots again, once with
+the index disabled (the database rejects them) and once with it enabled.
+
+Usage (from FINALPROJECT/):
+    python -m benchmarks.bench_conflict_index --sessions 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.conflict_index import enable_conflict_index, get_conflict_index
+from app.member_service import schedule_pt_session
+from benchmarks.bench_booking import create_fixture, drop_fixture, report
+
+
+def attempt_conflicts(ids, slots):
+    """Try to re-book every slot and return the per-rejection latencies (ms)."""
+    latencies = []
+    for start_dt, end_dt in slots:
+        started = time.perf_counter()
+        session, error = schedule_pt_session(
+            member_id=ids["member_id"],
+            trainer_id=ids["trainer_id"],
+            room_id=ids["room_id"],
+            start_dt=start_dt,
+            end_dt=end_dt,
+            created_by_admin_id=ids["admin_id"],
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        if session is not None or error is None:
+            raise RuntimeError(f"slot {start_dt} was booked twice")
+
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conflict rejection latency with / without the in-memory index.")
+    parser.add_argument("--sessions", type=int, default=200, help="sessions to book (and then re-try)")
+    args = parser.parse_args()
+
+    slot_minutes = 30
+    ids = create_fixture(args.sessions, slot_minutes)
+
+    try:
+        enable_conflict_index(False)
+
+        slots = []
+        for i in range(args.sessions):
+            start_dt = ids["first_slot"] + timedelta(minutes=slot_minutes * i)
+            end_dt = start_dt + timedelta(minutes=slot_minutes)
+            _, error = schedule_pt_session(
+                member_id=ids["member_id"],
+                trainer_id=ids["trainer_id"],
+                room_id=ids["room_id"],
+                start_dt=start_dt,
+                end_dt=end_dt,
+                created_by_admin_id=ids["admin_id"],
+            )
+            if error is not None:
+                raise RuntimeError(f"could not book session {i}: {error}")
+            slots.append((start_dt, end_dt))
+
+        without_index = attempt_conflicts(ids, slots)
+
+        enable_conflict_index(True)
+        started = time.perf_counter()
+        get_conflict_index()
+        load_ms = (time.perf_counter() - started) * 1000
+        with_index = attempt_conflicts(ids, slots)
+
+        print(f"index load: {load_ms:.1f} ms")
+        report("database only", without_index)
+        report("with index", with_index)
+        print(f"median speed-up: {statistics.median(without_index) / statistics.median(with_index):.0f}x")
+    finally:
+        enable_conflict_index(False)
+        drop_fixture(ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+COMP3005 - Final Project: Health & Fitness Club Management System
+File: benchmarks/bench_read_cache.py
+
+Description:
+Measures get_member_dashboard() and get_trainer_schedule() with and without the read
+cache (app/read_cache.py). It books N sessions for a benchmark member / trainer, then
+refreshes both reads R times, once with the cache disabled and once with it enabled.
+With the cache on, a new booking is made every --book-every refreshes, so the numbers
+include the misses its invalidation causes (and the check that the new session shows
+up straight away).
+
+Usage (from FINALPROJECT/):
+    python -m benchmarks.bench_read_cache --sessions 50 --refreshes 500 --book-every 50
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.read_cache import enable_read_cache, get_read_cache
+from app.member_service import get_member_dashboard, schedule_pt_session
+from app.trainer_service import get_trainer_schedule
+from benchmarks.bench_booking import create_fixture, drop_fixture, report
+
+
+SLOT_MINUTES = 30
+
+
+def book(ids, index: int):
+    """Book the index-th slot of the fixture for its member and trainer."""
+    start_dt = ids["first_slot"] + timedelta(minutes=SLOT_MINUTES * index)
+    _, error = schedule_pt_session(
+        member_id=ids["member_id"],
+        trainer_id=ids["trainer_id"],
+        room_id=ids["room_id"],
+        start_dt=start_dt,
+        end_dt=start_dt + timedelta(minutes=SLOT_MINUTES),
+        created_by_admin_id=ids["admin_id"],
+    )
+    if error is not None:
+        raise RuntimeError(f"could not book session {index}: {error}")
+
+
+def refresh(ids, refreshes: int, booked: int, book_every: int | None):
+    """Read the dashboard and schedule `refreshes` times; return their latencies (ms)."""
+    dashboard_ms = []
+    schedule_ms = []
+    for i in range(refreshes):
+        if book_every and i and i % book_every == 0:
+            book(ids, booked)
+            booked += 1
+
+        started = time.perf_counter()
+        dashboard = get_member_dashboard(ids["member_id"])
+        dashboard_ms.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        schedule = get_trainer_schedule(ids["trainer_id"])
+        schedule_ms.append((time.perf_counter() - started) * 1000)
+
+        # a stale cache would miss the sessions booked above
+        if len(dashboard) != booked or len(schedule) != booked:
+            raise RuntimeError(f"expected {booked} sessions, got {len(dashboard)} / {len(schedule)}")
+
+    return dashboard_ms, schedule_ms, booked
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard / schedule latency with / without the read cache.")
+    parser.add_argument("--sessions", type=int, default=50, help="sessions booked before the reads")
+    parser.add_argument("--refreshes", type=int, default=500, help="dashboard + schedule reads per run")
+    parser.add_argument("--book-every", type=int, default=50,
+                        help="with the cache on, book one more session every N refreshes")
+    args = parser.parse_args()
+
+    extra = args.refreshes // args.book_every if args.book_every else 0
+    ids = create_fixture(args.sessions + extra + 1, SLOT_MINUTES)
+
+    try:
+        enable_read_cache(False)
+        for i in range(args.sessions):
+            book(ids, i)
+
+        dashboard_db, schedule_db, booked = refresh(ids, args.refreshes, args.sessions, None)
+
+        enable_read_cache(True)
+        dashboard_cached, schedule_cached, booked = refresh(
+            ids, args.refreshes, booked, args.book_every
+        )
+        stats = get_read_cache().stats()
+
+        report("dashboard db", dashboard_db)
+        report("dashboard cached", dashboard_cached)
+        report("schedule db", schedule_db)
+        report("schedule cached", schedule_cached)
+        print(f"hit rate {stats['hit_rate']:.1%} ({stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['invalidated']} entries invalidated by {booked - args.sessions} bookings)")
+        print(f"median speed-up: dashboard {statistics.median(dashboard_db) / statistics.median(dashboard_cached):.0f}x, "
+              f"schedule {statistics.median(schedule_db) / statistics.median(schedule_cached):.0f}x")
+    finally:
+        enable_read_cache(False)
+        drop_fixture(ids)
+
+
+if __name__ == "__main__":
+    main()
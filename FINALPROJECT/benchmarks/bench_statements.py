@@ -0,0 +1,187 @@
+"""
+COMP3005 - Final Project: Health & Fitness Club Management System
+File: benchmarks/bench_statements.py
+
+Description:
+Measures what the prepared statements (PreparedStatement in database.py) save on the
+two hottest write paths, schedule_pt_session() and set_trainer_availability(). Each is
+run with HEALTH_CLUB_PREPARED_STATEMENTS off (plain text() statements, parsed and
+planned by Postgres on every call) and on (EXECUTE of a statement each pooled connection
+prepared once). set_trainer_availability() is also run the old ORM way (get the trainer,
+run the overlap query, flush the new row) as the baseline.
+
+For every run it prints the wall-clock latency per call and the CPU time this process
+spent per call (compiling statements, building ORM objects).
+
+Usage (from FINALPROJECT/):
+    python -m benchmarks.bench_statements --calls 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import select
+
+import database
+from database import get_session
+from models.trainer import Trainer
+from models.trainer_availability import TrainerAvailability
+from app.member_service import schedule_pt_session
+from app.trainer_service import set_trainer_availability
+from app.intervals import add_months
+from benchmarks.bench_booking import create_fixture, drop_fixture
+
+
+SLOT_MINUTES = 30
+
+
+def legacy_set_trainer_availability(trainer_id, start_dt, end_dt):
+    """The ORM version of set_trainer_availability(), kept here as the baseline."""
+    with get_session() as db:
+        trainer = db.get(Trainer, trainer_id)
+        if trainer is None:
+            return None, "not found"
+
+        earliest_start = add_months(start_dt, -1)
+        last_block_id = (
+            select(TrainerAvailability.availability_id)
+            .where(
+                TrainerAvailability.trainer_id == trainer_id,
+                TrainerAvailability.start_date_time < end_dt,
+                TrainerAvailability.start_date_time >= earliest_start,
+            )
+            .order_by(TrainerAvailability.start_date_time.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        overlapping = db.scalars(
+            select(TrainerAvailability).where(
+                TrainerAvailability.availability_id == last_block_id,
+                TrainerAvailability.start_date_time < end_dt,
+                TrainerAvailability.start_date_time >= earliest_start,
+                TrainerAvailability.end_date_time > start_dt,
+            )
+        ).first()
+        if overlapping is not None:
+            return None, "overlap"
+
+        new_availability = TrainerAvailability(trainer=trainer, start_date_time=start_dt,
+                                               end_date_time=end_dt)
+        db.add(new_availability)
+        db.flush()
+        return new_availability, None
+
+
+def timed(label, call, i, timings):
+    """Run call(i) once and append its wall / CPU time (ms) to timings."""
+    started, started_cpu = time.perf_counter(), time.process_time()
+    _, error = call(i)
+    timings[0].append((time.perf_counter() - started) * 1000)
+    timings[1].append((time.process_time() - started_cpu) * 1000)
+
+    if error is not None:
+        raise RuntimeError(f"{label}: call {i} failed: {error}")
+
+
+def run(label, call, calls: int):
+    """Call call(i) `calls` times; returns (wall ms, CPU ms) per call."""
+    timings = ([], [])
+    for i in range(calls):
+        timed(label, call, i, timings)
+    return timings
+
+
+def compare(label, plain_call, prepared_call, calls: int):
+    """
+    Alternate plain and prepared calls (so that both see the same table sizes and the same
+    noise from the rest of the machine); returns their (wall ms, CPU ms) per call.
+    """
+    plain, prepared = ([], []), ([], [])
+    for i in range(calls):
+        database.PREPARED_STATEMENTS_ENABLED = False
+        timed(f"{label} (text)", plain_call, i, plain)
+        database.PREPARED_STATEMENTS_ENABLED = True
+        timed(f"{label} (prepared)", prepared_call, i, prepared)
+    return plain, prepared
+
+
+def report(label, timings):
+    wall, cpu = timings
+    print(
+        f"{label:<36} "
+        f"wall p50={statistics.median(wall):6.2f} ms  mean={statistics.mean(wall):6.2f} ms  "
+        f"cpu mean={statistics.mean(cpu):6.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot write paths with and without prepared statements.")
+    parser.add_argument("--calls", type=int, default=200, help="calls per function and mode")
+    args = parser.parse_args()
+
+    # create_fixture() leaves room for two runs of back-to-back bookings; the availability
+    # blocks added below go after that window
+    ids = create_fixture(args.calls, SLOT_MINUTES)
+    availability_start = ids["first_slot"] + timedelta(minutes=SLOT_MINUTES * (args.calls * 2 + 2))
+
+    def book(first_slot):
+        def call(i):
+            start_dt = first_slot + timedelta(minutes=SLOT_MINUTES * i)
+            return schedule_pt_session(
+                member_id=ids["member_id"],
+                trainer_id=ids["trainer_id"],
+                room_id=ids["room_id"],
+                start_dt=start_dt,
+                end_dt=start_dt + timedelta(minutes=SLOT_MINUTES),
+                created_by_admin_id=ids["admin_id"],
+            )
+        return call
+
+    def add_availability(function, run_index):
+        first_block = availability_start + timedelta(minutes=SLOT_MINUTES * args.calls * run_index)
+
+        def call(i):
+            start_dt = first_block + timedelta(minutes=SLOT_MINUTES * i)
+            return function(ids["trainer_id"], start_dt, start_dt + timedelta(minutes=SLOT_MINUTES))
+        return call
+
+    results = {}
+    enabled = database.PREPARED_STATEMENTS_ENABLED
+    try:
+        results["set_trainer_availability (ORM)"] = run(
+            "ORM", add_availability(legacy_set_trainer_availability, 0), args.calls)
+
+        results["schedule_pt_session (text)"], results["schedule_pt_session (prepared)"] = compare(
+            "schedule_pt_session",
+            book(ids["first_slot"]),
+            book(ids["first_slot"] + timedelta(minutes=SLOT_MINUTES * args.calls)),
+            args.calls,
+        )
+        (results["set_trainer_availability (text)"],
+         results["set_trainer_availability (prepared)"]) = compare(
+            "set_trainer_availability",
+            add_availability(set_trainer_availability, 1),
+            add_availability(set_trainer_availability, 2),
+            args.calls,
+        )
+    finally:
+        database.PREPARED_STATEMENTS_ENABLED = enabled
+        drop_fixture(ids)
+
+    for label, timings in results.items():
+        report(label, timings)
+
+    for function in ("schedule_pt_session", "set_trainer_availability"):
+        plain = statistics.median(results[f"{function} (text)"][0])
+        prepared = statistics.median(results[f"{function} (prepared)"][0])
+        print(f"{function}: prepared p50 is {100 * (plain - prepared) / plain:.0f}% lower than text")
+
+
+if __name__ == "__main__":
+    main()
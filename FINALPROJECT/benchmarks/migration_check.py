@@ -0,0 +1,83 @@
+"""
+COMP3005 - Final Project: Health & Fitness Club Management System
+File: benchmarks/migration_check.py
+
+Description:
+Checks that init_db() on a database whose schema is already current is cheap and takes
+no lock on the hot tables. It brings the schema up to date once, then has a second
+connection hold ACCESS EXCLUSIVE locks on session, trainer_availability, room, trainer,
+member, class_enrollment and member_dashboard (as a long migration or a stuck
+transaction would) while init_db() runs again and again. Any lock init_db() asked for
+would make it wait and then fail on its lock_timeout. For comparison it also times the
+old start-up path, which re-ran every ddl_extras.py step (without the locks held, or it
+would never finish).
+
+Usage (from FINALPROJECT/):
+    python -m benchmarks.migration_check --runs 20
+
+Exits with status 1 if init_db() blocked or failed.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+
+from database import get_engine
+from app.ddl_extras import create_view_index_trigger
+from app.init_db import init_db
+
+
+HOT_TABLES = (
+    "session", "trainer_availability", "room", "trainer", "member",
+    "class_enrollment", "member_dashboard",
+)
+
+
+def time_runs(function, runs: int) -> list[float]:
+    """Call function() `runs` times (its output discarded); returns ms per call."""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="init_db() on a current schema: time and locks.")
+    parser.add_argument("--runs", type=int, default=20, help="init_db() runs to time")
+    args = parser.parse_args()
+
+    # bring the schema up to date (and warm up the connection pool)
+    init_db()
+
+    old_path = time_runs(create_view_index_trigger, args.runs)
+
+    with get_engine("batch").connect() as holder:
+        holder.execute(text(f"LOCK TABLE {', '.join(HOT_TABLES)} IN ACCESS EXCLUSIVE MODE"))
+        try:
+            new_path = time_runs(init_db, args.runs)
+        except Exception as e:
+            print(f"FAIL: init_db() needed a lock on a hot table: {str(e).splitlines()[0]}")
+            sys.exit(1)
+        finally:
+            holder.rollback()
+
+    print(f"every ddl_extras step again (old start-up): p50={statistics.median(old_path):7.2f} ms  "
+          f"max={max(old_path):7.2f} ms")
+    print(f"init_db() on a current schema:              p50={statistics.median(new_path):7.2f} ms  "
+          f"max={max(new_path):7.2f} ms  (hot tables locked by another connection)")
+    print("OK: init_db() takes no lock on the hot tables when there is nothing to apply")
+
+
+if __name__ == "__main__":
+    main()
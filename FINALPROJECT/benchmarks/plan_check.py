@@ -0,0 +1,224 @@
+"""
+COMP3005 - Final Project: Health & Fitness Club Management System
+File: benchmarks/plan_check.py
+
+Description:
+Plan regression check for the hot service queries. It loads a large synthetic dataset
+with app/generate_data.py (inside a transaction that is always rolled back), runs
+EXPLAIN on every query the services issue, and fails if any of them uses a sequential
+scan on a table that is big enough for that to matter.
+
+Usage (from FINALPROJECT/):
+    python -m benchmarks.plan_check
+    python -m benchmarks.plan_check --weeks 52 --members 200000
+
+Exits with status 1 if any plan regressed, so it can be wired into CI.
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+
+from database import get_engine
+from app.generate_data import generate_dataset
+from app.member_service import (
+    register_member_statement,
+    member_with_email_query,
+    member_with_phone_query,
+    DASHBOARD_QUERY,
+    UPCOMING_CLASSES_QUERY,
+    ENROLL_STATEMENT,
+)
+from app.trainer_service import (
+    AVAILABILITY_CHECK,
+    availability_params,
+    trainer_schedule_query,
+    OPEN_SLOT_SOURCES_QUERY,
+)
+from app.admin_service import room_with_name_query, SERIES_CONFLICTS_SQL, series_conflicts_params
+
+
+# a sequential scan is only reported for tables with at least this many rows;
+# tiny lookup tables are legitimately cheaper to scan than to probe
+SEQ_SCAN_ROW_LIMIT = 1000
+
+
+# Every hot query, as the services build it (their own statement objects, so this check
+# follows any change to them); only book_session()'s lookups, which live in PL/pgSQL
+# (see ddl_extras.py), are written out here.
+# name -> (SQL string or SQLAlchemy statement, parameters)
+def service_queries(now: datetime) -> dict:
+    slot_start = now + timedelta(days=1)
+    slot_end = slot_start + timedelta(hours=1)
+
+    return {
+        # member_service.register_member
+        "register member": (
+            register_member_statement({
+                "first_name": "Mia", "last_name": "Smith", "gender": "Female",
+                "email": "mia.smith.m42@example.com", "phone_number": "555-0000042",
+                "year": None, "month": None, "day": None,
+                "goal_weight": None, "current_weight": None,
+            }),
+            {},
+        ),
+        # member_service.update_member_profile
+        "member by email": (
+            member_with_email_query("mia.smith.m42@example.com", exclude_member_id=1),
+            {},
+        ),
+        "member by phone": (
+            member_with_phone_query("555-0000042", exclude_member_id=1),
+            {},
+        ),
+        "member by id": (
+            "SELECT * FROM member WHERE member_id = :mid LIMIT 1",
+            {"mid": 42},
+        ),
+        # member_service.get_member_dashboard
+        "member dashboard": (DASHBOARD_QUERY, {"mid": 42}),
+        # member_service.list_upcoming_classes
+        "upcoming classes": (UPCOMING_CLASSES_QUERY, {"limit": 20}),
+        # member_service.enroll_in_class (EXPLAIN alone never runs the UPDATE / INSERT)
+        "enroll in class": (ENROLL_STATEMENT, {"sid": 4242, "mid": 42}),
+        # trainer_service.set_trainer_availability
+        "availability check": (
+            AVAILABILITY_CHECK.sql,
+            availability_params(7, slot_start, slot_end),
+        ),
+        # trainer_service.get_trainer_schedule
+        "trainer schedule": (trainer_schedule_query(7, now), {}),
+        # trainer_service.find_open_slots
+        "open slot sources": (
+            OPEN_SLOT_SOURCES_QUERY,
+            {"tid": 7, "rid": 3, "from_dt": now, "to_dt": now + timedelta(days=7)},
+        ),
+        # admin_service.create_room
+        "room by name": (room_with_name_query("Studio 42"), {}),
+        # admin_service.create_class_series
+        "class series conflicts": (
+            SERIES_CONFLICTS_SQL,
+            series_conflicts_params(7, 3, [(slot_start + timedelta(weeks=week), slot_end + timedelta(weeks=week))
+                                           for week in range(12)]),
+        ),
+        # book_session(): availability containment and the conflict lookups
+        "availability containment": (
+            """
+            SELECT 1 FROM trainer_availability_windows(:tid, :start_dt, :end_dt) w
+            WHERE w.start_date_time <= :start_dt AND w.end_date_time >= :end_dt
+            """,
+            {"tid": 7, "start_dt": slot_start, "end_dt": slot_end},
+        ),
+        "member conflict lookup": (
+            """
+            SELECT session_id FROM session
+            WHERE member_id = :mid
+              AND start_date_time < :end_dt
+              AND start_date_time >= CAST(:start_dt AS timestamp) - interval '1 month'
+              AND tsrange(start_date_time, end_date_time) && tsrange(:start_dt, :end_dt)
+            LIMIT 1
+            """,
+            {"mid": 42, "start_dt": slot_start, "end_dt": slot_end},
+        ),
+        "trainer conflict lookup": (
+            """
+            SELECT session_id FROM session
+            WHERE trainer_id = :tid
+              AND start_date_time < :end_dt
+              AND start_date_time >= CAST(:start_dt AS timestamp) - interval '1 month'
+              AND tsrange(start_date_time, end_date_time) && tsrange(:start_dt, :end_dt)
+            LIMIT 1
+            """,
+            {"tid": 7, "start_dt": slot_start, "end_dt": slot_end},
+        ),
+        "room conflict lookup": (
+            """
+            SELECT session_id FROM session
+            WHERE room_id = :rid
+              AND start_date_time < :end_dt
+              AND start_date_time >= CAST(:start_dt AS timestamp) - interval '1 month'
+              AND tsrange(start_date_time, end_date_time) && tsrange(:start_dt, :end_dt)
+            LIMIT 1
+            """,
+            {"rid": 3, "start_dt": slot_start, "end_dt": slot_end},
+        ),
+    }
+
+
+def find_seq_scans(plan_node, table_rows, found):
+    """Walk an EXPLAIN (FORMAT JSON) plan tree and collect big-table sequential scans."""
+    if plan_node.get("Node Type") == "Seq Scan":
+        relation = plan_node.get("Relation Name")
+        if table_rows.get(relation, 0) >= SEQ_SCAN_ROW_LIMIT:
+            found.append(relation)
+
+    for child in plan_node.get("Plans", []):
+        find_seq_scans(child, table_rows, found)
+
+    return found
+
+
+def explain(conn, statement, params: dict):
+    """EXPLAIN (FORMAT JSON) a SQL string or a SQLAlchemy statement, as it would be sent."""
+    if isinstance(statement, str):
+        statement = text(statement)
+    compiled = statement.compile(dialect=conn.dialect)
+    return conn.exec_driver_sql(
+        "EXPLAIN (FORMAT JSON) " + str(compiled), compiled.construct_params(params)
+    ).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if a hot service query uses a sequential scan.")
+    parser.add_argument("--members", type=int, default=20000)
+    parser.add_argument("--trainers", type=int, default=500)
+    parser.add_argument("--rooms", type=int, default=40)
+    parser.add_argument("--weeks", type=int, default=26)
+    parser.add_argument("--weekly-availability", action="store_true",
+                        help="load trainer shifts as weekly rules (checks the rule expansion plans)")
+    args = parser.parse_args()
+
+    now = datetime.now()
+    failures = []
+
+    # the "batch" profile has no statement timeout, which the bulk load needs
+    with get_engine("batch").connect() as conn:
+        transaction = conn.begin()
+        try:
+            print("Loading synthetic dataset (rolled back afterwards)...")
+            generate_dataset(conn, args.members, args.trainers, args.rooms, args.weeks,
+                             weekly_availability=args.weekly_availability)
+
+            table_rows = {
+                row.relname: row.reltuples
+                for row in conn.execute(text(
+                    "SELECT relname, reltuples FROM pg_class WHERE relkind = 'r'"
+                ))
+            }
+
+            for name, (statement, params) in service_queries(now).items():
+                plan = explain(conn, statement, params)
+                seq_scans = find_seq_scans(plan[0]["Plan"], table_rows, [])
+
+                if seq_scans:
+                    failures.append(name)
+                    print(f"FAIL  {name}: sequential scan on {', '.join(sorted(set(seq_scans)))}")
+                else:
+                    print(f"ok    {name}")
+        finally:
+            transaction.rollback()
+
+    if failures:
+        print(f"\n{len(failures)} query plan(s) fell back to a sequential scan.")
+        sys.exit(1)
+
+    print("\nAll service queries use index access paths.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+COMP3005 - Final Project: Health & Fitness Club Management System
+File: benchmarks/query_count_check.py
+
+Description:
+Checks that get_trainer_schedule() issues a constant number of SQL statements no
+matter how many sessions the trainer has (i.e. no N+1 lazy loads). It counts every
+statement sent to the database while the schedule is read with 1 upcoming session
+and again with many, and fails if the two counts differ or exceed the budget.
+
+Usage (from FINALPROJECT/):
+    python -m benchmarks.query_count_check --sessions 50
+
+Exits with status 1 on failure.
+"""
+
+import argparse
+import os
+import sys
+from datetime import timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.member_service import schedule_pt_session
+from app.trainer_service import get_trainer_schedule
+from benchmarks.bench_booking import create_fixture, drop_fixture
+
+
+# SET TRANSACTION READ ONLY + the schedule SELECT
+MAX_SCHEDULE_STATEMENTS = 2
+
+
+def count_statements(function, *args):
+    """Run function(*args) and return (result, number of SQL statements it executed)."""
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", on_execute)
+    try:
+        result = function(*args)
+    finally:
+        event.remove(Engine, "before_cursor_execute", on_execute)
+
+    return result, len(statements)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query-count check for get_trainer_schedule().")
+    parser.add_argument("--sessions", type=int, default=50, help="sessions in the large case")
+    args = parser.parse_args()
+
+    slot_minutes = 30
+    ids = create_fixture(args.sessions, slot_minutes)
+    counts = {}
+
+    try:
+        for i in range(args.sessions):
+            start_dt = ids["first_slot"] + timedelta(minutes=slot_minutes * i)
+            _, error = schedule_pt_session(
+                member_id=ids["member_id"],
+                trainer_id=ids["trainer_id"],
+                room_id=ids["room_id"],
+                start_dt=start_dt,
+                end_dt=start_dt + timedelta(minutes=slot_minutes),
+                created_by_admin_id=ids["admin_id"],
+            )
+            if error is not None:
+                raise RuntimeError(f"could not book session {i}: {error}")
+
+            # measure once with a single session and once with all of them
+            if i == 0 or i == args.sessions - 1:
+                rows, statements = count_statements(get_trainer_schedule, ids["trainer_id"])
+                counts[len(rows)] = statements
+                print(f"{len(rows):>5} session(s): {statements} statement(s)")
+    finally:
+        drop_fixture(ids)
+
+    distinct_counts = set(counts.values())
+    if len(distinct_counts) != 1 or max(distinct_counts) > MAX_SCHEDULE_STATEMENTS:
+        print(f"FAIL: expected a constant count of at most {MAX_SCHEDULE_STATEMENTS} statements.")
+        sys.exit(1)
+
+    print("ok: get_trainer_schedule() statement count does not grow with the schedule.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+COMP3005 - Final Project: Health & Fitness Club Management System
+File: benchmarks/startup_check.py
+
+Description:
+Startup budget check for the CLI. Everything app/main.py imports runs before the main
+menu shows, so that import has to stay small: it must take at most STARTUP_BUDGET_MS
+(cumulative, as reported by python -X importtime) and must not pull in SQLAlchemy, the
+database drivers, database.py, the models or any other app module. Those load when a
+menu is first opened; the check also reports that first-use cost, for reference.
+
+Each measurement runs in a fresh interpreter, like a terminal that was just restarted.
+The project's bytecode is compiled first (as it is on an installed terminal), so source
+compilation is not counted.
+
+Usage (from FINALPROJECT/):
+    python -m benchmarks.startup_check --runs 5
+
+Exits with status 1 if the budget is exceeded or a heavy module is imported at startup.
+"""
+
+import argparse
+import compileall
+import os
+import statistics
+import subprocess
+import sys
+
+
+# budget for importing app.main (everything that runs before the main menu), in ms
+STARTUP_BUDGET_MS = 25
+
+# packages / modules that must not be imported before a menu is opened (any module in
+# them counts); the app package itself and app.main are the exceptions
+HEAVY_PACKAGES = ("sqlalchemy", "psycopg2", "asyncpg", "database", "models", "app")
+STARTUP_MODULES = ("app", "app.main")
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Import `module` in a fresh interpreter; returns module name -> cumulative us."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def import_cost_ms(module: str, times: dict[str, int]) -> float:
+    """Cumulative import time of `module` and its parent packages, in ms."""
+    parts = module.split(".")
+    names = [".".join(parts[:depth]) for depth in range(1, len(parts) + 1)]
+    return sum(times.get(name, 0) for name in names) / 1000
+
+
+def is_heavy(name: str) -> bool:
+    return name not in STARTUP_MODULES and name.split(".")[0] in HEAVY_PACKAGES
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI startup budget (python -X importtime).")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to measure")
+    args = parser.parse_args()
+
+    compileall.compile_dir(PROJECT_ROOT, quiet=1)
+
+    startup, first_use = [], []
+    heavy = set()
+    for _ in range(args.runs):
+        times = import_times("app.main")
+        startup.append(import_cost_ms("app.main", times))
+        heavy.update(name for name in times if is_heavy(name))
+
+        # what opening the member menu costs the first time (not part of the budget)
+        first_use.append(import_cost_ms("app.member_service", import_times("app.member_service")))
+
+    startup_ms = statistics.median(startup)
+    print(f"import app.main (before the main menu): {startup_ms:7.1f} ms  (budget {STARTUP_BUDGET_MS} ms)")
+    print(f"first member menu (services, models, SQLAlchemy): {statistics.median(first_use):7.1f} ms")
+
+    failed = False
+    if startup_ms > STARTUP_BUDGET_MS:
+        print(f"FAIL: startup import is over budget by {startup_ms - STARTUP_BUDGET_MS:.1f} ms")
+        failed = True
+    if heavy:
+        print(f"FAIL: imported at startup: {', '.join(sorted(heavy)[:10])}"
+              + (f" (+{len(heavy) - 10} more)" if len(heavy) > 10 else ""))
+        failed = True
+
+    if failed:
+        sys.exit(1)
+    print("OK: startup stays within budget and loads no database code")
+
+
+if __name__ == "__main__":
+    main()
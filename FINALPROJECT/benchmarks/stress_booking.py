@@ -0,0 +1,248 @@
+"""
+COMP3005 - Final Project: Health & Fitness Club Management System
+File: benchmarks/stress_booking.py
+
+Description:
+Multi-threaded stress test for the booking path (schedule_pt_session() ->
+book_session() with its per-resource advisory locks, wrapped in run_transaction()).
+
+Two phases, each with --threads threads calling the real service function:
+  - contended: every thread books random slots for a small pool of trainers, rooms and
+    members, with windows that overlap their neighbours, so most attempts clash on
+    at least one resource (often on two, in opposite orders for two threads).
+  - independent: every thread books back-to-back slots for its own trainer, room and
+    member, so nothing should ever wait; this phase is timed to get bookings / second.
+
+Afterwards it checks the database directly: no two fixture sessions may overlap for the
+same trainer, room or member, and no booking may have failed with anything but a clean
+conflict message. It also prints how many deadlocks the server detected during the run
+(pg_stat_database), which should be 0 now that conflicting bookings queue on the locks.
+
+The services use the default engine profile, so this script defaults it to "api" (the
+"cli" pool only has 4 connections). Everything it creates is deleted at the end.
+
+Usage (from FINALPROJECT/):
+    python -m benchmarks.stress_booking --threads 8 --attempts 50
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+# must be set before database.py is imported (it picks the default profile at import time)
+os.environ.setdefault("HEALTH_CLUB_DB_PROFILE", "api")
+
+from sqlalchemy import text
+
+from database import get_engine, get_session
+from models.member import Member
+from models.trainer import Trainer
+from models.room import Room
+from models.admin_staff import Admin_staff
+from models.trainer_availability import TrainerAvailability
+from models.session import Session as SessionModel
+from app.member_service import schedule_pt_session
+
+
+SLOT_MINUTES = 30
+
+# the messages book_session() gives for a lost race; anything else is a failure
+CLEAN_CONFLICT_PREFIXES = ("Member already has", "Trainer is already scheduled", "Room is already booked")
+
+_OVERLAP_SQL = """
+    SELECT COUNT(*)
+    FROM session a
+    JOIN session b
+      ON a.{column} = b.{column}
+     AND a.session_id < b.session_id
+     AND a.start_date_time < b.end_date_time
+     AND b.start_date_time < a.end_date_time
+    WHERE a.trainer_id = ANY(:trainer_ids)
+"""
+
+
+def create_fixture(threads: int, hot: int, slots: int) -> dict:
+    """Insert one admin plus trainers / rooms / members for both phases; return their ids."""
+    first_slot = datetime.now().replace(second=0, microsecond=0) + timedelta(days=3650)
+    window_end = first_slot + timedelta(minutes=SLOT_MINUTES * (slots + 2))
+    tag = f"stress{int(time.time())}"
+    count = hot + threads
+
+    with get_session() as db:
+        admin = Admin_staff(first_name="Stress", last_name="Admin", email=f"{tag}.admin@bench.local")
+        trainers = [
+            Trainer(first_name="Stress", last_name=f"Trainer{i}", gender="Other",
+                    email=f"{tag}.trainer{i}@bench.local")
+            for i in range(count)
+        ]
+        members = [
+            Member(first_name="Stress", last_name=f"Member{i}", gender="Other",
+                   email=f"{tag}.member{i}@bench.local")
+            for i in range(count)
+        ]
+        db.add(admin)
+        db.add_all(trainers + members)
+        db.flush()
+
+        rooms = [Room(room_name=f"{tag} room {i}", max_capacity=1, admin=admin) for i in range(count)]
+        db.add_all(rooms)
+        db.add_all([
+            TrainerAvailability(trainer=trainer, start_date_time=first_slot, end_date_time=window_end)
+            for trainer in trainers
+        ])
+        db.flush()
+
+        return {
+            "admin_id": admin.admin_id,
+            # the first `hot` of each are shared by the contended phase, the rest are one per thread
+            "trainer_ids": [trainer.trainer_id for trainer in trainers],
+            "member_ids": [member.member_id for member in members],
+            "room_ids": [room.room_id for room in rooms],
+            "first_slot": first_slot,
+        }
+
+
+def drop_fixture(ids: dict):
+    """Delete everything create_fixture() and the booking threads inserted."""
+    with get_session() as db:
+        db.query(SessionModel).filter(SessionModel.trainer_id.in_(ids["trainer_ids"])).delete()
+        db.query(TrainerAvailability).filter(
+            TrainerAvailability.trainer_id.in_(ids["trainer_ids"])
+        ).delete()
+        db.query(Room).filter(Room.room_id.in_(ids["room_ids"])).delete()
+        db.query(Member).filter(Member.member_id.in_(ids["member_ids"])).delete()
+        db.query(Trainer).filter(Trainer.trainer_id.in_(ids["trainer_ids"])).delete()
+        db.query(Admin_staff).filter(Admin_staff.admin_id == ids["admin_id"]).delete()
+
+
+def server_deadlocks() -> int:
+    with get_engine().connect() as conn:
+        return conn.execute(text(
+            "SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()"
+        )).scalar()
+
+
+def run_threads(worker, threads: int) -> tuple[float, list]:
+    """Start `threads` copies of worker(index, outcomes) together; return (seconds, outcomes)."""
+    outcomes = []
+    barrier = threading.Barrier(threads + 1)
+
+    def target(index):
+        barrier.wait()
+        worker(index, outcomes)
+
+    pool = [threading.Thread(target=target, args=(index,)) for index in range(threads)]
+    for thread in pool:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in pool:
+        thread.join()
+    return time.perf_counter() - started, outcomes
+
+
+def contended_phase(ids: dict, threads: int, hot: int, attempts: int, slots: int, seed: int):
+    """Every thread books random, overlapping one-hour windows on the shared resources."""
+
+    def worker(index, outcomes):
+        rng = random.Random(seed * 1000 + index)
+        for _ in range(attempts):
+            # one-hour windows on a half-hour grid, so each one overlaps its neighbours
+            start_dt = ids["first_slot"] + timedelta(minutes=SLOT_MINUTES * rng.randrange(slots))
+            _, error = schedule_pt_session(
+                member_id=rng.choice(ids["member_ids"][:hot]),
+                trainer_id=rng.choice(ids["trainer_ids"][:hot]),
+                room_id=rng.choice(ids["room_ids"][:hot]),
+                start_dt=start_dt,
+                end_dt=start_dt + timedelta(minutes=2 * SLOT_MINUTES),
+                created_by_admin_id=ids["admin_id"],
+            )
+            outcomes.append(error)
+
+    return run_threads(worker, threads)
+
+
+def independent_phase(ids: dict, threads: int, hot: int, attempts: int):
+    """Every thread books back-to-back slots on its own trainer, room and member."""
+
+    def worker(index, outcomes):
+        for i in range(attempts):
+            start_dt = ids["first_slot"] + timedelta(minutes=SLOT_MINUTES * i)
+            _, error = schedule_pt_session(
+                member_id=ids["member_ids"][hot + index],
+                trainer_id=ids["trainer_ids"][hot + index],
+                room_id=ids["room_ids"][hot + index],
+                start_dt=start_dt,
+                end_dt=start_dt + timedelta(minutes=SLOT_MINUTES),
+                created_by_admin_id=ids["admin_id"],
+            )
+            outcomes.append(error)
+
+    return run_threads(worker, threads)
+
+
+def count_overlaps(ids: dict) -> dict:
+    """Overlapping session pairs per resource among the fixture's sessions (must all be 0)."""
+    with get_engine().connect() as conn:
+        return {
+            column: conn.execute(
+                text(_OVERLAP_SQL.format(column=column)), {"trainer_ids": ids["trainer_ids"]}
+            ).scalar()
+            for column in ("trainer_id", "room_id", "member_id")
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-threaded booking stress test.")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--attempts", type=int, default=50, help="bookings tried per thread per phase")
+    parser.add_argument("--hot", type=int, default=3, help="shared trainers / rooms / members in the contended phase")
+    parser.add_argument("--slots", type=int, default=24, help="half-hour start times in the contended phase")
+    parser.add_argument("--seed", type=int, default=3005)
+    args = parser.parse_args()
+
+    ids = create_fixture(args.threads, args.hot, max(args.slots, args.attempts))
+    failed = False
+    try:
+        deadlocks_before = server_deadlocks()
+
+        seconds, outcomes = contended_phase(ids, args.threads, args.hot, args.attempts, args.slots, args.seed)
+        booked = outcomes.count(None)
+        unexpected = [e for e in outcomes if e is not None and not e.startswith(CLEAN_CONFLICT_PREFIXES)]
+        print(f"contended:   {len(outcomes)} attempts, {booked} booked, "
+              f"{len(outcomes) - booked - len(unexpected)} clean conflicts, "
+              f"{len(unexpected)} other errors, {len(outcomes) / seconds:.0f} attempts/s")
+        for error in unexpected[:5]:
+            print(f"  {error}")
+
+        seconds, outcomes = independent_phase(ids, args.threads, args.hot, args.attempts)
+        errors = [e for e in outcomes if e is not None]
+        unexpected += errors
+        print(f"independent: {len(outcomes)} attempts, {len(outcomes) - len(errors)} booked, "
+              f"{len(errors)} errors, {len(outcomes) / seconds:.0f} bookings/s")
+        for error in errors[:5]:
+            print(f"  {error}")
+
+        deadlocks = server_deadlocks() - deadlocks_before
+        overlaps = count_overlaps(ids)
+        print(f"deadlocks detected by the server: {deadlocks}")
+        print("overlapping pairs: " + ", ".join(f"{column} {count}" for column, count in overlaps.items()))
+
+        failed = bool(unexpected) or any(overlaps.values())
+    finally:
+        drop_fixture(ids)
+
+    if failed:
+        print("FAILED")
+        sys.exit(1)
+    print("OK: no double bookings, no unexpected errors")
+
+
+if __name__ == "__main__":
+    main()
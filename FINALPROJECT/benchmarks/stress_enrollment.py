@@ -0,0 +1,199 @@
+"""
+COMP3005 - Final Project: Health & Fitness Club Management System
+File: benchmarks/stress_enrollment.py
+
+Description:
+Load test for class enrollment (enroll_in_class() / unenroll_from_class() and the
+session.enrolled_count counter they keep).
+
+Two phases against one CLASS session with --capacity places:
+  - rush: --members threads, one per member, all call enroll_in_class() at the same
+    moment (the 6am sign-up for a popular class). Exactly --capacity of them must get
+    a place and every other one must be told the class is full.
+  - churn: --threads threads each make --attempts random join / leave calls for random
+    members of the same pool, so places are freed and re-taken while the class is full.
+
+After each phase it checks the database directly: enrolled_count must equal the number
+of class_enrollment rows and never exceed max_capacity, and no call may have failed with
+anything but a clean "full / already enrolled / not enrolled" message.
+
+The services use the default engine profile, so this script defaults it to "api" (the
+"cli" pool only has 4 connections). Everything it creates is deleted at the end.
+
+Usage (from FINALPROJECT/):
+    python -m benchmarks.stress_enrollment --members 300 --capacity 25
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+# must be set before database.py is imported (it picks the default profile at import time)
+os.environ.setdefault("HEALTH_CLUB_DB_PROFILE", "api")
+
+from sqlalchemy import text
+
+from database import get_engine, get_session
+from models.member import Member
+from models.trainer import Trainer
+from models.room import Room
+from models.admin_staff import Admin_staff
+from models.session import Session as SessionModel
+from models.class_enrollment import ClassEnrollment
+from app.member_service import enroll_in_class, unenroll_from_class
+from benchmarks.stress_booking import run_threads
+
+
+# the messages enroll_in_class() / unenroll_from_class() give for a lost race or a
+# pointless call; anything else is a failure
+CLEAN_MESSAGES = ("is full", "is already enrolled", "is not enrolled")
+
+
+def create_fixture(members: int, capacity: int) -> dict:
+    """Insert one admin, trainer, room, CLASS session and `members` members; return their ids."""
+    start_dt = datetime.now().replace(second=0, microsecond=0) + timedelta(days=3650)
+    tag = f"enroll{int(time.time())}"
+
+    with get_session() as db:
+        admin = Admin_staff(first_name="Stress", last_name="Admin", email=f"{tag}.admin@bench.local")
+        trainer = Trainer(first_name="Stress", last_name="Trainer", gender="Other",
+                          email=f"{tag}.trainer@bench.local")
+        member_rows = [
+            Member(first_name="Stress", last_name=f"Member{i}", gender="Other",
+                   email=f"{tag}.member{i}@bench.local")
+            for i in range(members)
+        ]
+        db.add_all([admin, trainer] + member_rows)
+        db.flush()
+
+        room = Room(room_name=f"{tag} studio", max_capacity=capacity, admin=admin)
+        db.add(room)
+        db.flush()
+
+        # inserted directly: the booking checks are not what this script is testing
+        session = SessionModel(
+            session_type="CLASS",
+            start_date_time=start_dt,
+            end_date_time=start_dt + timedelta(hours=1),
+            max_capacity=capacity,
+            room_id=room.room_id,
+            created_by_admin_id=admin.admin_id,
+            trainer_id=trainer.trainer_id,
+        )
+        db.add(session)
+        db.flush()
+
+        return {
+            "admin_id": admin.admin_id,
+            "trainer_id": trainer.trainer_id,
+            "room_id": room.room_id,
+            "session_id": session.session_id,
+            "member_ids": [member.member_id for member in member_rows],
+        }
+
+
+def drop_fixture(ids: dict):
+    """Delete everything create_fixture() and the enrollment threads inserted."""
+    with get_session() as db:
+        db.query(ClassEnrollment).filter(ClassEnrollment.session_id == ids["session_id"]).delete()
+        db.query(SessionModel).filter(SessionModel.session_id == ids["session_id"]).delete()
+        db.query(Room).filter(Room.room_id == ids["room_id"]).delete()
+        db.query(Member).filter(Member.member_id.in_(ids["member_ids"])).delete()
+        db.query(Trainer).filter(Trainer.trainer_id == ids["trainer_id"]).delete()
+        db.query(Admin_staff).filter(Admin_staff.admin_id == ids["admin_id"]).delete()
+
+
+def class_state(session_id: int) -> tuple[int, int, int]:
+    """(enrolled_count, enrollment rows, max_capacity) of the class, straight from the tables."""
+    with get_engine().connect() as conn:
+        return conn.execute(text("""
+            SELECT s.enrolled_count,
+                   (SELECT COUNT(*) FROM class_enrollment e WHERE e.session_id = s.session_id),
+                   s.max_capacity
+            FROM session s
+            WHERE s.session_id = :sid
+        """), {"sid": session_id}).one()
+
+
+def rush_phase(ids: dict):
+    """Every member signs up for the class at the same moment."""
+
+    def worker(index, outcomes):
+        _, error = enroll_in_class(ids["member_ids"][index], ids["session_id"])
+        outcomes.append(error)
+
+    return run_threads(worker, len(ids["member_ids"]))
+
+
+def churn_phase(ids: dict, threads: int, attempts: int, seed: int):
+    """Random members join and leave the (full) class from many threads at once."""
+
+    def worker(index, outcomes):
+        rng = random.Random(seed * 1000 + index)
+        for _ in range(attempts):
+            member_id = rng.choice(ids["member_ids"])
+            if rng.random() < 0.5:
+                _, error = enroll_in_class(member_id, ids["session_id"])
+            else:
+                _, error = unenroll_from_class(member_id, ids["session_id"])
+            outcomes.append(error)
+
+    return run_threads(worker, threads)
+
+
+def check_class(ids: dict, label: str) -> bool:
+    """Print the class's counter vs. its rows; True if they agree and fit the capacity."""
+    enrolled_count, rows, max_capacity = class_state(ids["session_id"])
+    consistent = enrolled_count == rows and 0 <= rows <= max_capacity
+    print(f"  {label}: enrolled_count {enrolled_count}, enrollment rows {rows}, "
+          f"capacity {max_capacity} -> {'ok' if consistent else 'INCONSISTENT'}")
+    return consistent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent class enrollment load test.")
+    parser.add_argument("--members", type=int, default=300, help="members signing up at once (one thread each)")
+    parser.add_argument("--capacity", type=int, default=25, help="places in the class")
+    parser.add_argument("--threads", type=int, default=32, help="threads in the churn phase")
+    parser.add_argument("--attempts", type=int, default=50, help="join / leave calls per churn thread")
+    parser.add_argument("--seed", type=int, default=3005)
+    args = parser.parse_args()
+
+    ids = create_fixture(args.members, args.capacity)
+    failed = False
+    try:
+        seconds, outcomes = rush_phase(ids)
+        enrolled = outcomes.count(None)
+        unexpected = [e for e in outcomes if e is not None and not any(m in e for m in CLEAN_MESSAGES)]
+        expected = min(args.capacity, args.members)
+        print(f"rush:  {len(outcomes)} simultaneous sign-ups, {enrolled} enrolled (expected {expected}), "
+              f"{len(outcomes) - enrolled - len(unexpected)} told the class is full, "
+              f"{len(unexpected)} other errors, {len(outcomes) / seconds:.0f} sign-ups/s")
+        for error in unexpected[:5]:
+            print(f"  {error}")
+        failed |= not check_class(ids, "after rush") or enrolled != expected or bool(unexpected)
+
+        seconds, outcomes = churn_phase(ids, args.threads, args.attempts, args.seed)
+        changed = outcomes.count(None)
+        unexpected = [e for e in outcomes if e is not None and not any(m in e for m in CLEAN_MESSAGES)]
+        print(f"churn: {len(outcomes)} join / leave calls, {changed} changed the class, "
+              f"{len(unexpected)} other errors, {len(outcomes) / seconds:.0f} calls/s")
+        for error in unexpected[:5]:
+            print(f"  {error}")
+        failed |= not check_class(ids, "after churn") or bool(unexpected)
+    finally:
+        drop_fixture(ids)
+
+    if failed:
+        print("FAILED")
+        sys.exit(1)
+    print("OK: never oversold, counter always matched the enrollment rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, ForeignKeyConstraint, func
+from sqlalchemy.orm import relationship
+from database import Base
+
+# One member's place in a CLASS session. The number of rows per session is mirrored in
+# session.enrolled_count, which enroll_in_class() / unenroll_from_class() keep in step
+# (see member_service.py), so capacity is never checked by counting these rows.
+class ClassEnrollment(Base):
+    __tablename__ = "class_enrollment"
+
+    # primary key (a member can only hold one place in a class)
+    session_id = Column(Integer, primary_key=True)
+    member_id = Column(Integer, ForeignKey("member.member_id"), primary_key=True)
+    # the class's start time: session is partitioned on it, so it is part of the key
+    # this table points at
+    session_start = Column(DateTime, nullable=False)
+    enrolled_at = Column(DateTime, nullable=False, server_default=func.localtimestamp())
+
+    # class_enrollment has many-to-one relationship to Session
+    session = relationship("Session")
+    # class_enrollment has many-to-one relationship to Member
+    member = relationship("Member")
+
+    __table_args__ = (
+        # follows the class if it is moved to another time
+        ForeignKeyConstraint(
+            ["session_id", "session_start"],
+            ["session.session_id", "session.start_date_time"],
+            name="fk_class_enrollment_session",
+            ondelete="CASCADE",
+            onupdate="CASCADE",
+        ),
+    )
+
+    def __repr__(self) -> str:
+        return f"<ClassEnrollment session_id={self.session_id} member_id={self.member_id}>"
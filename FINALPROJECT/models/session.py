@@ -2,15 +2,21 @@ from sqlalchemy import Column, Integer, String, Numeric, CheckConstraint, DateTi
 from sqlalchemy.orm import relationship
 from database import Base
 
+# Range partitioned by month on start_date_time (see app/partitioning.py).
 class Session(Base):
     __tablename__ = "session"
 
     # primary key and attributes
     session_id = Column(Integer, primary_key=True, autoincrement=True)
     session_type = Column(String(10), nullable=False)
-    start_date_time = Column(DateTime, nullable=False)
+    # partition key, hence part of the primary key (session_id alone still comes
+    # from a sequence, so it stays unique)
+    start_date_time = Column(DateTime, primary_key=True)
     end_date_time = Column(DateTime, nullable=False)
     max_capacity = Column(Integer, nullable=False)
+    # CLASS sessions: members currently enrolled (rows in class_enrollment), kept in step
+    # by enroll_in_class() / unenroll_from_class(); always 0 for PT sessions
+    enrolled_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     # foreign keys
     room_id = Column(Integer, ForeignKey("room.room_id"), nullable=False)
@@ -40,6 +46,18 @@ class Session(Base):
             "end_date_time > start_date_time",
             name="ck_session_end_after_start",
         ),
+        # the last line of defence against overselling a class
+        CheckConstraint(
+            "enrolled_count BETWEEN 0 AND max_capacity",
+            name="ck_session_enrolled_within_capacity",
+        ),
+        # a session can only reach into the month after the partition it lives in;
+        # queries rely on this to skip older partitions
+        CheckConstraint(
+            "end_date_time <= start_date_time + interval '1 month'",
+            name="ck_session_at_most_a_month",
+        ),
+        {"postgresql_partition_by": "RANGE (start_date_time)"},
     )
 
     def __repr__(self) -> str:
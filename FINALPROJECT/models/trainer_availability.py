@@ -2,12 +2,14 @@ from sqlalchemy import Column, Integer, String, Numeric, CheckConstraint, DateTi
 from sqlalchemy.orm import relationship
 from database import Base
 
+# Range partitioned by month on start_date_time, like session (see app/partitioning.py).
 class TrainerAvailability(Base):
     __tablename__ = "trainer_availability"
 
     # primary key and attributes
     availability_id = Column(Integer, primary_key=True, autoincrement=True)
-    start_date_time = Column(DateTime, nullable=False)
+    # partition key, hence part of the primary key
+    start_date_time = Column(DateTime, primary_key=True)
     end_date_time = Column(DateTime, nullable=False)
     # foreign key 
     trainer_id = Column(Integer, ForeignKey("trainer.trainer_id"), nullable=False)
@@ -20,6 +22,12 @@ class TrainerAvailability(Base):
             "end_date_time > start_date_time",
             name="ck_availability_end_after_start",
         ),
+        # longer stretches are weekly rules (trainer_availability_rule); see ck_session_at_most_a_month
+        CheckConstraint(
+            "end_date_time <= start_date_time + interval '1 month'",
+            name="ck_availability_at_most_a_month",
+        ),
+        {"postgresql_partition_by": "RANGE (start_date_time)"},
     )
 
     def __repr__(self) -> str:
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey
+from sqlalchemy.orm import relationship
+from database import Base
+
+# One date on which a recurring availability rule does not apply (holiday, day off, ...).
+class TrainerAvailabilityException(Base):
+    __tablename__ = "trainer_availability_exception"
+
+    # primary key (one row per rule and date)
+    rule_id = Column(
+        Integer,
+        ForeignKey("trainer_availability_rule.rule_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    exception_date = Column(Date, primary_key=True)
+
+    # trainer_availability_exception has many-to-one relationship to TrainerAvailabilityRule
+    rule = relationship("TrainerAvailabilityRule", back_populates="exceptions")
+
+    def __repr__(self) -> str:
+        return f"<TrainerAvailabilityException rule_id={self.rule_id} date={self.exception_date}>"
@@ -0,0 +1,49 @@
+from sqlalchemy import Column, Integer, Time, Date, CheckConstraint, ForeignKey
+from sqlalchemy.orm import relationship
+from database import Base
+# imported so the `exceptions` relationship below can always be resolved
+from models.trainer_availability_exception import TrainerAvailabilityException
+
+# A weekly recurring availability block, e.g. "Mondays 09:00-17:00 from 2026-01-05".
+# One row stands for every occurrence; occurrences are only worked out for the window
+# being checked (see trainer_availability_windows() in app/ddl_extras.py).
+class TrainerAvailabilityRule(Base):
+    __tablename__ = "trainer_availability_rule"
+
+    # primary key and attributes
+    rule_id = Column(Integer, primary_key=True, autoincrement=True)
+    # 0 = Monday ... 6 = Sunday (same as Python's date.weekday())
+    weekday = Column(Integer, nullable=False)
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=False)
+    effective_from = Column(Date, nullable=False)
+    # NULL = no end date
+    effective_until = Column(Date)
+    # foreign key
+    trainer_id = Column(Integer, ForeignKey("trainer.trainer_id"), nullable=False)
+
+    # trainer_availability_rule has many-to-one relationship to Trainer
+    trainer = relationship("Trainer")
+    # trainer_availability_rule has one-to-many relationship to TrainerAvailabilityException
+    exceptions = relationship(
+        "TrainerAvailabilityException",
+        back_populates="rule",
+        cascade="all, delete-orphan",
+    )
+
+    __table_args__ = (
+        CheckConstraint("weekday BETWEEN 0 AND 6", name="ck_availability_rule_weekday"),
+        # occurrences never cross midnight
+        CheckConstraint("end_time > start_time", name="ck_availability_rule_end_after_start"),
+        CheckConstraint(
+            "effective_until IS NULL OR effective_until >= effective_from",
+            name="ck_availability_rule_effective_range",
+        ),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<TrainerAvailabilityRule id={self.rule_id} trainer_id={self.trainer_id} "
+            f"weekday={self.weekday} {self.start_time}-{self.end_time} "
+            f"from={self.effective_from} until={self.effective_until}>"
+        )